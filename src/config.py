@@ -14,9 +14,27 @@ class Config(BaseModel):
     shared_data_dir: str
     local_data_dir: str
     k8s_namespace: str
+    k8s_api_threads: int
     shared_pvc_name: str
     local_pvc_name: str
     hdt_upload_callback_url: str
+    job_history_configmap: str
+    sizing_enabled: bool
+    sizing_base_memory_gib: int
+    sizing_min_memory_gib: int
+    sizing_max_memory_gib: int
+    sizing_max_cpu: int
+    job_telemetry_configmap: str
+    job_metrics_enabled: bool
+    job_metrics_sample_secs: int
+    hdt_stage_parallelism: int
+    hdt_stream_nt: bool
+    nt_write_zst: bool
+    nt_read_zst: bool
+    hdt_shard_size_gib: int
+    hdt_max_shards: int
+    hdt_merge_image: str
+    hdt_merge_command: str
     neo4j_upload_callback_url: str
     spider_ip: str
     spider_port: int
@@ -29,6 +47,8 @@ class Config(BaseModel):
     smtp_server: str
     gh_token: str
     kg_config_url: str
+    kg_config_ttl_secs: int
+    kg_config_fetch_timeout_secs: int
     stop_email: str
     temporal_host: str
     temporal_namespace: str
@@ -44,6 +64,15 @@ class Config(BaseModel):
     ldf_image: str
     ldf_extra_datasources: list[dict]
     ldf_sync_image: str
+    ldf_sync_concurrency: int
+    ldf_sync_batch_size: int
+    ldf_sync_pod_concurrency: int
+    ldf_index_image: str
+    ldf_index_command: str
+    ldf_index_memory: str
+    ldf_index_java_opts: str
+    ldf_index_timeout_secs: int
+    ldf_upload_generated_index: bool
     ldf_host_name: str
     qlever_image: str
     qlever_indexer_cpu: str
@@ -52,11 +81,20 @@ class Config(BaseModel):
     qlever_index_pvc_size: str
     qlever_index_pvc_storage_class: str
     qlever_source_path: str
+    qlever_source_cache_dir: str
+    qlever_source_cache_max_gib: int
     qlever_state_configmap: str
     qlever_index_pvc_prefix: str
     qlever_index_previous_ttl_hours: int
     qlever_download_concurrency: int
+    qlever_ref_resolve_concurrency: int
     qlever_num_triples_per_batch: int
+    qlever_stage_sources: bool
+    qlever_stage_image: str
+    qlever_stage_format: str
+    qlever_stage_concurrency: int
+    qlever_stage_cpu: str
+    qlever_stage_memory: str
     qlever_federation_cpu: str
     qlever_federation_memory: str
     qlever_federation_cache_pct: float
@@ -78,9 +116,47 @@ config = Config(
     shared_data_dir=os.environ.get('SHARED_DATA_DIR',''),
     local_data_dir=os.environ.get('LOCAL_DATA_DIR',f'{os.path.dirname(__file__)}/../data'),
     k8s_namespace=os.environ.get('K8S_NAMESPACE', ''),
+    # Worker threads reserved for blocking kubernetes-client calls (k8s.executor).
+    k8s_api_threads=int(os.environ.get('K8S_API_THREADS', '8')),
     shared_pvc_name=os.environ.get('SHARED_PVC_NAME', ''),
     local_pvc_name=os.environ.get('LOCAL_PVC_NAME', ''),
     hdt_upload_callback_url=os.environ.get('HDT_UPLOAD_CALLBACK_URL', 'http://localhost:9898/upload_hdt_callback'),
+    # Per-repo history of conversion runs (input size, resources, outcome)
+    # that temporal_app.sizing uses when /convert_to_hdt gets no resources.
+    job_history_configmap=os.environ.get('JOB_HISTORY_CONFIGMAP', 'kace-job-history'),
+    # Off: conversions keep the fixed resources they had before sizing
+    # (3 cpu / 4Gi for /convert_to_hdt, 3 cpu / 20Gi for neo4j-rdf).
+    sizing_enabled=os.environ.get('SIZING_ENABLED', 'true').lower() == 'true',
+    sizing_base_memory_gib=int(os.environ.get('SIZING_BASE_MEMORY_GIB', '4')),
+    sizing_min_memory_gib=int(os.environ.get('SIZING_MIN_MEMORY_GIB', '4')),
+    sizing_max_memory_gib=int(os.environ.get('SIZING_MAX_MEMORY_GIB', '256')),
+    sizing_max_cpu=int(os.environ.get('SIZING_MAX_CPU', '16')),
+    # Per job type / repo records of finished jobs (k8s.job_telemetry), and
+    # how often running jobs' usage is sampled from metrics.k8s.io.
+    job_telemetry_configmap=os.environ.get('JOB_TELEMETRY_CONFIGMAP', 'kace-job-telemetry'),
+    job_metrics_enabled=os.environ.get('JOB_METRICS_ENABLED', 'true').lower() == 'true',
+    job_metrics_sample_secs=int(os.environ.get('JOB_METRICS_SAMPLE_SECS', '60')),
+    # Post-conversion jobs of one HDT run (nt dump, void, riot, qlever) allowed
+    # to run at once; /convert_to_hdt?stage_parallelism= overrides it per run.
+    hdt_stage_parallelism=int(os.environ.get('HDT_STAGE_PARALLELISM', '2')),
+    # Dump graph.hdt to a plain nt/graph.nt that the per-KG QLever index reads
+    # directly, while a separate job gzips it into graph.nt.gz; the plain file
+    # is deleted once both are done. Needs room for the uncompressed dump.
+    hdt_stream_nt=os.environ.get('HDT_STREAM_NT', 'false').lower() == 'true',
+    # graph.nt.zst sibling next to graph.nt.gz (hdtc image needs zstd), and
+    # whether QLever builds read .zst when present (qlever image needs zstd).
+    nt_write_zst=os.environ.get('NT_WRITE_ZST', 'false').lower() == 'true',
+    nt_read_zst=os.environ.get('NT_READ_ZST', 'false').lower() == 'true',
+    # Sharded HDT creation: inputs above this many GiB are split into shards of
+    # about this size, converted by parallel hdtc pods and merged. 0 disables.
+    hdt_shard_size_gib=int(os.environ.get('HDT_SHARD_SIZE_GIB', '0')),
+    hdt_max_shards=int(os.environ.get('HDT_MAX_SHARDS', '8')),
+    # Pinned qEndpoint CLI release (hdtCat.sh -kcat, hdtSearch.sh).
+    hdt_merge_image=os.environ.get('HDT_MERGE_IMAGE', 'containers.renci.org/frink/qendpoint:v2.5.2'),
+    # {inputs}: space-separated shard HDTs, {output}: merged HDT. The second
+    # command builds the graph.hdt.index.v1-1 side index on first map.
+    hdt_merge_command=os.environ.get('HDT_MERGE_COMMAND',
+                                     'hdtCat.sh -kcat {inputs} {output} && hdtSearch.sh {output} < /dev/null'),
     neo4j_upload_callback_url=os.environ.get('NEO4J_UPLOAD_CALLBACK_URL', 'http://localhost:9898/upload_neo4j_files'),
     slack_webhook_url=os.environ.get('SLACK_URL', ''),
     spider_ip=os.environ.get('SPIDER_IP', ''),
@@ -94,6 +170,8 @@ config = Config(
     smtp_port=int(os.environ.get('SMTP_PORT', 25)),
     gh_token=os.environ.get('GH_TOKEN', ''),
     kg_config_url=os.environ.get('KG_CONFIG_URL', 'https://raw.githubusercontent.com/frink-okn/okn-registry/refs/heads/main/docs/registry/kgs.yaml'),
+    kg_config_ttl_secs=int(os.environ.get('KG_CONFIG_TTL_SECS', '300')),
+    kg_config_fetch_timeout_secs=int(os.environ.get('KG_CONFIG_FETCH_TIMEOUT_SECS', '10')),
     stop_email=os.environ.get('STOP_EMAIL', ''),
     temporal_host=os.environ.get('TEMPORAL_HOST', 'localhost:7233'),
     temporal_namespace=os.environ.get('TEMPORAL_NAMESPACE', 'default'),
@@ -109,6 +187,29 @@ config = Config(
     ldf_image=os.environ.get('LDF_IMAGE', 'containers.renci.org/frink/ldf-server:2023-09-13'),
     ldf_extra_datasources=__import__('json').loads(os.environ.get('LDF_EXTRA_DATASOURCES', '[]')),
     ldf_sync_image=os.environ.get('LDF_SYNC_IMAGE', ''),
+    # KGs LDFSyncWorkflow downloads at once, across all its sync Jobs
+    # (LakeFS and PVC write bandwidth are the limit); /sync_ldf?concurrency=
+    # overrides it.
+    ldf_sync_concurrency=int(os.environ.get('LDF_SYNC_CONCURRENCY', '4')),
+    # Changed KGs per sync Job (at most 16, so its results fit the termination
+    # message), and how many of them that one pod pulls at once
+    # (k8s.jobs.ldf_sync_kg --manifest). Jobs run at once is
+    # LDF_SYNC_CONCURRENCY // LDF_SYNC_POD_CONCURRENCY, at least one.
+    ldf_sync_batch_size=int(os.environ.get('LDF_SYNC_BATCH_SIZE', '16')),
+    ldf_sync_pod_concurrency=int(os.environ.get('LDF_SYNC_POD_CONCURRENCY', '4')),
+    # Side indexes (graph.hdt.index.v1-1) missing from LakeFS are built once
+    # by an index Job, run only for the KGs a sync Job reports needing one,
+    # instead of by every ldf-server replica at startup. {hdt}: the
+    # graph.hdt to index. An empty image turns this off. The timeout is per
+    # KG; an index Job builds its KGs one after another.
+    ldf_index_image=os.environ.get('LDF_INDEX_IMAGE', 'containers.renci.org/frink/qendpoint:v2.5.2'),
+    ldf_index_command=os.environ.get('LDF_INDEX_COMMAND', 'hdtSearch.sh {hdt} < /dev/null > /dev/null'),
+    ldf_index_memory=os.environ.get('LDF_INDEX_MEMORY', '8Gi'),
+    ldf_index_java_opts=os.environ.get('LDF_INDEX_JAVA_OPTS', '-Xmx6G -Xms1G'),
+    ldf_index_timeout_secs=int(os.environ.get('LDF_INDEX_TIMEOUT_SECS', '7200')),
+    # Also commit generated indexes to the repo's main branch, next to its
+    # graph.hdt (only when main holds the same graph.hdt that was synced).
+    ldf_upload_generated_index=os.environ.get('LDF_UPLOAD_GENERATED_INDEX', 'false').lower() == 'true',
     ldf_host_name=os.environ.get('LDF_HOST_NAME', 'frink.apps.renci.org'),
     qlever_image=os.environ.get('QLEVER_IMAGE', 'adfreiburg/qlever:commit-99b6db5'),
     qlever_indexer_cpu=os.environ.get('QLEVER_INDEXER_CPU', '8'),
@@ -117,11 +218,27 @@ config = Config(
     qlever_index_pvc_size=os.environ.get('QLEVER_INDEX_PVC_SIZE', '3Ti'),
     qlever_index_pvc_storage_class=os.environ.get('QLEVER_INDEX_PVC_STORAGE_CLASS', 'premium-rwo'),
     qlever_source_path=os.environ.get('QLEVER_SOURCE_PATH', '/shared/qlever-source'),
+    # Must be on the same volume as qlever_source_path (blobs are hard-linked).
+    qlever_source_cache_dir=os.environ.get('QLEVER_SOURCE_CACHE_DIR',
+                                           os.environ.get('QLEVER_SOURCE_PATH', '/shared/qlever-source') + '/.cache'),
+    # Budget for cached blobs no longer linked from the source tree.
+    qlever_source_cache_max_gib=int(os.environ.get('QLEVER_SOURCE_CACHE_MAX_GIB', '1024')),
     qlever_state_configmap=os.environ.get('QLEVER_STATE_CONFIGMAP', 'kace-qlever-state'),
     qlever_index_pvc_prefix=os.environ.get('QLEVER_INDEX_PVC_PREFIX', 'kace-qlever-index-'),
     qlever_index_previous_ttl_hours=int(os.environ.get('QLEVER_INDEX_PREVIOUS_TTL_HOURS', '24')),
     qlever_download_concurrency=int(os.environ.get('QLEVER_DOWNLOAD_CONCURRENCY', '4')),
+    qlever_ref_resolve_concurrency=int(os.environ.get('QLEVER_REF_RESOLVE_CONCURRENCY', '16')),
     qlever_num_triples_per_batch=int(os.environ.get('QLEVER_NUM_TRIPLES_PER_BATCH', '5000000')),
+    # Optional staging stage: decompress + filter each source once per commit
+    # in its own Job, so the indexer reads clean N-Triples (see QLeverIndexWorkflow).
+    qlever_stage_sources=os.environ.get('QLEVER_STAGE_SOURCES', 'false').lower() == 'true',
+    qlever_stage_image=os.environ.get('QLEVER_STAGE_IMAGE', ''),
+    # "nt" (uncompressed) or "zst" (smaller; needs zstd in the stage and
+    # indexer images, which the stock qlever image does not promise).
+    qlever_stage_format=os.environ.get('QLEVER_STAGE_FORMAT', 'nt'),
+    qlever_stage_concurrency=int(os.environ.get('QLEVER_STAGE_CONCURRENCY', '4')),
+    qlever_stage_cpu=os.environ.get('QLEVER_STAGE_CPU', '4'),
+    qlever_stage_memory=os.environ.get('QLEVER_STAGE_MEMORY', '4Gi'),
     qlever_federation_cpu=os.environ.get('QLEVER_FEDERATION_CPU', '8'),
     qlever_federation_memory=os.environ.get('QLEVER_FEDERATION_MEMORY', '200Gi'),
     qlever_federation_cache_pct=float(os.environ.get('QLEVER_FEDERATION_CACHE_PCT', '0.70')),
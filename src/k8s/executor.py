@@ -0,0 +1,21 @@
+"""Dedicated thread pool for blocking kubernetes-client calls.
+
+The kubernetes client is synchronous. Async activities hand its calls to
+this pool (sized by K8S_API_THREADS) rather than calling it on the event
+loop, or sharing the default executor that aiohttp's resolver fallback,
+asyncio.to_thread file I/O and downloads use. A slow deploy retry loop then
+ties up a k8s thread, not the worker.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from config import config as app_config
+
+_executor = ThreadPoolExecutor(max_workers=app_config.k8s_api_threads, thread_name_prefix="k8s-api")
+
+
+async def run_k8s(fn, *args, **kwargs):
+    """Run blocking `fn(*args, **kwargs)` on the k8s pool and await it."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
@@ -0,0 +1,81 @@
+"""K8s ConfigMap-backed history of conversion runs, per job kind and repo.
+
+One ConfigMap (JOB_HISTORY_CONFIGMAP) with a JSON list per
+`<kind>.<repo>.json` key holding the last HISTORY_LENGTH runs:
+
+    {"at", "input_bytes", "cpu", "memory_gib", "duration_secs",
+     "outcome": "succeeded" | "oom" | "failed", "peak_memory_gib"?}
+
+The sizing engine (temporal_app.sizing) reads it to pick resources for the
+next run of the same repo. k8s.job_telemetry keeps its per-Job records the
+same way in JOB_TELEMETRY_CONFIGMAP (`configmap=`).
+"""
+import json
+import random
+import re
+import time
+from typing import Dict, List
+
+from kubernetes.client.rest import ApiException
+
+from config import config as app_config
+from k8s.podman import _core_v1
+
+HISTORY_LENGTH = 10
+_CONFLICT_RETRIES = 10
+
+
+def _key(kind: str, repo: str) -> str:
+    return re.sub(r'[^A-Za-z0-9._-]', '_', f"{kind}.{repo}") + ".json"
+
+
+def _read(name: str):
+    """The ConfigMap, or None if it does not exist yet."""
+    try:
+        return _core_v1().read_namespaced_config_map(name=name, namespace=app_config.k8s_namespace)
+    except ApiException as e:
+        if e.status == 404:
+            return None
+        raise
+
+
+def read_all(configmap: str = None) -> Dict[str, List[Dict]]:
+    """Every key of the ConfigMap, `{"<kind>.<repo>.json": [entries]}`."""
+    cm = _read(configmap or app_config.job_history_configmap)
+    return {key: json.loads(value) for key, value in ((cm and cm.data) or {}).items()}
+
+
+def read_history(kind: str, repo: str, configmap: str = None) -> List[Dict]:
+    return read_all(configmap).get(_key(kind, repo), [])
+
+
+def append_history(kind: str, repo: str, entry: Dict, configmap: str = None) -> None:
+    """Append `entry`, keeping the last HISTORY_LENGTH. Patches only this
+    repo's key, with the resourceVersion it read as a precondition: a
+    concurrent append (parallel jobs of the same repo) makes the patch fail
+    with 409 and this one re-reads and tries again."""
+    name = configmap or app_config.job_history_configmap
+    namespace = app_config.k8s_namespace
+    key = _key(kind, repo)
+    api = _core_v1()
+    for _ in range(_CONFLICT_RETRIES):
+        cm = _read(name)
+        entries = json.loads(((cm and cm.data) or {}).get(key, "[]"))
+        body = {
+            "apiVersion": "v1",
+            "kind": "ConfigMap",
+            "metadata": {"name": name, "namespace": namespace},
+            "data": {key: json.dumps((entries + [entry])[-HISTORY_LENGTH:], sort_keys=True)},
+        }
+        try:
+            if cm is None:
+                api.create_namespaced_config_map(namespace=namespace, body=body)
+            else:
+                body["metadata"]["resourceVersion"] = cm.metadata.resource_version
+                api.patch_namespaced_config_map(name=name, namespace=namespace, body=body)
+            return
+        except ApiException as e:
+            if e.status != 409:  # 409: changed since read / created meanwhile
+                raise
+            time.sleep(random.uniform(0.1, 0.5))
+    raise Exception(f"Could not append to {name}/{key}: kept conflicting with concurrent writes")
@@ -0,0 +1,215 @@
+"""Resource-usage telemetry for K8s Jobs, kept per job type and repo.
+
+While a Job runs, `track()` samples its pods' usage from the metrics API
+(metrics.k8s.io) every JOB_METRICS_SAMPLE_SECS and keeps the peak. Once the
+Job finishes it reads the pods for start / finish times, the container's
+exit code and reason (OOMKilled included) and the resources it was given,
+and appends one compact record to JOB_TELEMETRY_CONFIGMAP (k8s.job_history,
+last HISTORY_LENGTH per `<job type>.<repo>.json` key):
+
+    {"job_name", "started_at", "finished_at", "duration_secs", "outcome",
+     "exit_code", "reason", "oom_killed", "cpu_limit", "memory_limit_gib",
+     "peak_cpu"?, "peak_memory_gib"?}
+
+Job type and repo come from the `kace/job-type` / `kace/repo` labels that
+JobMan.run_job and the LDF sync template put on their Jobs; Jobs without a
+type are not recorded, and those of no single repo (the federated QLever
+index and stage jobs) are kept under FEDERATED_REPO. Without a metrics API (or with JOB_METRICS_ENABLED=false)
+records simply carry no peak. `set_metrics_source(StubMetrics(...))` swaps
+in canned samples for local runs and tests.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Awaitable, Dict, List, Optional, Tuple
+
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from kubernetes.utils import parse_quantity
+
+from config import config as app_config
+from k8s import job_history
+from k8s.executor import run_k8s
+from k8s.podman import _core_v1, _fresh_api_client
+from log_util import LoggingUtil
+
+logger = LoggingUtil.init_logging(__name__)
+
+GIB = 1024 ** 3
+JOB_TYPE_LABEL = "kace/job-type"
+REPO_LABEL = "kace/repo"
+FEDERATED_REPO = "federated"
+
+# pod name -> (cpu cores, memory bytes)
+Usage = Dict[str, Tuple[float, int]]
+
+
+class MetricsApi:
+    """Pod usage from metrics.k8s.io. Turns itself off on the first 404
+    (no metrics-server in the cluster)."""
+
+    def __init__(self):
+        self.available = True
+
+    def pod_usage(self, namespace: str, job_name: str) -> Usage:
+        if not self.available:
+            return {}
+        try:
+            result = client.CustomObjectsApi(api_client=_fresh_api_client()).list_namespaced_custom_object(
+                "metrics.k8s.io", "v1beta1", namespace, "pods", label_selector=f"job-name={job_name}"
+            )
+        except ApiException as e:
+            if e.status == 404:
+                logger.info("metrics.k8s.io is not available; job telemetry will carry no peak usage")
+                self.available = False
+                return {}
+            raise
+        usage = {}
+        for item in result.get("items", []):
+            containers = item.get("containers", [])
+            usage[item["metadata"]["name"]] = (
+                sum(float(parse_quantity(c["usage"]["cpu"])) for c in containers),
+                sum(int(parse_quantity(c["usage"]["memory"])) for c in containers),
+            )
+        return usage
+
+
+class StubMetrics:
+    """Replays `samples` (one Usage per call, the last one repeated)."""
+
+    def __init__(self, samples: List[Usage]):
+        self.samples = list(samples)
+
+    def pod_usage(self, namespace: str, job_name: str) -> Usage:
+        if len(self.samples) > 1:
+            return self.samples.pop(0)
+        return self.samples[0] if self.samples else {}
+
+
+_metrics_source = MetricsApi()
+
+
+def set_metrics_source(source) -> None:
+    global _metrics_source
+    _metrics_source = source
+
+
+class PeakTracker:
+    """Highest per-pod usage seen across the samples of one Job."""
+
+    def __init__(self, namespace: str, job_name: str):
+        self.namespace = namespace
+        self.job_name = job_name
+        self.peak_cpu: Optional[float] = None
+        self.peak_memory: Optional[int] = None
+
+    def sample(self) -> None:
+        for cpu, memory in _metrics_source.pod_usage(self.namespace, self.job_name).values():
+            self.peak_cpu = max(self.peak_cpu or 0.0, cpu)
+            self.peak_memory = max(self.peak_memory or 0, memory)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await run_k8s(self.sample)
+            except Exception as e:
+                logger.warning(f"Metrics sample for {self.job_name} failed: {e}")
+            await asyncio.sleep(app_config.job_metrics_sample_secs)
+
+
+def _iso(ts: Optional[datetime]) -> Optional[str]:
+    return ts.astimezone(timezone.utc).isoformat() if ts else None
+
+
+def collect(namespace: str, job: client.V1Job, tracker: PeakTracker = None) -> Dict:
+    """Telemetry record for a finished `job` (see module docstring)."""
+    pods = _core_v1().list_namespaced_pod(namespace=namespace,
+                                          label_selector=f"job-name={job.metadata.name}").items
+    pods.sort(key=lambda p: p.metadata.creation_timestamp or datetime.min.replace(tzinfo=timezone.utc))
+    terminations = [
+        state.terminated
+        for pod in pods for cs in pod.status.container_statuses or []
+        for state in (cs.state, cs.last_state) if state and state.terminated
+    ]
+    last = terminations[-1] if terminations else None
+
+    started = job.status.start_time
+    finished = job.status.completion_time or max(
+        (c.last_transition_time for c in job.status.conditions or [] if c.last_transition_time),
+        default=None,
+    )
+    limits = {}
+    if pods and pods[-1].spec.containers[0].resources:
+        resources = pods[-1].spec.containers[0].resources
+        limits = resources.limits or resources.requests or {}
+
+    record = {
+        "job_name": job.metadata.name,
+        "started_at": _iso(started),
+        "finished_at": _iso(finished),
+        "duration_secs": int((finished - started).total_seconds()) if started and finished else None,
+        "outcome": "succeeded" if job.status.succeeded else "failed",
+        "exit_code": last.exit_code if last else None,
+        "reason": last.reason if last else None,
+        "oom_killed": any(t.reason == "OOMKilled" for t in terminations),
+        "cpu_limit": float(parse_quantity(limits["cpu"])) if "cpu" in limits else None,
+        "memory_limit_gib": round(int(parse_quantity(limits["memory"])) / GIB, 2) if "memory" in limits else None,
+    }
+    if tracker and tracker.peak_memory is not None:
+        record["peak_cpu"] = round(tracker.peak_cpu, 2)
+        record["peak_memory_gib"] = round(tracker.peak_memory / GIB, 2)
+    return record
+
+
+def record(namespace: str, job: client.V1Job, tracker: PeakTracker = None) -> None:
+    labels = job.metadata.labels or {}
+    job_type, repo = labels.get(JOB_TYPE_LABEL), labels.get(REPO_LABEL) or FEDERATED_REPO
+    if not job_type:
+        return
+    entry = collect(namespace, job, tracker)
+    logger.info(f"Telemetry {job_type}/{repo}: {entry}")
+    job_history.append_history(job_type, repo, entry, configmap=app_config.job_telemetry_configmap)
+
+
+async def track(namespace: str, job_name: str, waiting: Awaitable[client.V1Job]) -> client.V1Job:
+    """Await `waiting` (a JobWatcher wait for `job_name`) while sampling the
+    Job's usage, then record its telemetry. Telemetry failures are logged,
+    never raised: the caller's outcome is the Job's."""
+    tracker = PeakTracker(namespace, job_name)
+    sampler = asyncio.create_task(tracker.run()) if app_config.job_metrics_enabled else None
+    try:
+        job = await waiting
+    finally:
+        if sampler:
+            sampler.cancel()
+    try:
+        await run_k8s(record, namespace, job, tracker)
+    except Exception as e:
+        logger.warning(f"Recording telemetry for {job_name} failed: {e}")
+    return job
+
+
+def query(job_type: str = None, repo: str = None) -> List[Dict]:
+    """Stored records, `[{"job_type", "repo", "runs": [...]}]`, optionally
+    narrowed to one job type and / or repo."""
+    results = []
+    for key, runs in sorted(job_history.read_all(app_config.job_telemetry_configmap).items()):
+        kind, _, name = key[:-len(".json")].partition(".")
+        if job_type and kind != job_type:
+            continue
+        if repo and key != job_history._key(kind, repo):
+            continue
+        results.append({"job_type": kind, "repo": name, "runs": runs})
+    return results
+
+
+def peak_memory_gib(job_type: str, repo: str, since: str) -> Optional[float]:
+    """Highest peak memory among `job_type` runs of `repo` started at or
+    after `since` (ISO timestamp), or None if none was sampled."""
+    since_ts = datetime.fromisoformat(since)
+    peaks = [
+        run["peak_memory_gib"]
+        for run in job_history.read_history(job_type, repo, app_config.job_telemetry_configmap)
+        if run.get("peak_memory_gib") is not None and run.get("started_at")
+        and datetime.fromisoformat(run["started_at"]) >= since_ts
+    ]
+    return max(peaks) if peaks else None
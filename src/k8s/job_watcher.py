@@ -0,0 +1,258 @@
+"""Process-wide Job watcher: one `watch.Watch` stream over the Jobs of a
+namespace, multiplexed to every waiter in the worker.
+
+Replaces per-job `read_namespaced_job` polling. A daemon thread lists the
+namespace's Jobs once, then follows the watch stream from that
+resourceVersion (re-listing on 410 Gone), keeps the latest object per Job
+and wakes the waiters of whichever Job changed. Waiters may be async
+(activities; woken via call_soon_threadsafe) or sync (threads).
+
+Each waiter still does a direct read on a cache miss (so a Job that was
+never created fails fast, as before) and every RESYNC_SECS as a safety net
+should the stream silently stall.
+
+Jobs are re-created under the same name, so submitters hand the created
+Job to `submitted()`: from then on cached objects and events of any other
+uid under that name (the previous run, its late DELETED event) are ignored.
+A deleted Job's entries are dropped once no waiter is left on its name.
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional, Set
+
+from kubernetes import client, watch
+
+from k8s.executor import run_k8s
+from k8s.podman import _batch_v1
+from log_util import LoggingUtil
+
+logger = LoggingUtil.init_logging(__name__)
+
+# Server-side watch timeout; the stream is re-opened (with a fresh API
+# client, so rotated SA tokens are picked up) at least this often.
+WATCH_TIMEOUT_SECS = 300
+RESYNC_SECS = 300
+_RETRY_DELAY_SECS = 5
+
+JobPredicate = Callable[[client.V1Job], bool]
+
+_DELETED = object()
+
+
+class JobWatcher:
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._jobs: Dict[str, client.V1Job] = {}
+        # name -> uid of the Job last submitted under it by this worker
+        self._uids: Dict[str, str] = {}
+        self._waiters: Dict[str, Set[Callable[[], None]]] = {}
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- watch thread -------------------------------------------------
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"job-watcher-{self.namespace}",
+                                                daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        resource_version = None
+        while True:
+            try:
+                batch_v1 = _batch_v1()
+                if resource_version is None:
+                    jobs = batch_v1.list_namespaced_job(namespace=self.namespace)
+                    resource_version = jobs.metadata.resource_version
+                    with self._lock:
+                        self._jobs = {j.metadata.name: j for j in jobs.items}
+                        self._uids = {name: uid for name, uid in self._uids.items()
+                                      if name in self._jobs or name in self._waiters}
+                        changed = list(self._waiters)
+                    self._synced.set()
+                    self._notify(changed)
+                stream = watch.Watch().stream(batch_v1.list_namespaced_job, namespace=self.namespace,
+                                              resource_version=resource_version,
+                                              timeout_seconds=WATCH_TIMEOUT_SECS,
+                                              allow_watch_bookmarks=True)
+                for event in stream:
+                    if event["type"] == "ERROR":
+                        # Raw Status object: 410 Gone means our version expired.
+                        status = event.get("raw_object") or {}
+                        if status.get("code") == 410:
+                            resource_version = None
+                            break
+                        raise Exception(f"watch error: {status}")
+                    job = event["object"]
+                    resource_version = job.metadata.resource_version
+                    if event["type"] == "BOOKMARK":
+                        continue
+                    name = job.metadata.name
+                    with self._lock:
+                        if self._uids.get(name, job.metadata.uid) != job.metadata.uid:
+                            continue  # an earlier Job of the same name
+                        if event["type"] == "DELETED":
+                            self._jobs[name] = _DELETED
+                            self._prune(name)
+                        else:
+                            self._jobs[name] = job
+                    self._notify([name])
+            except client.exceptions.ApiException as e:
+                if e.status == 410:
+                    resource_version = None
+                    continue
+                logger.warning(f"Job watch on {self.namespace} failed ({e.status} {e.reason}); "
+                               f"retrying in {_RETRY_DELAY_SECS}s")
+                time.sleep(_RETRY_DELAY_SECS)
+            except Exception as e:
+                logger.warning(f"Job watch on {self.namespace} failed ({type(e).__name__}: {e}); "
+                               f"retrying in {_RETRY_DELAY_SECS}s")
+                time.sleep(_RETRY_DELAY_SECS)
+
+    def _notify(self, names) -> None:
+        with self._lock:
+            callbacks = [cb for name in names for cb in self._waiters.get(name, ())]
+        for cb in callbacks:
+            try:
+                cb()
+            except RuntimeError:
+                pass  # waiter's event loop already closed
+
+    # ---- cache --------------------------------------------------------
+
+    def _subscribe(self, job_name: str, callback: Callable[[], None]) -> None:
+        with self._lock:
+            self._waiters.setdefault(job_name, set()).add(callback)
+
+    def _unsubscribe(self, job_name: str, callback: Callable[[], None]) -> None:
+        with self._lock:
+            waiters = self._waiters.get(job_name)
+            if waiters:
+                waiters.discard(callback)
+                if not waiters:
+                    del self._waiters[job_name]
+                    self._prune(job_name)
+
+    def _prune(self, job_name: str) -> None:
+        """Forget a deleted Job nobody waits on. Caller holds the lock."""
+        if job_name not in self._waiters and self._jobs.get(job_name, _DELETED) is _DELETED:
+            self._jobs.pop(job_name, None)
+            self._uids.pop(job_name, None)
+
+    def _read(self, job_name: str) -> client.V1Job:
+        """Direct read, stored in the cache. Raises the same error the
+        pollers used to when the Job does not exist."""
+        try:
+            job = _batch_v1().read_namespaced_job(name=job_name, namespace=self.namespace)
+        except client.exceptions.ApiException as e:
+            raise Exception(f"Failed to fetch Job '{job_name}': {e} , likely the job was never created.")
+        with self._lock:
+            self._jobs[job_name] = job
+        return job
+
+    def submitted(self, job: client.V1Job) -> None:
+        """Record the Job just created under its name, superseding whatever
+        the cache still holds from a previous run of that name."""
+        with self._lock:
+            self._uids[job.metadata.name] = job.metadata.uid
+            self._jobs[job.metadata.name] = job
+
+    def _cached(self, job_name: str) -> Optional[client.V1Job]:
+        if not self._synced.is_set():
+            return None
+        with self._lock:
+            job = self._jobs.get(job_name)
+            expected_uid = self._uids.get(job_name)
+        if job is _DELETED or job is None:
+            return None
+        if expected_uid and job.metadata.uid != expected_uid:
+            return None
+        return job
+
+    def current(self, job_name: str) -> client.V1Job:
+        """Latest known state of `job_name`. Blocking on a cache miss, which
+        includes a Job deleted (and maybe re-created) under the same name,
+        and until the watch thread's initial list is in."""
+        job = self._cached(job_name)
+        if job is None:
+            job = self._read(job_name)
+        return job
+
+    # ---- waiting ------------------------------------------------------
+
+    async def wait(self, job_name: str, done: JobPredicate,
+                   on_update: Callable[[client.V1Job], None] = None,
+                   tick_secs: float = 30) -> client.V1Job:
+        """Wait until `done(job)` holds and return that job. `on_update` runs
+        on every change and at least every `tick_secs` (heartbeats)."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+        callback = lambda: loop.call_soon_threadsafe(changed.set)
+        self._subscribe(job_name, callback)
+        try:
+            job = await run_k8s(self.current, job_name)
+            last_read = time.monotonic()
+            while True:
+                if on_update:
+                    on_update(job)
+                if done(job):
+                    return job
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=tick_secs)
+                except asyncio.TimeoutError:
+                    pass
+                changed.clear()
+                job = None if time.monotonic() - last_read >= RESYNC_SECS else self._cached(job_name)
+                if job is None:
+                    job = await run_k8s(self._read, job_name)
+                    last_read = time.monotonic()
+        finally:
+            self._unsubscribe(job_name, callback)
+
+    def wait_sync(self, job_name: str, done: JobPredicate,
+                  timeout: float = None) -> client.V1Job:
+        """Blocking variant of wait(). Raises TimeoutError after `timeout`."""
+        self.start()
+        changed = threading.Event()
+        self._subscribe(job_name, changed.set)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            job = self.current(job_name)
+            last_read = time.monotonic()
+            while not done(job):
+                remaining = RESYNC_SECS if deadline is None else min(RESYNC_SECS, deadline - time.monotonic())
+                if remaining <= 0:
+                    raise TimeoutError(f"Job {job_name} did not finish in {timeout}s")
+                changed.wait(remaining)
+                changed.clear()
+                job = None if time.monotonic() - last_read >= RESYNC_SECS else self._cached(job_name)
+                if job is None:
+                    job = self._read(job_name)
+                    last_read = time.monotonic()
+            return job
+        finally:
+            self._unsubscribe(job_name, changed.set)
+
+
+_watchers: Dict[str, JobWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def get_job_watcher(namespace: str) -> JobWatcher:
+    with _watchers_lock:
+        if namespace not in _watchers:
+            _watchers[namespace] = JobWatcher(namespace)
+        return _watchers[namespace]
+
+
+def job_finished(job: client.V1Job) -> bool:
+    """Succeeded, or failed past its backoffLimit (Kubernetes default 6)."""
+    succeeded = job.status.succeeded or 0
+    failed = job.status.failed or 0
+    backoff_limit = job.spec.backoff_limit if job.spec.backoff_limit is not None else 6
+    return succeeded > 0 or failed > backoff_limit
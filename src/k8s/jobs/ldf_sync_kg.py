@@ -1,43 +1,220 @@
-"""Job entry — pulls a single KG's HDT files from lakefs into the LDF PVC.
+"""Job entry — pulls KGs' HDT files from lakefs into the LDF PVC.
 
 Runs inside a kubernetes Job pod. Mounts the LDF PVC at /data and writes
 HDT files atomically into /data/deploy/<shortname>/.
+
+Either one KG (--repo/--ref/--shortname) or a batch of them
+(--manifest '[{"repo", "ref", "shortname", "hdt_path"?}, ...]') synced
+--concurrency at a time in this one pod. A KG that fails does not fail the
+others; the per-KG outcome is only reported when the pod finishes, so a pod
+that is killed or times out fails its whole batch.
+
+The sync Job writes the per-KG outcome, `{"ok": [repo], "failed": {repo:
+error}, "data": {repo: digest}, "needs_index": [repo]}` (data_digest), as
+the container's termination message for the workflow to read
+(LDFServerDeploymentMananger.read_sync_results). The exit code is non-zero
+only when nothing could be synced at all.
+
+`needs_index` lists the KGs whose LakeFS prefix has no graph.hdt.index.v1-1
+and whose PVC copy has no index built from the current graph.hdt
+(`.index-source` holds the checksum of the graph.hdt an index was generated
+from). The workflow then runs an index Job for them (index-job.j2): an HDT
+image init container generates the side indexes one at a time, listing the
+directories done in --work-dir `indexed` / `index-failed`, and this module
+with --report optionally uploads them back to LakeFS and reports
+`{"indexed": [repo], "index_failed": [repo]}`.
 """
 
 import argparse
 import asyncio
+import hashlib
+import json
 import logging
 import os
 import sys
 
-from lakefs_util.io_util import download_hdt_files_to_dir
+from config import config as app_config
+from lakefs_util import lakefs_api
+from lakefs_util.io_util import download_hdt_files_to_dir, get_object_stat, upload_file, _load_sync_state
+from lakefs_util.lakefs_http import close_client
+
+TERMINATION_LOG = "/dev/termination-log"
+# Kubernetes keeps at most 4096 bytes of a termination message.
+TERMINATION_LOG_LIMIT = 4096
+
+INDEX_FILE = "graph.hdt.index.v1-1"
+NEEDS_INDEX = ".needs-index"
+INDEX_SOURCE = ".index-source"
 
 
 def parse_args():
     p = argparse.ArgumentParser()
-    p.add_argument("--repo", required=True)
-    p.add_argument("--ref", required=True, help="Branch, tag, or commit ID")
-    p.add_argument("--shortname", required=True)
+    p.add_argument("--repo")
+    p.add_argument("--ref", help="Branch, tag, or commit ID")
+    p.add_argument("--shortname")
     p.add_argument("--hdt-path", default="hdt")
+    p.add_argument("--manifest", help="JSON list of {repo, ref, shortname, hdt_path?}")
+    p.add_argument("--concurrency", type=int, default=4, help="KGs synced at once")
     p.add_argument("--dest-root", default="/data/deploy")
-    return p.parse_args()
+    p.add_argument("--work-dir", default="/work", help="Scratch dir shared with the index stage")
+    p.add_argument("--report", action="store_true", help="Report an index Job's outcome")
+    args = p.parse_args()
+    if args.manifest:
+        args.entries = json.loads(args.manifest)
+    elif args.repo and args.ref and args.shortname:
+        args.entries = [{"repo": args.repo, "ref": args.ref, "shortname": args.shortname,
+                         "hdt_path": args.hdt_path}]
+    else:
+        p.error("either --manifest or --repo, --ref and --shortname are required")
+    return args
 
 
-async def main_async(args):
-    dest_dir = os.path.join(args.dest_root, args.shortname)
-    logging.info(f"Syncing {args.repo}@{args.ref}/{args.hdt_path} -> {dest_dir}")
-    written = await download_hdt_files_to_dir(
-        repo=args.repo, ref=args.ref, dest_dir=dest_dir, hdt_path=args.hdt_path
-    )
+def _read(path):
+    try:
+        with open(path) as fh:
+            return fh.read().strip()
+    except OSError:
+        return None
+
+
+def plan_index(dest_dir, lakefs_has_index):
+    """Whether `dest_dir` needs a side index generated. Drops an index left
+    from an older graph.hdt, which would not match the new one."""
+    marker = os.path.join(dest_dir, NEEDS_INDEX)
+    source = os.path.join(dest_dir, INDEX_SOURCE)
+    if lakefs_has_index:
+        for path in (marker, source):
+            if os.path.exists(path):
+                os.unlink(path)
+        return False
+    hdt_checksum = _load_sync_state(dest_dir).get("graph.hdt", {}).get("checksum") or "unknown"
+    index = os.path.join(dest_dir, INDEX_FILE)
+    if os.path.exists(index) and _read(source) == hdt_checksum:
+        return False
+    for path in (index, source):
+        if os.path.exists(path):
+            os.unlink(path)
+    with open(marker, "w") as fh:
+        fh.write(hdt_checksum)
+    return True
+
+
+def data_digest(dest_dir):
+    """Digest of the LakeFS checksums of the files synced into `dest_dir`;
+    the workflow rolls ldf-server only when some KG's digest changed."""
+    state = _load_sync_state(dest_dir)
+    checksums = {name: synced.get("checksum") for name, synced in state.items()}
+    return hashlib.sha256(json.dumps(checksums, sort_keys=True).encode()).hexdigest()[:16]
+
+
+async def sync_one(entry, dest_root):
+    """Sync one KG; returns whether it needs a side index."""
+    repo, ref, hdt_path = entry["repo"], entry["ref"], entry.get("hdt_path", "hdt")
+    dest_dir = os.path.join(dest_root, entry["shortname"])
+    logging.info(f"Syncing {repo}@{ref}/{hdt_path} -> {dest_dir}")
+    written = await download_hdt_files_to_dir(repo=repo, ref=ref, dest_dir=dest_dir, hdt_path=hdt_path)
     if not written:
-        raise SystemExit(f"No HDT files found at {args.repo}@{args.ref}/{args.hdt_path}")
+        raise Exception(f"No HDT files found at {repo}@{ref}/{hdt_path}")
     logging.info(f"Wrote {len(written)} files: {written}")
+    if plan_index(dest_dir, any(path.endswith(INDEX_FILE) for path in written)):
+        logging.info(f"{repo}@{ref}/{hdt_path} has no {INDEX_FILE}; queued for generation")
+        return True
+    return False
+
+
+async def main_async(args):
+    slots = asyncio.Semaphore(max(1, args.concurrency))
+    results = {"ok": [], "failed": {}, "data": {}, "needs_index": []}
+
+    async def run(entry):
+        async with slots:
+            try:
+                needs_index = await sync_one(entry, args.dest_root)
+                results["ok"].append(entry["repo"])
+                results["data"][entry["repo"]] = data_digest(os.path.join(args.dest_root, entry["shortname"]))
+                if needs_index:
+                    results["needs_index"].append(entry["repo"])
+            except Exception as e:
+                logging.exception(f"Sync of {entry['repo']} failed")
+                results["failed"][entry["repo"]] = str(e) or type(e).__name__
+
+    try:
+        await asyncio.gather(*[run(entry) for entry in args.entries])
+    finally:
+        await close_client()
+    return results
+
+
+async def upload_index(entry, dest_dir):
+    """Upload a generated index to the repo's main branch, next to the
+    graph.hdt it was built from, if main still has that same graph.hdt."""
+    repo = entry["repo"]
+    synced = _load_sync_state(dest_dir).get("graph.hdt", {})
+    if not synced.get("path"):
+        return
+    stat = await get_object_stat(repo, "main", synced["path"])
+    if not stat or stat.get("checksum") != synced.get("checksum"):
+        logging.info(f"{repo}@main/{synced['path']} differs from the synced graph.hdt; not uploading its index")
+        return
+    index_path = synced["path"] + ".index.v1-1"
+    await upload_file(os.path.join(dest_dir, INDEX_FILE), repo, "main", index_path)
+    await lakefs_api.commit(repo, "main", f"Add {index_path} generated by the LDF sync")
+
+
+async def report_async(args):
+    """The index stage's outcome, uploading generated indexes when
+    LDF_UPLOAD_GENERATED_INDEX is set."""
+    done = set((_read(os.path.join(args.work_dir, "indexed")) or "").splitlines())
+    # a KG the index stage did not get to (killed, OOM) counts as failed
+    indexed = [e for e in args.entries if os.path.join(args.dest_root, e["shortname"]) in done]
+    results = {
+        "indexed": [e["repo"] for e in indexed],
+        "index_failed": [e["repo"] for e in args.entries if e not in indexed],
+    }
+    if not app_config.ldf_upload_generated_index:
+        return results
+    try:
+        for entry in indexed:
+            try:
+                await upload_index(entry, os.path.join(args.dest_root, entry["shortname"]))
+            except Exception:
+                logging.exception(f"Uploading the generated index of {entry['repo']} failed")
+    finally:
+        await close_client()
+    return results
+
+
+def write_results(results):
+    """Termination message, with errors shortened (dropped, last) until it
+    fits the limit. Exits non-zero if even that does not fit, so the Job
+    fails instead of the workflow reading a truncated report."""
+    for error_chars in (500, 120, 40, 0):
+        shortened = {repo: error[:error_chars] for repo, error in results.get("failed", {}).items()}
+        message = json.dumps({**results, "failed": shortened} if "failed" in results else results)
+        if len(message.encode()) <= TERMINATION_LOG_LIMIT:
+            break
+    else:
+        logging.error(f"Results: {json.dumps(results)}")
+        sys.exit(f"Results are {len(message.encode())} bytes without error text, over the "
+                 f"{TERMINATION_LOG_LIMIT}-byte termination message; lower LDF_SYNC_BATCH_SIZE")
+    try:
+        with open(TERMINATION_LOG, "w") as fh:
+            fh.write(message)
+    except OSError:
+        pass  # not running in a pod
+    logging.info(f"Results: {message}")
 
 
 def main():
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
     args = parse_args()
-    asyncio.run(main_async(args))
+    if args.report:
+        write_results(asyncio.run(report_async(args)))
+        return
+    results = asyncio.run(main_async(args))
+    write_results(results)
+    if not results["ok"]:
+        sys.exit(f"No KG synced: {results['failed']}")
 
 
 if __name__ == "__main__":
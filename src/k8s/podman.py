@@ -1,3 +1,4 @@
+import re
 import time
 import asyncio
 
@@ -17,6 +18,7 @@ mapping = {
     "neo4j-json-job": os.path.dirname(os.path.realpath(__file__)) + os.path.join(os.path.sep + "templates", "neo4j-json-job.yaml"),
     "documentation-job": os.path.dirname(os.path.realpath(__file__)) + os.path.join(os.path.sep + "templates", "documentation-job.yaml"),
     "qlever-index-job": os.path.dirname(os.path.realpath(__file__)) + os.path.join(os.path.sep + "templates", "qlever-index-job.yaml"),
+    "qlever-stage-job": os.path.dirname(os.path.realpath(__file__)) + os.path.join(os.path.sep + "templates", "qlever-stage-job.yaml"),
     "void-job": os.path.dirname(os.path.realpath(__file__)) + os.path.join(os.path.sep + "templates", "void-description-job.yaml"),
     "hdtc-job": os.path.dirname(os.path.realpath(__file__)) + os.path.join(os.path.sep + "templates", "hdtc-conversion.yaml"),
     ## add other pods here
@@ -107,6 +109,11 @@ def _reload_k8s_auth():
     pass
 
 
+def _label_value(text: str) -> str:
+    """`text` as a valid label value (63 chars of [A-Za-z0-9._-])."""
+    return re.sub(r'[^A-Za-z0-9._-]', '-', text)[:63].strip('-._')
+
+
 class JobMan:
     def __init__(self):
         self.job_configs = {}
@@ -243,6 +250,12 @@ class JobMan:
         job: kubernetes.client.V1Job = self.job_objects[job_type]
         # override default name, by default its named as the job-type
         job.metadata.name = job_name
+        # read back by k8s.job_telemetry when the job finishes
+        job.metadata.labels = {
+            **(job.metadata.labels or {}),
+            "kace/job-type": job_type,
+            "kace/repo": _label_value(repo),
+        }
         # override command and args
         logger.info("job man recieved job {} - {}".format(job_type, job_name))
         pod_template: kubernetes.client.V1PodSpec = job.spec.template.spec
@@ -334,7 +347,10 @@ class JobMan:
         api = _batch_v1()
         logger.info(f"removing previous jobs {job_name} ")
         self.remove_job(job_name)
-        return api.create_namespaced_job(namespace=self.namespace, body=job)
+        created = api.create_namespaced_job(namespace=self.namespace, body=job)
+        from k8s.job_watcher import get_job_watcher
+        get_job_watcher(self.namespace).submitted(created)
+        return created
 
     def _get_pod_logs_for_job(self, job_name, tail_lines=100):
         """Fetch logs and status from all pods belonging to a job.
@@ -390,82 +406,48 @@ class JobMan:
     def watch_job(self, job_name, poll_interval=5):
         """
         Watch the Job's status until it completes (succeeds or fails).
-        This function will continue polling indefinitely until the Job reaches a terminal state.
+        Blocks indefinitely until the Job reaches a terminal state; updates
+        come from the shared namespace watch (k8s.job_watcher).
 
         Args:
             job_name (str): The name of the Job.
-            poll_interval (int): Seconds to wait between successive status checks.
+            poll_interval (int): Unused; kept for call compatibility.
 
         Raises:
             Exception: If the Job fails. Includes pod logs and exit codes.
         """
-        while True:
-            _reload_k8s_auth()
-            batch_v1 = _batch_v1()
-            try:
-                job = batch_v1.read_namespaced_job(name=job_name, namespace=self.namespace)
-            except client.exceptions.ApiException as e:
-                logger.error(f"Failed to fetch Job '{job_name}': {e}")
-                raise Exception(f"Failed to fetch Job '{job_name}': {e} , likely the job was never created.")
-
-            # Use 0 as default if the values are None.
-            succeeded = job.status.succeeded or 0
-            failed = job.status.failed or 0
-            # If backoffLimit is not set, Kubernetes defaults to 6 retries.
-            backoff_limit = job.spec.backoff_limit if job.spec.backoff_limit is not None else 6
-
-            logger.info(f"Job '{job_name}' status: succeeded={succeeded}, failed={failed}")
-
-            if succeeded > 0:
-                logger.info(f"Job '{job_name}' completed successfully.")
-                return
-
-            # Consider the Job failed if the number of failures reaches the backoff limit.
-            if failed > backoff_limit:
-                pod_info = self._get_pod_logs_for_job(job_name)
-                logger.error(f"Job '{job_name}' failed after {failed} attempts.\n{pod_info}")
-                raise Exception(f"Job '{job_name}' failed after {failed} attempts.\n{pod_info}")
-
-            time.sleep(poll_interval)
+        from k8s.job_watcher import get_job_watcher, job_finished
+        job = get_job_watcher(self.namespace).wait_sync(job_name, job_finished)
+        self._check_finished_job(job_name, job)
 
     async def async_watch_job(self, job_name, poll_interval=5):
         """
-        Async version of watch_job. Uses asyncio.sleep instead of time.sleep
-        so it can be awaited without blocking the event loop.
+        Async version of watch_job; awaits the shared watcher without
+        blocking the event loop.
 
         Args:
             job_name (str): The name of the Job.
-            poll_interval (int): Seconds to wait between successive status checks.
+            poll_interval (int): Unused; kept for call compatibility.
 
         Raises:
             Exception: If the Job fails. Includes pod logs and exit codes.
         """
-        while True:
-            _reload_k8s_auth()
-            batch_v1 = _batch_v1()
-            try:
-                job = batch_v1.read_namespaced_job(name=job_name, namespace=self.namespace)
-            except client.exceptions.ApiException as e:
-                logger.error(f"Failed to fetch Job '{job_name}': {e}")
-                raise Exception(f"Failed to fetch Job '{job_name}': {e} , likely the job was never created.")
-
-            succeeded = job.status.succeeded or 0
-            failed = job.status.failed or 0
-            backoff_limit = job.spec.backoff_limit if job.spec.backoff_limit is not None else 6
-
-            logger.info(f"Job '{job_name}' status: succeeded={succeeded}, failed={failed}")
-
-            if succeeded > 0:
-                logger.info(f"Job '{job_name}' completed successfully.")
-                return
-
-            if failed > backoff_limit:
-                pod_info = self._get_pod_logs_for_job(job_name)
-                logger.error(f"Job '{job_name}' failed after {failed} attempts.\n{pod_info}")
-                raise Exception(f"Job '{job_name}' failed after {failed} attempts.\n{pod_info}")
-
-            await asyncio.sleep(poll_interval)
-
+        from k8s.executor import run_k8s
+        from k8s.job_watcher import get_job_watcher, job_finished
+        job = await get_job_watcher(self.namespace).wait(job_name, job_finished)
+        await run_k8s(self._check_finished_job, job_name, job)
+
+    def _check_finished_job(self, job_name, job):
+        """Return if a finished Job succeeded; otherwise raise with pod logs."""
+        succeeded = job.status.succeeded or 0
+        failed = job.status.failed or 0
+        logger.info(f"Job '{job_name}' status: succeeded={succeeded}, failed={failed}")
+        if succeeded > 0:
+            logger.info(f"Job '{job_name}' completed successfully.")
+            return
+        pod_info = self._get_pod_logs_for_job(job_name)
+        logger.error(f"Job '{job_name}' failed after {failed} attempts.\n{pod_info}")
+        raise Exception(f"Job '{job_name}' failed after {failed} attempts.\n{pod_info}")
 
     def remove_job(self, name):
         """ Remove a job. This call is a blocking call, it will check and wait until the job is delete.
@@ -76,25 +76,61 @@ class LDFServerDeploymentMananger(ServerDeploymentManager):
             "storage_class": app_config.ldf_pvc_storage_class,
         }))
 
-    def get_state_configmap(self, commits: Dict[str, str]) -> Dict:
+    def get_state_configmap(self, commits: Dict[str, str], data: Dict[str, str] = None) -> Dict:
         tmpl = self.templates.get_template("state-configmap.j2")
         # Use json.dumps + indent so the |- block stays valid YAML.
         commits_json = json.dumps(commits, indent=2).replace("\n", "\n    ")
-        return yaml.safe_load(tmpl.render({"commits_json": commits_json}))
+        data_json = json.dumps(data or {}, indent=2, sort_keys=True).replace("\n", "\n    ")
+        return yaml.safe_load(tmpl.render({"commits_json": commits_json, "data_json": data_json}))
 
-    def get_sync_job(self, repo: str, ref: str, shortname: str, image: str,
-                     env_pairs: List[Dict[str, str]], hdt_path: str = "hdt",
+    def get_sync_job(self, entries: List[Dict[str, str]], image: str,
+                     env_pairs: List[Dict[str, str]], concurrency: int = 4,
                      job_name: Optional[str] = None) -> Dict:
+        """One Job syncing every {repo, ref, shortname, hdt_path} of
+        `entries`, `concurrency` at a time inside its pod."""
         tmpl = self.templates.get_template("sync-job.j2")
+        single = entries[0] if len(entries) == 1 else None
         if not job_name:
-            job_name = f"ldf-sync-{shortname}-{ref[:8]}"
+            if single:
+                job_name = f"ldf-sync-{single['shortname']}-{single['ref'][:8]}"
+            else:
+                digest = hashlib.sha256(json.dumps(entries, sort_keys=True).encode()).hexdigest()
+                job_name = f"ldf-sync-batch-{digest[:8]}"
         return yaml.safe_load(tmpl.render({
             "job_name": job_name,
-            "repo": repo,
-            "ref": ref,
-            "shortname": shortname,
+            "kg_label": single["shortname"] if single else "batch",
+            "repo_label": single["repo"] if single else "ldf-batch",
+            "manifest": json.dumps(entries),
+            "concurrency": concurrency,
+            "image": image,
+            "pvc_name": app_config.ldf_pvc_name,
+            "env": env_pairs,
+        }))
+
+    def get_index_job(self, entries: List[Dict[str, str]], image: str,
+                      env_pairs: List[Dict[str, str]], job_name: Optional[str] = None) -> Dict:
+        """One Job generating the missing side indexes of `entries` (KGs the
+        sync Job reported in needs_index), one at a time, then reporting
+        with the kace `image` (k8s.jobs.ldf_sync_kg --report)."""
+        tmpl = self.templates.get_template("index-job.j2")
+        single = entries[0] if len(entries) == 1 else None
+        if not job_name:
+            if single:
+                job_name = f"ldf-index-{single['shortname']}-{single['ref'][:8]}"
+            else:
+                digest = hashlib.sha256(json.dumps(entries, sort_keys=True).encode()).hexdigest()
+                job_name = f"ldf-index-batch-{digest[:8]}"
+        return yaml.safe_load(tmpl.render({
+            "job_name": job_name,
+            "kg_label": single["shortname"] if single else "batch",
+            "repo_label": single["repo"] if single else "ldf-batch",
+            "manifest": json.dumps(entries),
+            "index_image": app_config.ldf_index_image,
+            "index_script": self.index_script(app_config.ldf_index_command),
+            "index_dirs": [f"{HDT_ROOT_PATH}/{e['shortname']}" for e in entries],
+            "index_memory": app_config.ldf_index_memory,
+            "index_java_opts": app_config.ldf_index_java_opts,
             "image": image,
-            "hdt_path": hdt_path,
             "pvc_name": app_config.ldf_pvc_name,
             "env": env_pairs,
         }))
@@ -123,8 +159,11 @@ class LDFServerDeploymentMananger(ServerDeploymentManager):
             else:
                 raise
 
-    def apply_state_configmap(self, commits: Dict[str, str]) -> None:
-        body = self.get_state_configmap(commits)
+    def apply_state_configmap(self, commits: Dict[str, str], data: Dict[str, str] = None) -> None:
+        """Write the synced commit per repo, and merge `data` (repo -> digest
+        of the HDT files its sync left on the PVC) into the stored digests."""
+        data = {**self.read_data_state(), **(data or {})}
+        body = self.get_state_configmap(commits, {repo: data[repo] for repo in commits if repo in data})
         name = body["metadata"]["name"]
         api = client.CoreV1Api()
         try:
@@ -136,21 +175,53 @@ class LDFServerDeploymentMananger(ServerDeploymentManager):
             else:
                 raise
 
-    def read_state_configmap(self) -> Dict[str, str]:
+    def read_state_configmap(self, key: str = "commits.json") -> Dict[str, str]:
         api = client.CoreV1Api()
         try:
             cm = api.read_namespaced_config_map(name="frink-ldf-state", namespace=self.namespace)
             data = cm.data or {}
-            raw = data.get("commits.json", "{}")
+            raw = data.get(key, "{}")
             return json.loads(raw)
         except ApiException as e:
             if e.status == 404:
                 return {}
             raise
 
-    def submit_sync_job(self, repo: str, ref: str, shortname: str, image: str,
-                        env_pairs: List[Dict[str, str]], hdt_path: str = "hdt") -> str:
-        body = self.get_sync_job(repo, ref, shortname, image, env_pairs, hdt_path)
+    def read_data_state(self) -> Dict[str, str]:
+        """repo -> digest of its synced HDT files (k8s.jobs.ldf_sync_kg)."""
+        return self.read_state_configmap("data.json")
+
+    @staticmethod
+    def index_script(command: str) -> str:
+        """Shell for the index Job's index stage: build the side index of
+        each directory given as an argument, one at a time, next to a hard
+        link of graph.hdt so ldf-server never sees a partial file. Failures
+        are listed, not fatal (see k8s.jobs.ldf_sync_kg). `{hdt}` in
+        `command` is the graph.hdt to index; other braces (${JAVA_OPTIONS})
+        are left to the shell."""
+        work_hdt = '"$dir/.index-tmp/graph.hdt"'
+        return (
+            'touch /work/indexed /work/index-failed; '
+            'for dir in "$@"; do '
+            'rm -rf "$dir/.index-tmp" && mkdir "$dir/.index-tmp" && '
+            f'ln "$dir/graph.hdt" {work_hdt} && '
+            f'{command.replace("{hdt}", work_hdt)} && '
+            'mv "$dir/.index-tmp/graph.hdt.index.v1-1" "$dir/graph.hdt.index.v1-1" && '
+            'mv "$dir/.needs-index" "$dir/.index-source" && '
+            'echo "$dir" >> /work/indexed || echo "$dir" >> /work/index-failed; '
+            'rm -rf "$dir/.index-tmp"; '
+            'done'
+        )
+
+    def submit_sync_job(self, entries: List[Dict[str, str]], image: str,
+                        env_pairs: List[Dict[str, str]], concurrency: int = 4) -> str:
+        return self._submit_job(self.get_sync_job(entries, image, env_pairs, concurrency))
+
+    def submit_index_job(self, entries: List[Dict[str, str]], image: str,
+                         env_pairs: List[Dict[str, str]]) -> str:
+        return self._submit_job(self.get_index_job(entries, image, env_pairs))
+
+    def _submit_job(self, body: Dict) -> str:
         api = client.BatchV1Api()
         name = body["metadata"]["name"]
         # Delete any prior Job with same name so we can resubmit
@@ -160,38 +231,86 @@ class LDFServerDeploymentMananger(ServerDeploymentManager):
         except ApiException as e:
             if e.status != 404:
                 raise
-        api.create_namespaced_job(namespace=self.namespace, body=body)
+        created = api.create_namespaced_job(namespace=self.namespace, body=body)
+        from k8s.job_watcher import get_job_watcher
+        get_job_watcher(self.namespace).submitted(created)
         return name
 
     def wait_for_job(self, job_name: str, timeout_seconds: int = 3600) -> bool:
-        import time
-        api = client.BatchV1Api()
-        deadline = time.time() + timeout_seconds
-        while time.time() < deadline:
-            job = api.read_namespaced_job(name=job_name, namespace=self.namespace)
-            status = job.status
-            if status.succeeded:
-                return True
-            if status.failed:
-                raise Exception(f"Job {job_name} failed: {status.conditions}")
-            time.sleep(5)
-        raise TimeoutError(f"Job {job_name} did not finish in {timeout_seconds}s")
-
-    def rolling_restart(self, config_hash: str) -> None:
-        """Patch the LDF deployment so that the pod template config-hash annotation
-        changes — triggers a controlled rolling update."""
-        api = client.AppsV1Api()
-        body = {
-            "spec": {
-                "template": {
-                    "metadata": {
-                        "annotations": {"kace/config-hash": config_hash}
-                    }
-                }
-            }
+        from k8s.job_watcher import get_job_watcher
+        job = get_job_watcher(self.namespace).wait_sync(
+            job_name, lambda j: bool(j.status.succeeded or j.status.failed), timeout=timeout_seconds
+        )
+        if job.status.failed:
+            raise Exception(f"Job {job_name} failed: {job.status.conditions}")
+        return True
+
+    async def async_wait_for_job(self, job_name: str, timeout_seconds: int = 3600) -> bool:
+        """wait_for_job for async callers; no executor thread held while waiting."""
+        import asyncio
+        from k8s import job_telemetry
+        from k8s.job_watcher import get_job_watcher
+        try:
+            job = await job_telemetry.track(self.namespace, job_name, asyncio.wait_for(
+                get_job_watcher(self.namespace).wait(job_name, lambda j: bool(j.status.succeeded or j.status.failed)),
+                timeout=timeout_seconds,
+            ))
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Job {job_name} did not finish in {timeout_seconds}s")
+        if job.status.failed:
+            raise Exception(f"Job {job_name} failed: {job.status.conditions}")
+        return True
+
+    def read_sync_results(self, job_name: str, empty: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Per-KG outcome a sync Job wrote as its termination message:
+        {"ok": [repo, ...], "failed": {repo: error}, "data": {repo: digest},
+        "needs_index": [repo, ...]}; or an index Job's, {"indexed": [repo,
+        ...], "index_failed": [repo, ...]}. `empty` (no KG synced) if none
+        was written."""
+        pods = client.CoreV1Api().list_namespaced_pod(namespace=self.namespace,
+                                                       label_selector=f"job-name={job_name}").items
+        pods.sort(key=lambda p: p.metadata.creation_timestamp)
+        for pod in reversed(pods):
+            for cs in pod.status.container_statuses or []:
+                terminated = cs.state.terminated
+                if terminated and terminated.message:
+                    try:
+                        return json.loads(terminated.message)
+                    except ValueError:
+                        logger.warning(f"Unparseable results from {pod.metadata.name}: "
+                                       f"{terminated.message[-500:]}")
+        return empty if empty is not None else {"ok": [], "failed": {}}
+
+    @staticmethod
+    def compute_data_hash(data: Dict[str, str]) -> str:
+        """Hash of the per-repo digests of the HDT files on the PVC (the
+        LDF state's data.json): it changes exactly when some KG's HDT bytes
+        changed, not when a new tag points at the same files."""
+        h = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        return h[:16]
+
+    def compute_spec_hash(self) -> str:
+        """Hash of the rendered deployment (image, replicas, resources ...),
+        so template or config edits are applied even when no data changed."""
+        body = self.get_deployment({"host_name": app_config.ldf_host_name})
+        return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()[:16]
+
+    def rollout_state(self) -> Optional[Dict[str, str]]:
+        """{config_hash, data_hash, spec_hash} of the live deployment, or
+        None if it does not exist yet."""
+        try:
+            deployment = client.AppsV1Api().read_namespaced_deployment(name="frink-ldf-server",
+                                                                       namespace=self.namespace)
+        except ApiException as e:
+            if e.status == 404:
+                return None
+            raise
+        annotations = deployment.spec.template.metadata.annotations or {}
+        return {
+            "config_hash": annotations.get("kace/config-hash"),
+            "data_hash": annotations.get("kace/data-hash"),
+            "spec_hash": (deployment.metadata.annotations or {}).get("kace/spec-hash"),
         }
-        api.patch_namespaced_deployment(name="frink-ldf-server",
-                                        namespace=self.namespace, body=body)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+"""Content-addressed cache of LakeFS objects on a shared volume.
+
+Blobs live at ``<root>/<checksum>-<size>`` and are hard-linked into their
+consumer paths (e.g. ``/shared/qlever-source/<repo>/graph.nt.gz``). A
+download whose LakeFS checksum already has a blob is satisfied by a link
+instead of a transfer, so a federated rebuild only pulls the KGs whose
+objects actually changed.
+
+Blobs still linked from a consumer path (st_nlink > 1) cost nothing extra
+and are never evicted. Unreferenced blobs are kept for re-use (e.g. a tag
+re-pointed back to an older commit) and evicted least-recently-used first
+once they exceed the size budget.
+"""
+import os
+import re
+from typing import Optional
+
+from log_util import LoggingUtil
+
+logger = LoggingUtil.init_logging('lakefs-cache')
+
+
+class DownloadCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key_for(stat: Optional[dict]) -> Optional[str]:
+        """Cache key for an `objects/stat` payload, or None if the object
+        carries no checksum (such objects are never cached)."""
+        if not stat or not stat.get("checksum") or stat.get("size_bytes") is None:
+            return None
+        checksum = re.sub(r'[^A-Za-z0-9_.-]', '_', str(stat["checksum"]))
+        return f"{checksum}-{stat['size_bytes']}"
+
+    def _blob(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def link_into(self, key: str, dest: str) -> bool:
+        """Point `dest` at the cached blob for `key`. Returns False on a miss."""
+        blob = self._blob(key)
+        if not os.path.exists(blob):
+            return False
+        try:
+            if not (os.path.exists(dest) and os.path.samefile(blob, dest)):
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                tmp = dest + '.cache-link'
+                if os.path.lexists(tmp):
+                    os.unlink(tmp)
+                os.link(blob, tmp)
+                os.replace(tmp, dest)
+            os.utime(blob)  # LRU recency
+        except OSError as e:
+            logger.warning(f"Cache link {blob} -> {dest} failed, downloading instead: {e}")
+            return False
+        return True
+
+    def detach(self, dest: str) -> None:
+        """Unlink `dest` if it shares its inode with a cached blob, so an
+        in-place (O_TRUNC / pwrite) download cannot corrupt the blob."""
+        try:
+            if os.stat(dest).st_nlink > 1:
+                os.unlink(dest)
+        except FileNotFoundError:
+            pass
+
+    def add(self, key: str, src: str) -> None:
+        """Adopt a freshly downloaded `src` as the blob for `key`."""
+        blob = self._blob(key)
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            if os.path.exists(blob):
+                return
+            tmp = blob + '.tmp'
+            if os.path.lexists(tmp):
+                os.unlink(tmp)
+            os.link(src, tmp)
+            os.replace(tmp, blob)
+            logger.info(f"Cached {src} as {key}")
+        except OSError as e:
+            # Cross-device / unsupported hard links: caching is best-effort.
+            logger.warning(f"Could not cache {src} as {key}: {e}")
+
+    def evict(self) -> list[str]:
+        """Delete unreferenced blobs, oldest first, until they fit the budget.
+        Returns the evicted keys."""
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        unreferenced = []
+        for name in names:
+            if name.endswith('.tmp'):
+                continue
+            try:
+                st = os.stat(self._blob(name))
+            except FileNotFoundError:
+                continue
+            if st.st_nlink == 1:
+                unreferenced.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in unreferenced)
+        evicted = []
+        for _, size, name in sorted(unreferenced):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(self._blob(name))
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted.append(name)
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} cached blobs from {self.root}: {evicted}")
+        return evicted
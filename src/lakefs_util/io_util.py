@@ -1,16 +1,15 @@
+import hashlib
 import json
 import os, shutil
-import lakefs.client
 import aiohttp
-import lakefs_sdk.configuration
-from lakefs_sdk.exceptions import BadRequestException
 import asyncio
+import contextlib
 from config import config
 from log_util import LoggingUtil
 from lakefs_util.semver_util import get_latest_version, bump_version
-from lakefs.models import Commit
 from typing import Union, List, Optional
-from lakefs_util.lakefs_login import login_and_get_cookies
+from lakefs_util.lakefs_http import get_client
+from lakefs_util import lakefs_api
 
 import urllib.parse
 
@@ -100,76 +99,87 @@ async def download_files(repo: str, branch: str, extensions: List = None, exclud
     if exclude_known_extension:
         extensions = [ext for ext in extensions if ext not in exclude_known_extension]
     logger.info(f"Downloading {extensions} file types from {repo}@{branch} ")
-    cookie = await login_and_get_cookies(config.lakefs_url, config.lakefs_access_key, config.lakefs_secret_key)
     all_files = []
     files_downloaded = []
-    connector = _build_connector(limit_per_host=8)
-    timeout = aiohttp.ClientTimeout(total=None, sock_read=600, sock_connect=60)
-    async with aiohttp.ClientSession(cookies=cookie, connector=connector, timeout=timeout) as session:
-        has_more = True
-        offset = ""
-        while has_more:
-            url = lambda offset: (f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/'
-                                  f'{urllib.parse.quote_plus(branch)}'
-                                  f'/objects/ls?after={offset}&amount=1000')
-            response = await session.get(url(offset))
+    to_download = []
+    session = await get_client()
+    has_more = True
+    offset = ""
+    while has_more:
+        url = lambda offset: (f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/'
+                              f'{urllib.parse.quote_plus(branch)}'
+                              f'/objects/ls?after={offset}&amount=1000')
+        async with session.get(url(offset)) as response:
             if response.status != 200:
                 logger.error(f"Error getting file list")
                 raise Exception(f"Error getting file")
             results = await response.json()
-            has_more = results["pagination"]["has_more"]
-            offset = results["pagination"]["next_offset"]
-            all_files += list([x['path'] for x in results["results"]])
-        base_dir = os.path.join(config.local_data_dir, repo, branch)
-        if os.path.exists(base_dir):
-            if  delete_all_files:
-                clear_directory(base_dir, delete_root=False)
-        else:
-            logger.info(f"Directory {base_dir} does not exist; creating it ")
-            os.makedirs(base_dir)
-        for file_name in all_files:
-            if file_name in exclude_files:
-                logger.info(f"Skipping {file_name}")
-                continue
-            if exclude_prefixes and any(file_name.lstrip('/').startswith(p) for p in exclude_prefixes):
-                logger.info(f"Skipping {file_name} (excluded prefix)")
-                continue
-            suffixes = file_name.split('.')
-            downloadable = False
-            for e in extensions:
-                e_split = e.split('.')
-                if suffixes[-len(e_split):] == e_split:
-                    downloadable = True
-                    break
-            if downloadable:
-                files_downloaded.append(file_name.lstrip('/'))
-                download_path = os.path.join(base_dir, file_name)
-                await download_file(file_name, repo, branch, download_path, session)
-                logger.info(f"Download {file_name} complete")
+        has_more = results["pagination"]["has_more"]
+        offset = results["pagination"]["next_offset"]
+        all_files += list([x['path'] for x in results["results"]])
+    base_dir = os.path.join(config.local_data_dir, repo, branch)
+    if os.path.exists(base_dir):
+        if  delete_all_files:
+            clear_directory(base_dir, delete_root=False)
+    else:
+        logger.info(f"Directory {base_dir} does not exist; creating it ")
+        os.makedirs(base_dir)
+    for file_name in all_files:
+        if file_name in exclude_files:
+            logger.info(f"Skipping {file_name}")
+            continue
+        if exclude_prefixes and any(file_name.lstrip('/').startswith(p) for p in exclude_prefixes):
+            logger.info(f"Skipping {file_name} (excluded prefix)")
+            continue
+        suffixes = file_name.split('.')
+        downloadable = False
+        for e in extensions:
+            e_split = e.split('.')
+            if suffixes[-len(e_split):] == e_split:
+                downloadable = True
+                break
+        if downloadable:
+            files_downloaded.append(file_name.lstrip('/'))
+            to_download.append(file_name)
+
+    # Fan out across files. Every GET (whole-file stream or byte-range
+    # part of a large file) takes a slot from the same semaphore, so
+    # shard-heavy repos keep DOWNLOAD_CONNECTIONS_DEFAULT streams busy
+    # while a few huge files can't multiply past it.
+    slots = asyncio.Semaphore(DOWNLOAD_CONNECTIONS_DEFAULT)
+
+    async def _download(file_name):
+        download_path = os.path.join(base_dir, file_name)
+        await download_file(file_name, repo, branch, download_path, session, slots=slots)
+        logger.info(f"Download {file_name} complete")
+
+    await _gather_or_cancel([_download(f) for f in to_download])
     return files_downloaded
 
 PARALLEL_PARTS_DEFAULT = int(os.environ.get("LAKEFS_DOWNLOAD_PARTS", "8"))
 PARALLEL_THRESHOLD_BYTES = int(os.environ.get("LAKEFS_PARALLEL_THRESHOLD", str(64 * 1024 * 1024)))  # 64MiB
+# In-flight GET budget for a multi-file download (download_files). Shared by
+# small-file streams and the byte-range parts of large files.
+DOWNLOAD_CONNECTIONS_DEFAULT = int(os.environ.get("LAKEFS_DOWNLOAD_CONNECTIONS", "16"))
 
 
-def _build_connector(limit_per_host: int = 8) -> aiohttp.TCPConnector:
-    """Build a TCPConnector that uses aiodns (AsyncResolver) when available.
-
-    Default aiohttp resolver is ThreadedResolver, which calls
-    socket.getaddrinfo via the asyncio default executor. Under fan-out
-    (many concurrent connections + many asyncio.to_thread users in the
-    same worker), the executor thread pool saturates and starves other
-    blocking calls (eg the k8s client polls in watch_k8s_job_sync).
-    AsyncResolver delegates to aiodns and stays off the executor.
-    """
+async def _gather_or_cancel(coros):
+    """gather() that cancels the siblings when one fails, instead of leaving
+    them running against a session that is about to be closed."""
+    tasks = [asyncio.ensure_future(c) for c in coros]
     try:
-        resolver = aiohttp.AsyncResolver()
-    except (ImportError, RuntimeError):
-        # aiodns not installed or no event loop yet — fall back to default.
-        resolver = None
-    if resolver is not None:
-        return aiohttp.TCPConnector(limit_per_host=limit_per_host, resolver=resolver)
-    return aiohttp.TCPConnector(limit_per_host=limit_per_host)
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+# Stat / commit-lookup style calls: small JSON responses, fail fast on a
+# slow server. Per-socket limits only: a `total` would also count the wait
+# for a free pooled connection, which part transfers can hold for minutes.
+_METADATA_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_read=15, sock_connect=10)
 
 # Tighter per-socket read window for the qlever index download path.
 # LakeFS occasionally drip-feeds chunks; a long window lets slow-trickle
@@ -189,19 +199,72 @@ def _activity_heartbeat(detail: dict) -> None:
         pass
 
 
-async def _stat_size(file_name, repo, branch, session) -> Optional[int]:
+async def _stat_object(file_name, repo, branch, session) -> Optional[dict]:
+    """Raw `objects/stat` payload (size_bytes, checksum, physical_address, ...)
+    or None if the object is absent."""
     stats_url = (f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/'
                  f'{urllib.parse.quote_plus(branch)}/objects/stat?path={file_name}')
     async with session.get(stats_url) as resp:
         if resp.status != 200:
             return None
-        data = await resp.json()
-        return data.get("size_bytes")
+        return await resp.json()
+
+
+async def _stat_size(file_name, repo, branch, session) -> Optional[int]:
+    stat = await _stat_object(file_name, repo, branch, session)
+    return stat.get("size_bytes") if stat else None
+
+
+# Sidecar next to a parallel download recording the part layout and how far
+# each part got. A retried activity (DOWNLOAD_RETRY) reads it back and only
+# fetches the missing ranges instead of truncating and starting over.
+_PART_MANIFEST_SUFFIX = ".parts.json"
+_CHECKPOINT_INTERVAL_SECS = 60
+
+
+def _load_part_manifest(download_path: str, identity: dict) -> Optional[list]:
+    """Return the saved [[start, offset, end], ...] part list if the sidecar
+    describes this exact object (repo/ref/path/size/checksum) and the target
+    file is still there at full nominal size; otherwise None."""
+    manifest_path = download_path + _PART_MANIFEST_SUFFIX
+    if not identity.get("checksum"):
+        return None
+    try:
+        with open(manifest_path) as fh:
+            manifest = json.load(fh)
+        if manifest.get("object") != identity:
+            logger.info(f"Ignoring stale part manifest {manifest_path} (object changed)")
+            return None
+        if os.path.getsize(download_path) != identity["size"]:
+            return None
+        return [list(p) for p in manifest["parts"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_part_manifest(download_path: str, identity: dict, parts: list, fd: int) -> None:
+    """Flush file data, then persist the part offsets. Offsets are snapshotted
+    by the caller *before* the flush so the manifest never claims bytes that
+    were not durably written."""
+    os.fdatasync(fd)
+    manifest_path = download_path + _PART_MANIFEST_SUFFIX
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as fh:
+        json.dump({"object": identity, "parts": parts}, fh)
+    os.replace(tmp_path, manifest_path)
+
+
+def _remove_part_manifest(download_path: str) -> None:
+    try:
+        os.unlink(download_path + _PART_MANIFEST_SUFFIX)
+    except FileNotFoundError:
+        pass
 
 
 async def download_file(file_name, repo, branch, download_path,
-                         session: aiohttp.ClientSession,
-                         parts: int = PARALLEL_PARTS_DEFAULT):
+                         session,
+                         parts: int = PARALLEL_PARTS_DEFAULT,
+                         slots: Optional[asyncio.Semaphore] = None):
     """Download an object from lakefs to disk.
 
     Strategy:
@@ -209,21 +272,35 @@ async def download_file(file_name, repo, branch, download_path,
         fetch in parallel, pwrite into a single pre-sized file. Massive
         speedup for large objects (e.g. 250GB wikidata dumps).
       - For small files: single streaming GET.
+
+    Parallel downloads keep a `<download_path>.parts.json` sidecar with the
+    part layout, per-part offsets and the object's checksum. It is
+    checkpointed (after an fdatasync) while parts stream and on failure, so
+    a retried activity resumes only the missing ranges of the same object.
+
+    `session` is the shared LakeFS client (lakefs_http.get_client()) or a
+    timeout view of it.
+
+    `slots`, when given, is a connection budget shared with other concurrent
+    download_file calls; each GET (stream or part attempt) holds one slot.
     """
+    slot = lambda: slots if slots is not None else contextlib.nullcontext()
     download_dir = os.path.dirname(download_path)
     if download_dir and not os.path.exists(download_dir):
         os.makedirs(download_dir, exist_ok=True)
     file_url = (f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/'
                 f'{urllib.parse.quote_plus(branch)}/objects?path={file_name}')
 
-    size = await _stat_size(file_name, repo, branch, session)
+    async with slot():
+        stat = await _stat_object(file_name, repo, branch, session)
+    size = stat.get("size_bytes") if stat else None
     if size is None:
         logger.warning(f"File {file_name} not found in {repo}@{branch}")
         return None
 
     if size < PARALLEL_THRESHOLD_BYTES or parts <= 1:
         logger.info(f"Downloading {file_name} ({size} bytes, single stream)")
-        async with session.get(file_url, headers={'Accept-Encoding': 'identity'}) as resp:
+        async with slot(), session.get(file_url, headers={'Accept-Encoding': 'identity'}) as resp:
             if resp.status != 200:
                 logger.warning(f"{file_name} status {resp.status}")
                 return None
@@ -233,29 +310,58 @@ async def download_file(file_name, repo, branch, download_path,
         logger.info(f"Download {file_name} complete -> {download_path}")
         return download_path
 
-    logger.info(f"Downloading {file_name} ({size} bytes, {parts} parallel parts)")
-    fd = os.open(download_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
-    try:
-        os.ftruncate(fd, size)
+    identity = {
+        "repo":     repo,
+        "ref":      branch,
+        "path":     file_name,
+        "size":     size,
+        "checksum": stat.get("checksum"),
+    }
+    progress = _load_part_manifest(download_path, identity)
+    if progress is not None:
+        remaining = sum(end + 1 - offset for _, offset, end in progress)
+        logger.info(f"Resuming {file_name} ({remaining} of {size} bytes left across {len(progress)} parts)")
+        fd = os.open(download_path, os.O_WRONLY)
+    else:
+        logger.info(f"Downloading {file_name} ({size} bytes, {parts} parallel parts)")
         part_size = (size + parts - 1) // parts
+        # [start, offset, end] per part; offset is the next byte to fetch.
+        progress = [[i * part_size, i * part_size, min((i + 1) * part_size, size) - 1]
+                    for i in range(parts) if i * part_size < size]
+        fd = os.open(download_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    completed = False
+    saving = None  # in-flight checkpoint thread; must finish before fd is closed
+    try:
+        if os.fstat(fd).st_size != size:
+            os.ftruncate(fd, size)
+        _save_part_manifest(download_path, identity, progress, fd)
 
         max_attempts = 5
         base_delay   = 2
         loop = asyncio.get_event_loop()
+        checkpoint_lock = asyncio.Lock()
+        last_checkpoint = loop.time()
 
-        async def fetch_part(i: int):
-            start = i * part_size
-            end = min(start + part_size, size) - 1
-            if start > end:
+        async def checkpoint():
+            nonlocal last_checkpoint, saving
+            if checkpoint_lock.locked() or loop.time() - last_checkpoint < _CHECKPOINT_INTERVAL_SECS:
                 return
-            offset = start  # advances across retries — never re-download bytes already pwritten
+            async with checkpoint_lock:
+                snapshot = [list(p) for p in progress]
+                saving = asyncio.ensure_future(
+                    asyncio.to_thread(_save_part_manifest, download_path, identity, snapshot, fd))
+                await asyncio.shield(saving)
+                last_checkpoint = loop.time()
+
+        async def fetch_part(i: int):
+            _, offset, end = progress[i]  # offset advances across retries and activity attempts
             last_hb = loop.time()
             for attempt in range(1, max_attempts + 1):
                 if offset > end:
                     return
                 headers = {'Accept-Encoding': 'identity', 'Range': f'bytes={offset}-{end}'}
                 try:
-                    async with session.get(file_url, headers=headers) as resp:
+                    async with slot(), session.get(file_url, headers=headers) as resp:
                         if resp.status not in (200, 206):
                             raise Exception(f"part {i} {file_name}: HTTP {resp.status}")
                         # pwrite is a single fast syscall that releases the GIL;
@@ -265,6 +371,7 @@ async def download_file(file_name, repo, branch, download_path,
                         async for buf in resp.content.iter_chunked(8 * 1024 * 1024):
                             os.pwrite(fd, buf, offset)
                             offset += len(buf)
+                            progress[i][1] = offset
                             now = loop.time()
                             if now - last_hb >= _HEARTBEAT_INTERVAL_SECS:
                                 _activity_heartbeat({
@@ -274,6 +381,7 @@ async def download_file(file_name, repo, branch, download_path,
                                     "end":    end,
                                 })
                                 last_hb = now
+                                await checkpoint()
                     return
                 except (asyncio.TimeoutError, aiohttp.ClientError, OSError) as e:
                     if attempt >= max_attempts:
@@ -293,8 +401,20 @@ async def download_file(file_name, repo, branch, download_path,
                     })
                     await asyncio.sleep(delay)
 
-        await asyncio.gather(*[fetch_part(i) for i in range(parts)])
+        # A failed part cancels the others, so no write lands after fd is closed.
+        await _gather_or_cancel([fetch_part(i) for i in range(len(progress))])
+        completed = True
     finally:
+        if saving is not None:
+            await asyncio.gather(saving, return_exceptions=True)
+        try:
+            if completed:
+                _remove_part_manifest(download_path)
+            else:
+                # Record how far every part got so the next attempt resumes.
+                _save_part_manifest(download_path, identity, [list(p) for p in progress], fd)
+        except OSError as e:
+            logger.warning(f"Could not update part manifest for {download_path}: {e}")
         os.close(fd)
     logger.info(f"Download {file_name} complete -> {download_path}")
     return download_path
@@ -303,61 +423,77 @@ async def download_file(file_name, repo, branch, download_path,
 async def download_hdt_files(repo: str, branch: str, kg_name: str, hdt_path: str='hdt') -> None:
     base_dir = config.shared_data_dir + '/deploy'
     # @TODO download into a temp name then rename
-    cookie = await login_and_get_cookies(config.lakefs_url, config.lakefs_access_key, config.lakefs_secret_key)
     all_files = []
-    connector = _build_connector(limit_per_host=8)
-    timeout = aiohttp.ClientTimeout(total=None, sock_read=600, sock_connect=60)
-    async with aiohttp.ClientSession(cookies=cookie, connector=connector, timeout=timeout) as session:
-        has_more = True
-        offset = ""
-        while has_more:
-            url = lambda offset: (f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/'
-                                  f'{urllib.parse.quote_plus(branch)}'
-                                  f'/objects/ls?after={offset}&amount=1000?&prefix={hdt_path}') if offset else (
-                                    f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/'
-                                    f'{urllib.parse.quote_plus(branch)}'
-                                    f'/objects/ls?amount=1000&prefix={hdt_path}')
-            logger.info(url(offset))
-            response = await session.get(url(offset))
+    session = await get_client()
+    has_more = True
+    offset = ""
+    while has_more:
+        url = lambda offset: (f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/'
+                              f'{urllib.parse.quote_plus(branch)}'
+                              f'/objects/ls?after={offset}&amount=1000?&prefix={hdt_path}') if offset else (
+                                f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/'
+                                f'{urllib.parse.quote_plus(branch)}'
+                                f'/objects/ls?amount=1000&prefix={hdt_path}')
+        logger.info(url(offset))
+        async with session.get(url(offset)) as response:
             if response.status != 200:
                 logger.error(f"Error getting file list")
                 raise Exception(f"Error getting file")
-
             results = await response.json()
-            has_more = results["pagination"]["has_more"]
-            offset += results["pagination"]["next_offset"]
-            all_files += list([x['path'] for x in results["results"]])
-        renames = {}
-        logger.info(f"Files to download: {all_files}")
-        for file_name in all_files:
-            if file_name.endswith('.hdt') or file_name.endswith('.hdt.index.v1-1'):
-                temp_file_name = branch + '-' + kg_name + "." + ".".join(file_name.split('/')[-1].split('.')[1:])
-                download_path = os.path.join(base_dir, temp_file_name)
-                final_file_path = os.path.join(base_dir,
-                                               kg_name + "." + ".".join(file_name.split('/')[-1].split('.')[1:]))
-                renames[download_path] = final_file_path
-                os.makedirs(os.path.dirname(download_path), exist_ok=True)
-                await download_file(
-                    file_name, repo, branch, download_path, session
-                )
-        for temp_file_name, file_name in renames.items():
-            os.rename(temp_file_name, file_name)
-            logger.info(f"Moved {temp_file_name} -> {file_name}")
+        has_more = results["pagination"]["has_more"]
+        offset += results["pagination"]["next_offset"]
+        all_files += list([x['path'] for x in results["results"]])
+    renames = {}
+    logger.info(f"Files to download: {all_files}")
+    for file_name in all_files:
+        if file_name.endswith('.hdt') or file_name.endswith('.hdt.index.v1-1'):
+            temp_file_name = branch + '-' + kg_name + "." + ".".join(file_name.split('/')[-1].split('.')[1:])
+            download_path = os.path.join(base_dir, temp_file_name)
+            final_file_path = os.path.join(base_dir,
+                                           kg_name + "." + ".".join(file_name.split('/')[-1].split('.')[1:]))
+            renames[download_path] = final_file_path
+            os.makedirs(os.path.dirname(download_path), exist_ok=True)
+            await download_file(
+                file_name, repo, branch, download_path, session
+            )
+    for temp_file_name, file_name in renames.items():
+        os.rename(temp_file_name, file_name)
+        logger.info(f"Moved {temp_file_name} -> {file_name}")
 
 async def get_latest_commit(repo: str, ref: str = 'main') -> str:
     """Return the current commit ID for `ref` (branch or tag) in `repo`."""
-    cookie = await login_and_get_cookies(config.lakefs_url, config.lakefs_access_key, config.lakefs_secret_key)
-    async with aiohttp.ClientSession(cookies=cookie) as session:
-        url = (f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/'
-               f'{urllib.parse.quote_plus(ref)}/commits?amount=1')
-        response = await session.get(url)
+    session = await get_client()
+    url = (f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/'
+           f'{urllib.parse.quote_plus(ref)}/commits?amount=1')
+    async with session.get(url, timeout=_METADATA_TIMEOUT) as response:
         if response.status != 200:
             raise Exception(f"Failed to get commit for {repo}@{ref}: HTTP {response.status}")
         data = await response.json()
-        results = data.get('results') or []
-        if not results:
-            raise Exception(f"No commits found for {repo}@{ref}")
-        return results[0]['id']
+    results = data.get('results') or []
+    if not results:
+        raise Exception(f"No commits found for {repo}@{ref}")
+    return results[0]['id']
+
+
+# Sidecar in an HDT sync destination recording the LakeFS object (checksum,
+# size, path) each file was last synced from, so identical objects are not
+# downloaded and rewritten again.
+_SYNC_STATE_FILE = ".sync-state.json"
+
+
+def _load_sync_state(dest_dir: str) -> dict:
+    try:
+        with open(os.path.join(dest_dir, _SYNC_STATE_FILE)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_sync_state(dest_dir: str, state: dict) -> None:
+    path = os.path.join(dest_dir, _SYNC_STATE_FILE)
+    with open(path + '.tmp', 'w') as fh:
+        json.dump(state, fh, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
 
 
 async def download_hdt_files_to_dir(repo: str, ref: str, dest_dir: str, hdt_path: str = 'hdt') -> List[str]:
@@ -365,201 +501,355 @@ async def download_hdt_files_to_dir(repo: str, ref: str, dest_dir: str, hdt_path
     Download all .hdt and .hdt.index.v1-1 files from `repo`@`ref` under `hdt_path`
     into `dest_dir`. Files are renamed to `graph.hdt` / `graph.hdt.index.v1-1`
     (uses temp prefix during download then atomic rename).
-    Returns list of final paths written.
+
+    A file whose LakeFS checksum and size match what `.sync-state.json` says
+    it was last synced from (and whose size on disk still matches) is left
+    untouched, so a resync after state loss costs only the listing.
+    Returns list of final paths, written or already up to date.
     """
     os.makedirs(dest_dir, exist_ok=True)
-    cookie = await login_and_get_cookies(config.lakefs_url, config.lakefs_access_key, config.lakefs_secret_key)
     all_files = []
-    connector = _build_connector(limit_per_host=8)
-    timeout = aiohttp.ClientTimeout(total=None, sock_read=600)
-    async with aiohttp.ClientSession(cookies=cookie, connector=connector, timeout=timeout) as session:
-        has_more = True
-        offset = ""
-        while has_more:
-            url = (f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/'
-                   f'{urllib.parse.quote_plus(ref)}/objects/ls?amount=1000&prefix={hdt_path}')
-            if offset:
-                url += f'&after={offset}'
-            response = await session.get(url)
+    session = await get_client()
+    has_more = True
+    offset = ""
+    while has_more:
+        url = (f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/'
+               f'{urllib.parse.quote_plus(ref)}/objects/ls?amount=1000&prefix={hdt_path}')
+        if offset:
+            url += f'&after={offset}'
+        async with session.get(url) as response:
             if response.status != 200:
                 raise Exception(f"Error listing {repo}@{ref}/{hdt_path}: HTTP {response.status}")
             results = await response.json()
-            has_more = results["pagination"]["has_more"]
-            offset = results["pagination"]["next_offset"]
-            all_files += [x['path'] for x in results["results"]]
-
-        targets = []
-        for file_name in all_files:
-            base = file_name.split('/')[-1]
-            if base.endswith('.hdt'):
-                final_name = 'graph.hdt'
-            elif base.endswith('.hdt.index.v1-1'):
-                final_name = 'graph.hdt.index.v1-1'
-            else:
-                continue
-            tmp_path = os.path.join(dest_dir, '.tmp.' + final_name)
-            final_path = os.path.join(dest_dir, final_name)
-            targets.append((file_name, tmp_path, final_path))
-
-        sem = asyncio.Semaphore(4)
-
-        async def _download(file_name, tmp_path):
-            async with sem:
-                await download_file(file_name, repo, ref, tmp_path, session)
-
-        await asyncio.gather(*[_download(fn, tp) for fn, tp, _ in targets])
-
-        for _, tmp_path, final_path in targets:
-            os.replace(tmp_path, final_path)
-            logger.info(f"Synced {final_path}")
-        return [final_path for _, _, final_path in targets]
+        has_more = results["pagination"]["has_more"]
+        offset = results["pagination"]["next_offset"]
+        all_files += results["results"]
+
+    sync_state = _load_sync_state(dest_dir)
+    targets = []
+    current = []
+    for obj in all_files:
+        file_name = obj['path']
+        base = file_name.split('/')[-1]
+        if base.endswith('.hdt'):
+            final_name = 'graph.hdt'
+        elif base.endswith('.hdt.index.v1-1'):
+            final_name = 'graph.hdt.index.v1-1'
+        else:
+            continue
+        tmp_path = os.path.join(dest_dir, '.tmp.' + final_name)
+        final_path = os.path.join(dest_dir, final_name)
+        source = {"checksum": obj.get("checksum"), "size_bytes": obj.get("size_bytes")}
+        try:
+            on_disk = os.path.getsize(final_path)
+        except OSError:
+            on_disk = None
+        synced = sync_state.get(final_name, {})
+        if (source["checksum"] and on_disk == source["size_bytes"]
+                and {k: synced.get(k) for k in source} == source):
+            logger.info(f"{final_path} already matches {repo}@{ref}/{file_name}; skipping")
+            current.append(final_path)
+            continue
+        targets.append((file_name, tmp_path, final_path, final_name, {**source, "path": file_name}))
+
+    # At most graph.hdt and its index; the KGs a pod syncs at once bound the rest.
+    await _gather_or_cancel([download_file(fn, repo, ref, tp, session) for fn, tp, *_ in targets])
+
+    for _, tmp_path, final_path, final_name, source in targets:
+        os.replace(tmp_path, final_path)
+        sync_state[final_name] = source
+        logger.info(f"Synced {final_path}")
+    if targets:
+        _save_sync_state(dest_dir, sync_state)
+    return current + [final_path for _, _, final_path, *_ in targets]
 
 
 async def get_lakefs_prefix_size(repo: str, branch: str, prefix: str) -> int:
     """
     Returns the total size in bytes of all objects under a specific prefix in LakeFS.
     """
-    cookie = await login_and_get_cookies(config.lakefs_url, config.lakefs_access_key, config.lakefs_secret_key)
     total_size_bytes = 0
-    async with aiohttp.ClientSession(cookies=cookie) as session:
-        has_more = True
-        offset = ""
-        while has_more:
-            # We must use quote_plus for repo/branch but prefix must typically be encoded too if it has special chars.
-            # Usually prefix="qlever/" is fine with just quote_plus or directly in the URL if simple.
-            # Taking inspiration from download_hdt_files
-            url = f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/{urllib.parse.quote_plus(branch)}/objects/ls?amount=1000&prefix={urllib.parse.quote_plus(prefix)}'
-            if offset:
-                url += f"&after={offset}"
-                
-            response = await session.get(url)
+    session = await get_client()
+    has_more = True
+    offset = ""
+    while has_more:
+        # We must use quote_plus for repo/branch but prefix must typically be encoded too if it has special chars.
+        # Usually prefix="qlever/" is fine with just quote_plus or directly in the URL if simple.
+        # Taking inspiration from download_hdt_files
+        url = f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/refs/{urllib.parse.quote_plus(branch)}/objects/ls?amount=1000&prefix={urllib.parse.quote_plus(prefix)}'
+        if offset:
+            url += f"&after={offset}"
+
+        async with session.get(url, timeout=_METADATA_TIMEOUT) as response:
             if response.status != 200:
                 logger.error(f"Error getting file list for size calculation: {await response.text()}")
                 return 0
-
             results = await response.json()
-            has_more = results.get("pagination", {}).get("has_more", False)
-            offset = results.get("pagination", {}).get("next_offset", "")
-            
-            for item in results.get("results", []):
-                # Only sum files, not directories (which have size_bytes = 0 usually but good to be safe)
-                if item.get("path_type") == "object":
-                    total_size_bytes += item.get("size_bytes", 0)
+        has_more = results.get("pagination", {}).get("has_more", False)
+        offset = results.get("pagination", {}).get("next_offset", "")
+
+        for item in results.get("results", []):
+            # Only sum files, not directories (which have size_bytes = 0 usually but good to be safe)
+            if item.get("path_type") == "object":
+                total_size_bytes += item.get("size_bytes", 0)
 
     return total_size_bytes
 
 async def get_latest_tag(repo: str) -> Optional[str]:
     """Highest existing semver tag for a repo (e.g. 'v1.2.3'). Returns None if no tags."""
-    client_ = lakefs.client.LakeFSClient(
-        configuration=lakefs_sdk.configuration.Configuration(
-            config.lakefs_url,
-            username=config.lakefs_access_key,
-            password=config.lakefs_secret_key
-        )
-    )
-    results = client_.tags_api.list_tags(repo)
-    pagination = results.pagination
-    tags = list(results.results)
-    while pagination.has_more:
-        results = client_.tags_api.list_tags(repo, after=pagination.next_offset)
-        pagination = results.pagination
-        tags += list(results.results)
+    tags = await lakefs_api.list_tags(repo)
     if not tags:
         return None
-    versions = [t.id.lstrip('v') for t in tags]
+    versions = [t["id"].lstrip('v') for t in tags]
     latest = get_latest_version(versions)
     return f"v{latest}" if latest else None
 
 
 async def resolve_future_tag(repo: str) -> str:
-    # create client
-    client = lakefs.client.LakeFSClient(
-        configuration=lakefs_sdk.configuration.Configuration(
-            config.lakefs_url,
-            username=config.lakefs_access_key,
-            password=config.lakefs_secret_key
-        )
-    )
     # get all tags
-    results = client.tags_api.list_tags(repo)
-    pagination = results.pagination
-    tags = results.results
-    while pagination.has_more:
-        results = client.tags_api.list_tags(repo,after=pagination.next_offset)
-        pagination = results.pagination
-        tags += results
+    tags = await lakefs_api.list_tags(repo)
     # compute latest tag
-    versions = [tag.id.lstrip('v') for tag in tags]
+    versions = [tag["id"].lstrip('v') for tag in tags]
     latest_tag = "v" + bump_version(get_latest_version(versions), "patch") if len(versions) else "v0.0.1"
     return latest_tag
 
+# Upload side. Files >= UPLOAD_PART_SIZE_DEFAULT go through LakeFS presigned
+# multipart upload (staging/pmpu): parts are PUT straight to the object store
+# in parallel. Smaller files, or servers without presigned multipart, use a
+# single streamed POST through LakeFS.
+UPLOAD_PART_SIZE_DEFAULT = int(os.environ.get("LAKEFS_UPLOAD_PART_SIZE", str(32 * 1024 * 1024)))  # 32MiB
+UPLOAD_CONNECTIONS_DEFAULT = int(os.environ.get("LAKEFS_UPLOAD_CONNECTIONS", "8"))
+UPLOAD_FILES_CONCURRENCY = int(os.environ.get("LAKEFS_UPLOAD_FILES", "4"))
+_UPLOAD_MAX_PARTS = 10000               # S3 multipart limit
+_UPLOAD_MIN_PART_SIZE = 5 * 1024 * 1024  # S3 minimum for all but the last part
+_UPLOAD_STREAM_CHUNK = 4 * 1024 * 1024
+
+# Flipped off the first time LakeFS reports presigned multipart as unavailable.
+_presigned_multipart_available = True
+
+
+def _upload_part_size(size: int) -> int:
+    part_size = max(UPLOAD_PART_SIZE_DEFAULT, _UPLOAD_MIN_PART_SIZE)
+    # Grow the parts rather than exceed the part-count limit.
+    return max(part_size, -(-size // _UPLOAD_MAX_PARTS))
+
+
+async def _upload_streamed(file: str, repo: str, branch: str, path: str, session) -> None:
+    url = (f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/branches/'
+           f'{urllib.parse.quote_plus(branch)}'
+           f'/objects?path={urllib.parse.quote_plus(path)}')
+    stream = await open_file_with_retry(file, mode='rb')
+    with stream:
+        # chunk generator; reads run off the event loop
+        async def file_chunks():
+            while True:
+                chunk = await asyncio.to_thread(stream.read, _UPLOAD_STREAM_CHUNK)
+                if not chunk:
+                    break
+                yield chunk
+
+        async with session.post(url, data=file_chunks()) as response:
+            if response.status not in [200, 201]:
+                txt = await response.text()
+                logger.error(f"Error uploading file: {txt}")
+                raise Exception(f"Error uploading file: {response.status}")
+
+
+class _PresignedUrlExpired(Exception):
+    pass
+
+
+async def _upload_multipart(file: str, repo: str, branch: str, path: str, size: int, session,
+                            slot) -> bool:
+    """Presigned multipart upload of `file`. Returns False (nothing uploaded)
+    if LakeFS does not offer presigned multipart.
+
+    All part URLs are issued when the upload starts and LakeFS cannot
+    re-sign parts of an open upload, so a 403 (URL expired on a long
+    upload) is not retried: the upload is aborted and the error raised for
+    upload_file to fall back to a streamed upload.
+    """
+    global _presigned_multipart_available
+    part_size = _upload_part_size(size)
+    num_parts = -(-size // part_size)
+    upload = await lakefs_api.create_presigned_multipart_upload(repo, branch, path, num_parts)
+    if upload is None:
+        logger.info("LakeFS presigned multipart upload unavailable; using streamed uploads")
+        _presigned_multipart_available = False
+        return False
+    logger.info(f"Uploading {path} ({size} bytes, {num_parts} parts of {part_size} bytes)")
+
+    max_attempts = 5
+    base_delay = 2
+    fd = os.open(file, os.O_RDONLY)
+
+    async def put_part(i: int) -> str:
+        length = min(part_size, size - i * part_size)
+        for attempt in range(1, max_attempts + 1):
+            try:
+                async with slot():
+                    body = await asyncio.to_thread(os.pread, fd, length, i * part_size)
+                    async with session.request('PUT', upload["presigned_urls"][i], data=body) as resp:
+                        if resp.status == 403:
+                            raise _PresignedUrlExpired(f"part {i} {path}: presigned URL rejected "
+                                                       f"({(await resp.text())[:200]})")
+                        if resp.status != 200:
+                            raise aiohttp.ClientResponseError(
+                                resp.request_info, resp.history, status=resp.status,
+                                message=(await resp.text())[:200])
+                        return resp.headers["ETag"]
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                if attempt >= max_attempts:
+                    logger.error(f"part {i} {path}: giving up after {attempt} attempts: {e}")
+                    raise
+                delay = base_delay * (2 ** (attempt - 1))
+                logger.warning(f"part {i} {path}: attempt {attempt} failed ({type(e).__name__}: {e}), "
+                               f"retry in {delay}s")
+                await asyncio.sleep(delay)
+
+    try:
+        etags = await _gather_or_cancel([put_part(i) for i in range(num_parts)])
+        await lakefs_api.complete_presigned_multipart_upload(repo, branch, path, upload, etags)
+    except BaseException:
+        try:
+            await lakefs_api.abort_presigned_multipart_upload(repo, branch, path, upload)
+        except Exception as e:
+            logger.warning(f"Could not abort multipart upload of {path}: {e}")
+        raise
+    finally:
+        os.close(fd)
+    return True
+
+
+# Part sizes commonly used by S3 multipart uploaders (LakeFS's own streamed
+# uploads, aws cli, rclone ...), tried when a remote checksum is a
+# multipart ETag ("<md5-of-part-md5s>-<parts>").
+_ETAG_PART_SIZES_MIB = (5, 8, 15, 16, 32, 64, 100, 128, 256, 512)
+_HASH_CHUNK = 8 * 1024 * 1024
+
+
+def _local_matches_checksum(file: str, size: int, remote_checksum: str) -> bool:
+    """Whether `file` has the LakeFS checksum `remote_checksum`: a plain md5
+    or an S3 multipart ETag. Reads the whole file once; run it off-loop."""
+    checksum = remote_checksum.strip('"').lower()
+    md5_hex, _, parts = checksum.partition('-')
+    if len(md5_hex) != 32:
+        return False  # not an md5 / ETag (non-S3 blockstore); treat as changed
+    if not parts:
+        whole = hashlib.md5()
+        with open(file, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(_HASH_CHUNK), b''):
+                whole.update(chunk)
+        return whole.hexdigest() == md5_hex
+    if not parts.isdigit():
+        return False
+    part_sizes = {_upload_part_size(size)} | {m * 1024 * 1024 for m in _ETAG_PART_SIZES_MIB}
+    part_sizes = [ps for ps in part_sizes if -(-size // ps) == int(parts)]
+    if not part_sizes:
+        return False
+    # One pass, one running part hash per candidate part size.
+    states = [{"size": ps, "md5": hashlib.md5(), "filled": 0, "digests": []} for ps in part_sizes]
+    with open(file, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b''):
+            for st in states:
+                view = memoryview(chunk)
+                while view:
+                    take = min(len(view), st["size"] - st["filled"])
+                    st["md5"].update(view[:take])
+                    st["filled"] += take
+                    view = view[take:]
+                    if st["filled"] == st["size"]:
+                        st["digests"].append(st["md5"].digest())
+                        st["md5"], st["filled"] = hashlib.md5(), 0
+    for st in states:
+        if st["filled"]:
+            st["digests"].append(st["md5"].digest())
+        if hashlib.md5(b''.join(st["digests"])).hexdigest() == md5_hex:
+            return True
+    return False
+
+
+async def _remote_unchanged(file: str, repo: str, branch: str, path: str) -> bool:
+    """True if `repo`@`branch`:`path` already holds exactly `file`."""
+    session = (await get_client()).with_timeout(_METADATA_TIMEOUT)
+    stat = await _stat_object(path, repo, branch, session)
+    if not stat or not stat.get("checksum"):
+        return False
+    size = os.path.getsize(file)
+    if stat.get("size_bytes") != size:
+        return False
+    return await asyncio.to_thread(_local_matches_checksum, file, size, stat["checksum"])
+
+
+async def upload_file(file: str, repo: str, branch: str, path: str,
+                      slots: Optional[asyncio.Semaphore] = None) -> None:
+    """Upload one local file to `repo`@`branch`:`path` (see UPLOAD_* above).
+
+    `slots`, when given, is a connection budget shared with other concurrent
+    upload_file calls; each part PUT or streamed POST holds one slot.
+    """
+    slot = lambda: slots if slots is not None else contextlib.nullcontext()
+    session = await get_client()
+    size = os.path.getsize(file)
+    if _presigned_multipart_available and size >= UPLOAD_PART_SIZE_DEFAULT:
+        try:
+            if await _upload_multipart(file, repo, branch, path, size, session, slot):
+                logger.info(f"Uploaded {path}")
+                return
+        except Exception as e:
+            logger.warning(f"Multipart upload of {path} failed ({type(e).__name__}: {e}); "
+                           f"retrying as a streamed upload")
+    async with slot():
+        await _upload_streamed(file, repo, branch, path, session)
+    logger.info(f"Uploaded {path}")
+
+
 async def upload_files(repo: str, root_branch: str = "main", local_files: list[tuple[str, str]] = None):
     """Upload the result and clear dir"""
     latest_tag = await resolve_future_tag(repo)
     stable_branch_name = f"stable_{latest_tag.replace('.', '_')}"
-    # create client
-    client = lakefs.client.LakeFSClient(
-        configuration=lakefs_sdk.configuration.Configuration(
-            config.lakefs_url,
-            username=config.lakefs_access_key,
-            password=config.lakefs_secret_key
-        )
-    )
     # create branch if not exists
     try:
-        client.branches_api.create_branch(repository=repo, branch_creation={
-            "name": stable_branch_name,
-            "source": root_branch
-        })
+        await lakefs_api.create_branch(repo, stable_branch_name, root_branch)
     except Exception as e:
         logger.warn(e)
 
-    # push local files.
-    login_cookie = await login_and_get_cookies(config.lakefs_url, config.lakefs_access_key, config.lakefs_secret_key)
-
-    for file, remote_path in local_files:
-        async with aiohttp.ClientSession(cookies=login_cookie) as session:
-            stream = await open_file_with_retry(file, mode='rb')
-            with stream:
-                # chunk generator
-                async def file_chunks():
-                    while True:
-                        chunk = stream.read(1024 * 1024)  # 1 MB chunk size
-                        if not chunk:
-                            break
-                        yield chunk
-
-                path = remote_path + '/' + os.path.basename(file)
-
-                url = (f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}/branches/'
-                       f'{urllib.parse.quote_plus(stable_branch_name)}'
-                       f'/objects?path={urllib.parse.quote_plus(path)}')
-                logger.info(url)
-
-                async with session.post(url, data=file_chunks()) as response:
-                    if response.status not in [200, 201]:
-                        txt = await response.text()
-                        logger.error(f"Error uploading file: {txt}")
-                        raise Exception(f"Error uploading file: {response.status}")
-                    logger.info(f"Uploaded {path}")
+    # push local files, several at a time; parts of large files share the
+    # same connection budget. Files already on the stable branch with the
+    # same checksum (e.g. a re-run after a downstream failure) are skipped.
+    files_sem = asyncio.Semaphore(UPLOAD_FILES_CONCURRENCY)
+    slots = asyncio.Semaphore(UPLOAD_CONNECTIONS_DEFAULT)
+    uploaded, skipped = [], []
+    bytes_skipped = 0
+
+    async def _upload(file, remote_path):
+        nonlocal bytes_skipped
+        async with files_sem:
+            path = remote_path + '/' + os.path.basename(file)
+            if await _remote_unchanged(file, repo, stable_branch_name, path):
+                logger.info(f"Skipping {path}: unchanged on {repo}@{stable_branch_name}")
+                skipped.append(path)
+                bytes_skipped += os.path.getsize(file)
+                return
+            await upload_file(file, repo, stable_branch_name, path, slots=slots)
+            uploaded.append(path)
+
+    await _gather_or_cancel([_upload(file, remote_path) for file, remote_path in local_files])
+    if skipped:
+        logger.info(f"Skipped {len(skipped)} unchanged files ({bytes_skipped} bytes) on {repo}@{stable_branch_name}")
     if len(local_files):
-        # Commit
-        try:
-            client.commits_api.commit(repository=repo, branch=stable_branch_name, commit_creation={
-                "message": f"Uploads for version {latest_tag}",
-                "metadata": {
-                    "key": "value"
-                }
-            })
-        except BadRequestException as e:
-            b = json.loads(e.body)
-            if b['message'] != "commit: no changes":
-                raise e
+        # Commit even if everything was skipped: a previous attempt may have
+        # staged the objects without committing them. (None when nothing changed)
+        await lakefs_api.commit(repo, stable_branch_name, f"Uploads for version {latest_tag}",
+                                metadata={"key": "value"})
 
 
     return {
         "stable_branch_name": stable_branch_name,
         "future_tag": latest_tag,
+        "uploaded": uploaded,
+        "skipped": skipped,
+        "bytes_skipped": bytes_skipped,
     }
 
 
@@ -578,11 +868,8 @@ def clean_up_files(repo: str):
             print('Failed to delete %s. Reason: %s' % (file_path, e))
 
 
-def resolve_commit(repo, commit_id) -> Commit:
-    client = lakefs.client.LakeFSClient(configuration=lakefs_sdk.configuration.Configuration(
-        config.lakefs_url, username=config.lakefs_access_key, password=config.lakefs_secret_key
-    ))
-    return client.commits_api.get_commit(repository=repo, commit_id=commit_id)
+async def resolve_commit(repo, commit_id) -> dict:
+    return await lakefs_api.get_commit(repo, commit_id)
 
 
 async def open_file_with_retry(filepath: str, mode: str = "rb", retries: int = 10, initial_delay: float = 1):
@@ -604,19 +891,21 @@ async def object_exists(repo: str, ref: str, remote_file_path: str) -> bool:
     """Lakefs `objects/stat` probe. Returns True iff the object is present
     at `ref` with a non-None size. Used to pre-flight downloads so missing
     sources can be reported up front instead of failing mid-build."""
-    cookie = await login_and_get_cookies(config.lakefs_url, config.lakefs_access_key, config.lakefs_secret_key)
-    timeout = aiohttp.ClientTimeout(total=30, sock_read=15, sock_connect=10)
-    async with aiohttp.ClientSession(cookies=cookie, timeout=timeout) as session:
-        size = await _stat_size(remote_file_path, repo, ref, session)
-        return size is not None
+    session = (await get_client()).with_timeout(_METADATA_TIMEOUT)
+    size = await _stat_size(remote_file_path, repo, ref, session)
+    return size is not None
+
+
+async def get_object_stat(repo: str, ref: str, remote_file_path: str) -> Optional[dict]:
+    """Lakefs `objects/stat` payload (size_bytes, checksum, ...) or None if absent."""
+    session = (await get_client()).with_timeout(_METADATA_TIMEOUT)
+    return await _stat_object(remote_file_path, repo, ref, session)
 
 
 async def get_object_size(repo: str, ref: str, remote_file_path: str) -> Optional[int]:
     """Lakefs `objects/stat` returning size_bytes (or None if absent)."""
-    cookie = await login_and_get_cookies(config.lakefs_url, config.lakefs_access_key, config.lakefs_secret_key)
-    timeout = aiohttp.ClientTimeout(total=30, sock_read=15, sock_connect=10)
-    async with aiohttp.ClientSession(cookies=cookie, timeout=timeout) as session:
-        return await _stat_size(remote_file_path, repo, ref, session)
+    session = (await get_client()).with_timeout(_METADATA_TIMEOUT)
+    return await _stat_size(remote_file_path, repo, ref, session)
 
 
 async def download_file_at_ref(repo: str, ref: str, remote_file_path: str, local_download_path: str):
@@ -626,13 +915,11 @@ async def download_file_at_ref(repo: str, ref: str, remote_file_path: str, local
     surface as TimeoutErrors and engage the per-part retry loop, rather than
     quietly producing sparse partial files over many hours.
     """
-    cookie = await login_and_get_cookies(config.lakefs_url, config.lakefs_access_key, config.lakefs_secret_key)
-    connector = _build_connector(limit_per_host=8)
     timeout = aiohttp.ClientTimeout(total=None, sock_read=QLEVER_SOCK_READ_SECS, sock_connect=60)
-    async with aiohttp.ClientSession(cookies=cookie, connector=connector, timeout=timeout) as session:
-        response = await download_file(remote_file_path, repo, ref, local_download_path, session)
-        if not response:
-            return f"{repo}"
+    session = (await get_client()).with_timeout(timeout)
+    response = await download_file(remote_file_path, repo, ref, local_download_path, session)
+    if not response:
+        return f"{repo}"
 
 
 async def download_file_from_latest_tag(repo: str, remote_file_path: str, local_download_path: str):
@@ -643,40 +930,23 @@ async def download_file_from_latest_tag(repo: str, remote_file_path: str, local_
     :param remote_file_path: The path of the file in the repository.
     :param local_download_path: The local path where the file should be saved.
     """
-    # create client
-    client = lakefs.client.LakeFSClient(
-        configuration=lakefs_sdk.configuration.Configuration(
-            config.lakefs_url,
-            username=config.lakefs_access_key,
-            password=config.lakefs_secret_key
-        )
-    )
-
     # get all tags
-    results = client.tags_api.list_tags(repo)
-    pagination = results.pagination
-    tags_list = results.results
-    while pagination.has_more:
-        results = client.tags_api.list_tags(repo, after=pagination.next_offset)
-        pagination = results.pagination
-        tags_list.extend(results.results)
+    tags_list = await lakefs_api.list_tags(repo)
 
     if not tags_list:
         raise Exception(f"No tags found for repository {repo}")
 
-    versions = [tag.id.lstrip('v') for tag in tags_list]
+    versions = [tag["id"].lstrip('v') for tag in tags_list]
     latest_version = get_latest_version(versions)
     latest_tag = f"v{latest_version}"
 
     logger.info(f"Latest tag for {repo} is {latest_tag}. Downloading {remote_file_path}...")
 
-    cookie = await login_and_get_cookies(config.lakefs_url, config.lakefs_access_key, config.lakefs_secret_key)
-    connector = _build_connector(limit_per_host=8)
     timeout = aiohttp.ClientTimeout(total=None, sock_read=QLEVER_SOCK_READ_SECS, sock_connect=60)
-    async with aiohttp.ClientSession(cookies=cookie, connector=connector, timeout=timeout) as session:
-        response = await download_file(remote_file_path, repo, latest_tag, local_download_path, session)
-        if not response:
-            return f"{repo}"
+    session = (await get_client()).with_timeout(timeout)
+    response = await download_file(remote_file_path, repo, latest_tag, local_download_path, session)
+    if not response:
+        return f"{repo}"
 
 
 if __name__ == '__main__':
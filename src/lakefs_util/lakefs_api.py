@@ -0,0 +1,130 @@
+"""Async LakeFS REST calls (tags, branches, commits, presigned multipart
+uploads) on the shared session.
+
+Replaces the blocking lakefs SDK inside async activities: every call here
+goes through lakefs_http.get_client(), so it neither blocks the worker's
+event loop nor opens its own connection.
+"""
+import urllib.parse
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import aiohttp
+
+from config import config
+from lakefs_util.lakefs_http import get_client
+
+# Per-socket limits only; waiting for a pooled connection is not an error.
+_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_read=30, sock_connect=10)
+_PAGE_SIZE = 1000
+
+
+def _repo_url(repo: str) -> str:
+    return f'{config.lakefs_url}/api/v1/repositories/{urllib.parse.quote_plus(repo)}'
+
+
+async def _error(response: aiohttp.ClientResponse, what: str) -> Exception:
+    return Exception(f"{what}: HTTP {response.status} {await response.text()}")
+
+
+async def list_tags(repo: str) -> List[dict]:
+    """All tags of `repo` as [{id, commit_id}], following pagination."""
+    session = await get_client()
+    tags = []
+    after = ""
+    while True:
+        params = {"amount": _PAGE_SIZE}
+        if after:
+            params["after"] = after
+        async with session.get(f'{_repo_url(repo)}/tags', params=params, timeout=_TIMEOUT) as response:
+            if response.status != 200:
+                raise await _error(response, f"Error listing tags of {repo}")
+            page = await response.json()
+        tags += page.get("results") or []
+        pagination = page.get("pagination") or {}
+        if not pagination.get("has_more"):
+            return tags
+        after = pagination["next_offset"]
+
+
+async def create_branch(repo: str, name: str, source: str) -> None:
+    session = await get_client()
+    async with session.post(f'{_repo_url(repo)}/branches', json={"name": name, "source": source},
+                            timeout=_TIMEOUT) as response:
+        if response.status not in (200, 201):
+            raise await _error(response, f"Error creating branch {repo}@{name} from {source}")
+
+
+async def commit(repo: str, branch: str, message: str, metadata: dict = None) -> Optional[dict]:
+    """Commit `branch`. Returns the new commit, or None if there was nothing
+    to commit."""
+    session = await get_client()
+    url = f'{_repo_url(repo)}/branches/{urllib.parse.quote_plus(branch)}/commits'
+    # Commits of large staged uploads can take a while server-side.
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=600, sock_connect=10)
+    async with session.post(url, json={"message": message, "metadata": metadata or {}},
+                            timeout=timeout) as response:
+        if response.status == 400:
+            body = await response.json(content_type=None)
+            if (body or {}).get("message") == "commit: no changes":
+                return None
+        if response.status not in (200, 201):
+            raise await _error(response, f"Error committing {repo}@{branch}")
+        return await response.json()
+
+
+async def get_commit(repo: str, commit_id: str) -> dict:
+    """Commit metadata; `creation_date` is returned as an ISO-8601 string."""
+    session = await get_client()
+    url = f'{_repo_url(repo)}/commits/{urllib.parse.quote_plus(commit_id)}'
+    async with session.get(url, timeout=_TIMEOUT) as response:
+        if response.status != 200:
+            raise await _error(response, f"Error getting commit {repo}@{commit_id}")
+        data = await response.json()
+    if isinstance(data.get("creation_date"), (int, float)):
+        data["creation_date"] = datetime.fromtimestamp(data["creation_date"], tz=timezone.utc).isoformat()
+    return data
+
+
+def _pmpu_url(repo: str, branch: str, upload_id: str = None) -> str:
+    url = f'{_repo_url(repo)}/branches/{urllib.parse.quote_plus(branch)}/staging/pmpu'
+    return f'{url}/{urllib.parse.quote_plus(upload_id)}' if upload_id else url
+
+
+async def create_presigned_multipart_upload(repo: str, branch: str, path: str, parts: int) -> Optional[dict]:
+    """Start a presigned multipart upload: {upload_id, physical_address,
+    presigned_urls}. Returns None when the server does not offer it (needs
+    an S3 blockstore with presigned URLs enabled)."""
+    session = await get_client()
+    async with session.post(_pmpu_url(repo, branch), params={"path": path, "parts": parts},
+                            timeout=_TIMEOUT) as response:
+        if response.status in (400, 404, 405, 501):
+            return None
+        if response.status not in (200, 201):
+            raise await _error(response, f"Error starting multipart upload of {repo}@{branch}:{path}")
+        return await response.json()
+
+
+async def complete_presigned_multipart_upload(repo: str, branch: str, path: str, upload: dict,
+                                              etags: List[str]) -> dict:
+    session = await get_client()
+    body = {
+        "physical_address": upload["physical_address"],
+        "parts": [{"part_number": i + 1, "etag": etag} for i, etag in enumerate(etags)],
+    }
+    # S3 assembles the parts before answering; allow for large objects.
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=600, sock_connect=10)
+    async with session.request('PUT', _pmpu_url(repo, branch, upload["upload_id"]), params={"path": path},
+                               json=body, timeout=timeout) as response:
+        if response.status not in (200, 201):
+            raise await _error(response, f"Error completing multipart upload of {repo}@{branch}:{path}")
+        return await response.json()
+
+
+async def abort_presigned_multipart_upload(repo: str, branch: str, path: str, upload: dict) -> None:
+    session = await get_client()
+    async with session.request('DELETE', _pmpu_url(repo, branch, upload["upload_id"]), params={"path": path},
+                               json={"physical_address": upload["physical_address"]},
+                               timeout=_TIMEOUT) as response:
+        if response.status not in (200, 204):
+            raise await _error(response, f"Error aborting multipart upload of {repo}@{branch}:{path}")
@@ -0,0 +1,185 @@
+"""Shared aiohttp client for the LakeFS REST API.
+
+One session (and connection pool) per event loop instead of a login plus a
+fresh ClientSession / TLS handshake per helper call. The login cookie lives
+in the session's cookie jar and is refreshed before it expires or when a
+request comes back 401.
+
+    client = await get_client()
+    async with client.get(url) as resp: ...
+    resp = await client.get(url)   # caller reads / releases the body
+"""
+import asyncio
+import os
+import time
+from typing import Optional
+
+import aiohttp
+
+from config import config
+from log_util import LoggingUtil
+
+logger = LoggingUtil.init_logging('lakefs-http')
+
+# Connection pool shared by every LakeFS call in the process. Per-call
+# fan-out (download slots, part counts) is bounded by the callers; this is
+# only the ceiling.
+POOL_CONNECTIONS = int(os.environ.get("LAKEFS_POOL_CONNECTIONS", "64"))
+DNS_CACHE_TTL_SECS = int(os.environ.get("LAKEFS_DNS_CACHE_TTL", "300"))
+# Re-login after this long when the server does not report token_expiration.
+LOGIN_TTL_SECS = int(os.environ.get("LAKEFS_LOGIN_TTL", "3600"))
+_LOGIN_REFRESH_MARGIN_SECS = 60
+
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_read=600, sock_connect=60)
+
+
+def build_connector(limit_per_host: int = POOL_CONNECTIONS) -> aiohttp.TCPConnector:
+    """Build a TCPConnector that uses aiodns (AsyncResolver) when available.
+
+    Default aiohttp resolver is ThreadedResolver, which calls
+    socket.getaddrinfo via the asyncio default executor. Under fan-out
+    (many concurrent connections + many asyncio.to_thread users in the
+    same worker), the executor thread pool saturates and starves other
+    blocking calls (eg the k8s client polls in watch_k8s_job_sync).
+    AsyncResolver delegates to aiodns and stays off the executor.
+    """
+    kwargs = dict(limit=limit_per_host, limit_per_host=limit_per_host, ttl_dns_cache=DNS_CACHE_TTL_SECS)
+    try:
+        kwargs["resolver"] = aiohttp.AsyncResolver()
+    except (ImportError, RuntimeError):
+        # aiodns not installed or no event loop yet — fall back to default.
+        pass
+    return aiohttp.TCPConnector(**kwargs)
+
+
+def _replayable(kwargs: dict) -> bool:
+    """Only bodies we can send twice are retried after a re-login."""
+    data = kwargs.get("data")
+    return data is None or isinstance(data, (bytes, str, dict))
+
+
+class _Request:
+    """Lets `client.get(...)` be used like aiohttp's: awaited or `async with`."""
+
+    def __init__(self, coro):
+        self._coro = coro
+        self._resp: Optional[aiohttp.ClientResponse] = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self) -> aiohttp.ClientResponse:
+        self._resp = await self._coro
+        return self._resp
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._resp.release()
+
+
+class LakeFSHttp:
+    def __init__(self, base_url: str, access_key: str, secret_key: str):
+        self.base_url = base_url
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._login_lock = asyncio.Lock()
+        self._login_generation = 0
+        self._login_expires_at = 0.0
+
+    @property
+    def closed(self) -> bool:
+        return self._session is not None and self._session.closed
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            # unsafe=True: keep cookies for IP-addressed in-cluster URLs too.
+            self._session = aiohttp.ClientSession(connector=build_connector(),
+                                                  cookie_jar=aiohttp.CookieJar(unsafe=True),
+                                                  timeout=DEFAULT_TIMEOUT)
+        return self._session
+
+    async def _login(self, seen_generation: int) -> None:
+        async with self._login_lock:
+            if self._login_generation != seen_generation:
+                return  # another request already refreshed the cookie
+            session = self._get_session()
+            async with session.post(self.base_url + '/api/v1/auth/login',
+                                    json={"access_key_id": self._access_key,
+                                          "secret_access_key": self._secret_key},
+                                    timeout=aiohttp.ClientTimeout(total=None, sock_read=60, sock_connect=10)) as response:
+                if response.status != 200:
+                    raise Exception("Lakefs login error")
+                body = await response.json(content_type=None)
+            expires_at = (body or {}).get("token_expiration") or time.time() + LOGIN_TTL_SECS
+            self._login_expires_at = expires_at - _LOGIN_REFRESH_MARGIN_SECS
+            self._login_generation += 1
+            logger.debug(f"Logged in to {self.base_url}")
+
+    async def _request(self, method: str, url: str, **kwargs) -> aiohttp.ClientResponse:
+        generation = self._login_generation
+        if generation == 0 or time.time() >= self._login_expires_at:
+            await self._login(generation)
+            generation = self._login_generation
+        session = self._get_session()
+        response = await session.request(method, url, **kwargs)
+        if response.status == 401 and _replayable(kwargs):
+            response.release()
+            logger.info(f"LakeFS returned 401 for {method} {url}; logging in again")
+            await self._login(generation)
+            response = await session.request(method, url, **kwargs)
+        return response
+
+    def request(self, method: str, url: str, **kwargs) -> _Request:
+        return _Request(self._request(method, url, **kwargs))
+
+    def get(self, url: str, **kwargs) -> _Request:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> _Request:
+        return self.request('POST', url, **kwargs)
+
+    def with_timeout(self, timeout: aiohttp.ClientTimeout) -> "_TimeoutView":
+        """Same client, with `timeout` applied to requests that don't set one."""
+        return _TimeoutView(self, timeout)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+class _TimeoutView:
+    def __init__(self, client: LakeFSHttp, timeout: aiohttp.ClientTimeout):
+        self._client = client
+        self._timeout = timeout
+
+    def request(self, method: str, url: str, **kwargs) -> _Request:
+        kwargs.setdefault("timeout", self._timeout)
+        return self._client.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> _Request:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> _Request:
+        return self.request('POST', url, **kwargs)
+
+
+_client: Optional[LakeFSHttp] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_client() -> LakeFSHttp:
+    """The LakeFS client for the running event loop (created on first use)."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop or _client.closed:
+        _client = LakeFSHttp(config.lakefs_url, config.lakefs_access_key, config.lakefs_secret_key)
+        _client_loop = loop
+    return _client
+
+
+async def close_client() -> None:
+    """Close the pooled session; call before the event loop shuts down."""
+    global _client, _client_loop
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.close()
+    _client = _client_loop = None
@@ -1,10 +1,17 @@
 from typing import List, Dict, Optional, Union
+import asyncio
+import threading
+import time
+import weakref
 import httpx
 from pydantic import BaseModel, Field, PrivateAttr, field_validator, model_validator, ConfigDict
 import yaml
 import aiohttp
 from config import config
 from functools import reduce
+from log_util import LoggingUtil
+
+logger = LoggingUtil.init_logging(__name__)
 
 # Define a model for the nested "contact" information
 class Contact(BaseModel):
@@ -70,20 +77,42 @@ class KG(BaseModel):
 class KGConfig(BaseModel):
     kgs: List[KG]
     _by_key: Dict[str, KG] = PrivateAttr()
+    _by_shortname: Dict[str, KG] = PrivateAttr()
 
     @staticmethod
     async def from_git():
-        async with aiohttp.ClientSession() as session:
-            response = await session.get(config.kg_config_url)
-            kgs = yaml.safe_load(await response.text())
-            return KGConfig(**kgs)
+        """The registry, served from the process-wide cache while it is
+        younger than KG_CONFIG_TTL_SECS and revalidated with a conditional GET
+        after that. The returned object is shared; don't mutate it."""
+        if _registry.fresh():
+            return _registry.kg_config
+        async with _registry.async_lock():
+            if _registry.fresh():
+                return _registry.kg_config
+            timeout = aiohttp.ClientTimeout(total=config.kg_config_fetch_timeout_secs)
+            try:
+                async with aiohttp.ClientSession(timeout=timeout) as session:
+                    async with session.get(config.kg_config_url, headers=_registry.headers()) as response:
+                        text = await response.text() if response.status == 200 else None
+                        return _registry.update(response.status, response.headers, text)
+            except Exception as e:
+                return _registry.stale(e)
 
     @staticmethod
     def from_git_sync():
-        with httpx.Client() as session:
-            response  = session.get(config.kg_config_url)
-            kgs = yaml.safe_load(response.text)
-            return KGConfig(**kgs)
+        """Blocking variant of from_git(), sharing the same cache."""
+        if _registry.fresh():
+            return _registry.kg_config
+        with _registry.sync_lock:
+            if _registry.fresh():
+                return _registry.kg_config
+            try:
+                with httpx.Client(timeout=config.kg_config_fetch_timeout_secs) as session:
+                    response = session.get(config.kg_config_url, headers=_registry.headers())
+                    text = response.text if response.status_code == 200 else None
+                    return _registry.update(response.status_code, response.headers, text)
+            except Exception as e:
+                return _registry.stale(e)
 
 
     def __init__(self, **data):
@@ -94,6 +123,10 @@ class KGConfig(BaseModel):
             for kg in self.kgs
             if kg.frink_options and kg.frink_options.lakefs_repo
         }
+        self._by_shortname = {kg.shortname: kg for kg in self.kgs if kg.shortname}
+
+    def get_by_shortname(self, shortname: str) -> Optional[KG]:
+        return self._by_shortname.get(shortname)
 
     def get_by_repo(self, repo_id: str) -> Optional[KG]:
         kg = self._by_key.get(repo_id)
@@ -109,6 +142,71 @@ class KGConfig(BaseModel):
             )
         return kg
 
+class _RegistryCache:
+    """Last good kgs.yaml plus its validators (ETag / Last-Modified).
+
+    Shared by from_git() and from_git_sync(). When a revalidation fails
+    (GitHub slow or down, bad status, a registry push that doesn't parse) the
+    cached copy keeps being served until the next TTL; only a process that
+    never fetched the registry raises.
+    """
+
+    def __init__(self):
+        self.kg_config: Optional[KGConfig] = None
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.fetched_at = 0.0   # when the cached content was last confirmed current
+        self.checked_at = 0.0   # last revalidation attempt, successful or not
+        self.sync_lock = threading.Lock()
+        self._async_locks = weakref.WeakKeyDictionary()
+
+    def async_lock(self) -> asyncio.Lock:
+        # One lock per event loop so concurrent callers share one fetch.
+        loop = asyncio.get_running_loop()
+        lock = self._async_locks.get(loop)
+        if lock is None:
+            lock = self._async_locks[loop] = asyncio.Lock()
+        return lock
+
+    def fresh(self) -> bool:
+        return (self.kg_config is not None
+                and time.monotonic() - self.checked_at < config.kg_config_ttl_secs)
+
+    def headers(self) -> Dict[str, str]:
+        if self.kg_config is None:
+            return {}
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def update(self, status: int, headers, text: Optional[str]) -> KGConfig:
+        if status == 304 and self.kg_config is not None:
+            self.fetched_at = self.checked_at = time.monotonic()
+            return self.kg_config
+        if status != 200:
+            raise Exception(f"Error fetching KG registry {config.kg_config_url}: HTTP {status}")
+        self.kg_config = KGConfig(**yaml.safe_load(text))
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+        self.fetched_at = self.checked_at = time.monotonic()
+        return self.kg_config
+
+    def stale(self, error: Exception) -> KGConfig:
+        if self.kg_config is None:
+            raise error
+        # Don't make every caller wait out the fetch timeout during an outage.
+        self.checked_at = time.monotonic()
+        age = int(time.monotonic() - self.fetched_at)
+        logger.warning(f"Could not refresh KG registry ({type(error).__name__}: {error}); "
+                       f"using cached copy from {age}s ago")
+        return self.kg_config
+
+
+_registry = _RegistryCache()
+
 # Example usage:
 if __name__ == "__main__":
     # Your YAML content as a string
@@ -1,13 +1,20 @@
 from temporalio import activity
 from k8s.podman import JobMan
 from k8s import fuseki_server_manager, ldf_server_manager
-from lakefs_util.io_util import resolve_commit, download_file_from_latest_tag, download_files, upload_files, clean_up_files, resolve_future_tag, get_lakefs_prefix_size, download_hdt_files, get_latest_commit, get_latest_tag, download_file_at_ref, object_exists, get_object_size
+from k8s.executor import run_k8s
+from k8s import job_history
+from lakefs_util.io_util import resolve_commit, download_file_from_latest_tag, download_files, upload_files, clean_up_files, resolve_future_tag, get_lakefs_prefix_size, download_hdt_files, get_latest_commit, get_latest_tag, download_file_at_ref, object_exists, get_object_size, get_object_stat
+from lakefs_util.download_cache import DownloadCache
 from canary.slack import slack_canary
 from canary.mail import mail_canary
 from models.lakefs_models import LakefsMergeActionModel, LakefTagCreationModel
 from models.kg_metadata import KGConfig, KG
+from .input_filters import filter_command
+from .nt_formats import decompress_command, zst_sibling
+from . import sizing
 from config import config
 import asyncio
+import hashlib
 import os
 import re
 import threading
@@ -43,7 +50,8 @@ async def run_k8s_job(job_type: str, job_name: str, repo: str, branch: str,
     if "GH_TOKEN" not in env_vars and config.gh_token:
         env_vars["GH_TOKEN"] = config.gh_token
     job_man = JobMan()
-    job_man.run_job(
+    await run_k8s(
+        job_man.run_job,
         job_type=job_type,
         job_name=job_name,
         repo=repo,
@@ -63,44 +71,37 @@ async def run_k8s_job(job_type: str, job_name: str, repo: str, branch: str,
 
 @activity.defn
 async def watch_k8s_job_sync(job_name: str, poll_interval: int = 5) -> None:
-    """Poll a K8s Job until terminal. Heartbeats Temporal every poll so the
+    """Wait for a K8s Job to reach a terminal state. Heartbeats Temporal on
+    every status change and at least every `poll_interval` seconds so the
     activity can outlive worker restarts (paired with `heartbeat_timeout` on
     the workflow side) and won't be killed by start_to_close_timeout when the
     underlying Job legitimately runs for days.
 
-    The kubernetes client is sync; calls are offloaded with asyncio.to_thread
-    so the event loop stays responsive when multiple watchers run alongside
-    other activities (downloads, conversions) on the same worker.
+    Status comes from the worker-wide Job watch (k8s.job_watcher): one watch
+    stream for all jobs instead of a read_namespaced_job poll per job, and
+    completion is seen as soon as the API server reports it. Usage and exit
+    telemetry is recorded on the way (k8s.job_telemetry).
     """
-    from kubernetes import client as k8s_client
-    import asyncio as _asyncio
+    from k8s import job_telemetry
+    from k8s.job_watcher import get_job_watcher, job_finished
     logger.info(f"Watching K8s job: {job_name}")
     job_man = JobMan()
-    batch_v1 = k8s_client.BatchV1Api()
-    while True:
-        try:
-            job = await _asyncio.to_thread(
-                batch_v1.read_namespaced_job,
-                name=job_name,
-                namespace=job_man.namespace,
-            )
-        except k8s_client.exceptions.ApiException as e:
-            raise Exception(f"Failed to fetch Job '{job_name}': {e}, likely the job was never created.")
-        succeeded     = job.status.succeeded or 0
-        failed        = job.status.failed or 0
-        backoff_limit = job.spec.backoff_limit if job.spec.backoff_limit is not None else 6
+
+    def _heartbeat(job):
         activity.heartbeat({
             "job_name":  job_name,
-            "succeeded": succeeded,
-            "failed":    failed,
+            "succeeded": job.status.succeeded or 0,
+            "failed":    job.status.failed or 0,
         })
-        if succeeded > 0:
-            logger.info(f"Job '{job_name}' completed successfully.")
-            return
-        if failed > backoff_limit:
-            pod_info = await _asyncio.to_thread(job_man._get_pod_logs_for_job, job_name)
-            raise Exception(f"Job '{job_name}' failed after {failed} attempts.\n{pod_info}")
-        await _asyncio.sleep(poll_interval)
+
+    job = await job_telemetry.track(job_man.namespace, job_name, get_job_watcher(job_man.namespace).wait(
+        job_name, job_finished, on_update=_heartbeat, tick_secs=poll_interval
+    ))
+    if job.status.succeeded:
+        logger.info(f"Job '{job_name}' completed successfully.")
+        return
+    pod_info = await run_k8s(job_man._get_pod_logs_for_job, job_name)
+    raise Exception(f"Job '{job_name}' failed after {job.status.failed or 0} attempts.\n{pod_info}")
 
 
 @activity.defn
@@ -123,7 +124,8 @@ async def deploy_fuseki(kg_config: dict, lakefs_action: dict, cpu: str = None, m
         resources["limits"]["cpu"] = cpu
 
     logger.info(f"Deploying Fuseki for {kg_name}")
-    fuseki_server_manager.create_all(
+    await run_k8s(
+        fuseki_server_manager.create_all,
         parameters={"kg_name": kg_name},
         annotations=annotations,
         resources=resources
@@ -131,7 +133,8 @@ async def deploy_fuseki(kg_config: dict, lakefs_action: dict, cpu: str = None, m
 
     retries = 10
     # ensure wait_for_services is called appropriately (it sleeps/retries)
-    server_up = fuseki_server_manager.wait_for_services_to_be_running(
+    server_up = await run_k8s(
+        fuseki_server_manager.wait_for_services_to_be_running,
         parameters={"kg_name": kg_name},
         annotations=annotations,
         max_retries=retries
@@ -153,7 +156,8 @@ async def deploy_ldf(kg_config: dict, lakefs_action: dict) -> None:
     }
 
     logger.info(f"Deploying LDF for {kg_name}")
-    ldf_server_manager.create_all(
+    await run_k8s(
+        ldf_server_manager.create_all,
         parameters={
             "kg_name": kg_name,
             "host_name": config.frink_address,
@@ -228,7 +232,8 @@ async def deploy_qlever(kg_config: dict, lakefs_action: dict, cpu: str = "1", me
     # Example: if lakefs_url is https://frink-lakefs.apps.renci.org
     parameters['lakefs_url'] = config.lakefs_url
     
-    qlever_server_manager.create_all(
+    await run_k8s(
+        qlever_server_manager.create_all,
         parameters=parameters,
         annotations=annotations,
         resources=resources
@@ -236,7 +241,8 @@ async def deploy_qlever(kg_config: dict, lakefs_action: dict, cpu: str = "1", me
 
     retries = 10
     # ensure wait_for_services is called appropriately (it sleeps/retries)
-    server_up = qlever_server_manager.wait_for_services_to_be_running(
+    server_up = await run_k8s(
+        qlever_server_manager.wait_for_services_to_be_running,
         parameters=parameters,
         annotations=annotations,
         max_retries=retries
@@ -246,7 +252,7 @@ async def deploy_qlever(kg_config: dict, lakefs_action: dict, cpu: str = "1", me
         raise Exception(f"QLever deployment for {kg_name} failed check.")
         
     logger.info(f"QLever deployment verified healthy for {kg_name}. Pruning older deployments...")
-    qlever_server_manager.prune_old_deployments(kg_name=kg_name, keep_version=version)
+    await run_k8s(qlever_server_manager.prune_old_deployments, kg_name=kg_name, keep_version=version)
 
 @activity.defn
 async def notify_slack(message: str, channel: str = None) -> None:
@@ -265,13 +271,12 @@ async def notify_email_deployed(kg_name: str, version: str, recipient_email: str
 
 @activity.defn
 async def resolve_commit_details(repo: str, commit_id: str) -> dict:
-    # resolve_commit returns an object, we'll convert to dict for safety
-    commit_data = resolve_commit(repo, commit_id)
+    commit_data = await resolve_commit(repo, commit_id)
     return {
-        "committer": commit_data.committer,
-        "message": commit_data.message,
-        "id": commit_data.id,
-        "creation_date": commit_data.creation_date.isoformat() if commit_data.creation_date else None
+        "committer": commit_data.get("committer"),
+        "message": commit_data.get("message"),
+        "id": commit_data.get("id"),
+        "creation_date": commit_data.get("creation_date"),
     }
 
 @activity.defn
@@ -280,7 +285,8 @@ async def download_hdt_files_activity(repo: str, branch: str, kg_name: str, hdt_
     await download_hdt_files(repo, branch, kg_name, hdt_path)
 
 @activity.defn
-async def download_file_lakefs(repo: str, remote_path: str, local_path: str, ref: str = None) -> None:
+async def download_file_lakefs(repo: str, remote_path: str, local_path: str, ref: str = None,
+                               use_cache: bool = False) -> None:
     # Watchdog heartbeat on a real OS thread, NOT the asyncio loop. Under heavy
     # fan-out (many concurrent multi-part downloads stalled on a saturated
     # lakefs) the event loop itself starves, so an asyncio-based heartbeat never
@@ -298,7 +304,19 @@ async def download_file_lakefs(repo: str, remote_path: str, local_path: str, ref
 
     hb = threading.Thread(target=_watchdog, daemon=True)
     hb.start()
+    # Content-addressed cache (pinned refs only): an object whose LakeFS
+    # checksum is already cached is hard-linked into place, not downloaded.
+    cache = cache_key = None
+    if use_cache and ref:
+        cache = DownloadCache(app_config.qlever_source_cache_dir,
+                              app_config.qlever_source_cache_max_gib * 1024 ** 3)
     try:
+        if cache:
+            cache_key = DownloadCache.key_for(await get_object_stat(repo, ref, remote_path))
+            if cache_key and cache.link_into(cache_key, local_path):
+                logger.info(f"Cache hit for {repo}@{ref}:{remote_path} ({cache_key}); skipped download")
+                return
+            cache.detach(local_path)
         # this function in io_util is async
         if ref:
             await download_file_at_ref(repo, ref, remote_path, local_path)
@@ -339,6 +357,12 @@ async def download_file_lakefs(repo: str, remote_path: str, local_path: str, ref
                     f"only {allocated_bytes} of {expected} bytes written. "
                     f"One or more byte-range parts did not complete."
                 )
+    if cache and cache_key:
+        # Only adopt the file if the object did not move under a branch ref
+        # while we were downloading it.
+        if DownloadCache.key_for(await get_object_stat(repo, ref, remote_path)) == cache_key:
+            cache.add(cache_key, local_path)
+        cache.evict()
 
 
 @activity.defn
@@ -388,7 +412,8 @@ async def upload_output_files(repo: str, root_branch: str,
         local_files: List of [local_path, remote_dir] pairs
     
     Returns:
-        {stable_branch_name: str, future_tag: str}
+        {stable_branch_name: str, future_tag: str,
+         uploaded: [str], skipped: [str], bytes_skipped: int}
     """
     logger.info(f"Uploading {len(local_files)} files to {repo}@{root_branch}")
     # Convert list-of-lists back to list-of-tuples (JSON serialization)
@@ -398,7 +423,9 @@ async def upload_output_files(repo: str, root_branch: str,
         root_branch=root_branch,
         local_files=file_tuples
     )
-    logger.info(f"Uploaded to branch={result['stable_branch_name']}, tag={result['future_tag']}")
+    logger.info(f"Uploaded {len(result['uploaded'])} files to branch={result['stable_branch_name']}, "
+                f"tag={result['future_tag']}; skipped {len(result['skipped'])} unchanged "
+                f"({result['bytes_skipped']} bytes)")
     return result
 
 @activity.defn
@@ -436,21 +463,6 @@ S2_GRAPHS = [
     ("sudokn-geosparql.nt.gz",  "sudokn",     "https://purl.org/okn/frink/kg/sudokn#geosparql"),
 ]
 
-# Drops triples that declare a decimal value (e.g. "311119.0") as xsd:integer.
-# qlever's IndexBuilderMain refuses to parse these. The SUDOKN NAICS data has
-# them, and any KG that ingests SUDOKN nodes (e.g. secure-chain) inherits them.
-_DROP_DECIMAL_AS_INTEGER = r"""| grep -Ev '\.[0-9]+"\^\^<http://www\.w3\.org/2001/XMLSchema#integer>'"""
-
-# Per-shortname pipe suffix appended after `gunzip -c <file>` in the build command.
-# Required to match the reference qlever-index invocation.
-PER_REPO_INPUT_FILTERS = {
-    "spatialkg":          '| grep -v "<http://stko-kwg.geog.ucsb.edu/lod/ontology/cellID>"',
-    # "biobricks-aopwiki":  '| tail -n +28',
-    # "biobricks-mesh":     '| tail -n +28',
-    "sudokn":             _DROP_DECIMAL_AS_INTEGER,
-    "securechainkg":      _DROP_DECIMAL_AS_INTEGER,
-}
-
 # Overrides for where the source nt file lives in lakefs. Keys may be either
 # a kg shortname OR a lakefs repo name — the resolver checks both. Default
 # behavior (no override): remote_path="nt/graph.nt.gz", ref=latest semver tag.
@@ -460,8 +472,37 @@ PER_REPO_LAKEFS_OVERRIDES = {
 }
 
 
+def _qlever_stage_target(stage_dir: str, commit: str, pipe_filter: str) -> str:
+    """Staged output path, keyed by source commit plus the filter and format
+    applied, so a filter change invalidates it like a new commit does."""
+    fmt = app_config.qlever_stage_format
+    digest = hashlib.sha256(f"{fmt}\n{pipe_filter}".encode()).hexdigest()[:12]
+    return f"{stage_dir}/{commit}-{digest}.{'nt.zst' if fmt == 'zst' else 'nt'}"
+
+
+def _qlever_stage_command(source: str, target: str, pipe_filter: str) -> str:
+    """Shell for one staging Job: decompress (pigz / zstd when the image has
+    them) | input filter [| zstd], written to a temp name and renamed into place
+    so a half-written file is never taken for a cache hit."""
+    if app_config.qlever_stage_format == 'zst':
+        sink = '| zstd -q -T0 -f -o "$tmp"'
+    else:
+        sink = '> "$tmp"'
+    return (
+        f'set -euo pipefail; out={target}; tmp="$out.tmp"; mkdir -p "$(dirname "$out")"; '
+        f'{decompress_command(source)} {pipe_filter} {sink}; mv -f "$tmp" "$out"'
+    )
+
+
+def _qlever_staged_input(target: str) -> str:
+    if app_config.qlever_stage_format == 'zst':
+        return f'<(zstd -dc {target})'
+    return target
+
+
 @activity.defn
-async def prepare_qlever_job_specs(kg_refs: dict, s2_tag: str, only_kg: list = None) -> dict:
+async def prepare_qlever_job_specs(kg_refs: dict, s2_tag: str, only_kg: list = None,
+                                   s2_commit: str = None, stage: bool = False) -> dict:
     """Build the qlever IndexBuilderMain command + download manifest.
 
     Refs and tags are resolved by the workflow (resolve_qlever_refs) and
@@ -475,9 +516,14 @@ async def prepare_qlever_job_specs(kg_refs: dict, s2_tag: str, only_kg: list = N
                  Required (s2 graphs always participate).
         only_kg: optional subset of kg shortnames to keep (already applied in
                  kg_refs; passed in only to filter the s2 block).
+        s2_commit: commit behind s2_tag; keys the staged s2 files.
+        stage:   decompress + filter every source in a staging Job first
+                 (QLEVER_STAGE_SOURCES); the indexer then reads the staged
+                 files instead of gunzip/grep pipes.
 
     Returns:
-      - downloads:     [{repo, remote_path, local_path, ref}]
+      - downloads:     [{repo, remote_path, local_path, ref, use_cache}]
+      - stage_jobs:    [{source, target, command}] (empty unless `stage`)
       - build_command: shell string for IndexBuilderMain (writes to /index/)
       - stxxl_memory:  string for --stxxl-memory (already part of build_command)
     """
@@ -485,6 +531,7 @@ async def prepare_qlever_job_specs(kg_refs: dict, s2_tag: str, only_kg: list = N
 
     source_root  = app_config.qlever_source_path                  # /shared/qlever-source
     s2_local_dir = f"{source_root}/s2"
+    stage_root   = f"{source_root}/staged"
     index_dir    = "/index"                                       # mount of per-build output PVC
     stxxl_memory = app_config.qlever_indexer_stxxl_memory
     settings_path = "/qlever/frink-qlever.settings.json"          # configmap mount in qlever-index-job.yaml
@@ -502,15 +549,23 @@ async def prepare_qlever_job_specs(kg_refs: dict, s2_tag: str, only_kg: list = N
     })
 
     downloads = []
+    # (local source file, pipe filter, graph IRI, staging dir, commit)
+    inputs = []
     for repo, meta in kg_refs.items():
+        shortname = meta["shortname"]
+        file_path = f"{source_root}/{repo}/graph.nt.{'zst' if meta['remote_path'].endswith('.zst') else 'gz'}"
         downloads.append({
             "repo":        repo,
             "remote_path": meta["remote_path"],
-            "local_path":  f"{source_root}/{repo}/graph.nt.gz",
+            "local_path":  file_path,
             "ref":         meta["ref"],
+            "use_cache":   True,
         })
+        inputs.append((file_path, filter_command(shortname),
+                       f"https://purl.org/okn/frink/kg/{shortname}",
+                       f"{stage_root}/{repo}", meta.get("commit")))
 
-    for fname, base_shortname, _iri in S2_GRAPHS:
+    for fname, base_shortname, iri in S2_GRAPHS:
         if only_kg and base_shortname not in only_kg:
             continue
         downloads.append({
@@ -518,7 +573,10 @@ async def prepare_qlever_job_specs(kg_refs: dict, s2_tag: str, only_kg: list = N
             "remote_path": fname,
             "local_path":  f"{s2_local_dir}/{fname}",
             "ref":         s2_tag,
+            "use_cache":   True,
         })
+        inputs.append((f"{s2_local_dir}/{fname}", '', iri,
+                       f"{stage_root}/s2/{fname.removesuffix('.nt.gz')}", s2_commit))
 
     build_cmd_parts = [
         # Raise fd limit (-n) and process/thread limit (-u) before the build:
@@ -529,27 +587,26 @@ async def prepare_qlever_job_specs(kg_refs: dict, s2_tag: str, only_kg: list = N
         f'IndexBuilderMain -i frink -s {settings_path}'
     ]
 
-    for repo, meta in kg_refs.items():
-        shortname = meta["shortname"]
-        file_path = f'{source_root}/{repo}/graph.nt.gz'
-        pipe_filter = PER_REPO_INPUT_FILTERS.get(shortname, '')
-        gunzip_body = f'gunzip -c {file_path}'
-        if pipe_filter:
-            gunzip_body = f'{gunzip_body} {pipe_filter}'
-        build_cmd_parts.append(
-            f'-f <({gunzip_body}) -g https://purl.org/okn/frink/kg/{shortname} -F nt'
-        )
-
-    for fname, base_shortname, iri in S2_GRAPHS:
-        if only_kg and base_shortname not in only_kg:
+    stage_jobs = []
+    for file_path, pipe_filter, iri, stage_dir, commit in inputs:
+        if stage and commit:
+            target = _qlever_stage_target(stage_dir, commit, pipe_filter)
+            stage_jobs.append({
+                "source":  file_path,
+                "target":  target,
+                "command": _qlever_stage_command(file_path, target, pipe_filter),
+            })
+            build_cmd_parts.append(f'-f {_qlever_staged_input(target)} -g {iri} -F nt')
             continue
-        build_cmd_parts.append(
-            f'-f <(gunzip -c {s2_local_dir}/{fname}) -g {iri} -F nt'
-        )
+        source_stream = decompress_command(file_path)
+        if pipe_filter:
+            source_stream = f"{source_stream} {pipe_filter}"
+        build_cmd_parts.append(f'-f <({source_stream}) -g {iri} -F nt')
 
     build_cmd_parts.append(f'--stxxl-memory {stxxl_memory}')
     return {
         "downloads": downloads,
+        "stage_jobs": stage_jobs,
         "build_command": ' '.join(build_cmd_parts),
         "stxxl_memory": stxxl_memory,
         # Workflow feeds this to run_k8s_job as configmap_overrides so the
@@ -558,6 +615,112 @@ async def prepare_qlever_job_specs(kg_refs: dict, s2_tag: str, only_kg: list = N
         "configmap_overrides": {settings_path: settings_json},
     }
 
+
+@activity.defn
+async def plan_qlever_staging(stage_jobs: list) -> list:
+    """Return the stage jobs whose output is not on the shared volume yet.
+    Other staged files in the same per-source directories (older commits or
+    filters, leftovers of failed stage Jobs) are deleted."""
+    def _plan():
+        keep = {job["target"] for job in stage_jobs}
+        for stage_dir in {os.path.dirname(t) for t in keep}:
+            if not os.path.isdir(stage_dir):
+                continue
+            for name in os.listdir(stage_dir):
+                path = os.path.join(stage_dir, name)
+                if path not in keep:
+                    logger.info(f"Removing stale staged source {path}")
+                    os.remove(path)
+        return [job for job in stage_jobs if not os.path.exists(job["target"])]
+
+    pending = await asyncio.to_thread(_plan)
+    logger.info(f"{len(stage_jobs) - len(pending)} of {len(stage_jobs)} staged sources reused")
+    return pending
+
+@activity.defn
+async def plan_hdt_shards(files: list, working_dir: str, local_dir: str) -> list:
+    """Split HDT inputs into shards for parallel `hdtc create` pods.
+
+    Returns [] (single conversion) unless HDT_SHARD_SIZE_GIB is set and the
+    inputs add up to more than one shard. Otherwise the files are spread
+    over min(HDT_MAX_SHARDS, total / shard size) shards, largest first onto
+    the lightest shard. A single file is never split, so one huge input
+    still bounds its shard.
+
+    `files` are the pod paths under `working_dir`; sizes are read from the
+    worker's copy under `local_dir` (the same bytes LakeFS listed). Each
+    shard is {"files", "input_bytes"}, the latter its estimated uncompressed
+    load (sizing.input_bytes) so its pod can be sized on its own.
+    """
+    shard_bytes = app_config.hdt_shard_size_gib * 1024 ** 3
+    if not shard_bytes or len(files) < 2:
+        return []
+    sizes = {f: os.path.getsize(f.replace(working_dir, local_dir, 1)) for f in files}
+    total = sum(sizes.values())
+    count = min(app_config.hdt_max_shards, len(files), -(-total // shard_bytes))
+    if count < 2:
+        return []
+    shards = [{"files": [], "input_bytes": 0} for _ in range(count)]
+    loads = [0] * count
+    for f in sorted(files, key=lambda f: sizes[f], reverse=True):
+        i = loads.index(min(loads))
+        shards[i]["files"].append(f)
+        shards[i]["input_bytes"] += sizing.input_bytes(f, sizes[f])
+        loads[i] += sizes[f]
+    logger.info(f"Sharding {len(files)} files ({total / 1024 ** 3:.1f} GiB) into {count} HDT shards: "
+                f"{[round(b / 1024 ** 3, 1) for b in loads]} GiB")
+    return shards
+
+
+@activity.defn
+async def size_conversion_job(kind: str, repo: str, files: list, working_dir: str, local_dir: str) -> dict:
+    """Recommended resources for a `kind` job (see temporal_app.sizing) over
+    `files` (pod paths under `working_dir`, sized from the worker's copy
+    under `local_dir`), given the repo's run history. Adds `input_bytes`.
+    Sizes from the input alone if the history cannot be read."""
+    input_bytes = 0
+    for f in files:
+        try:
+            input_bytes += sizing.input_bytes(f, os.path.getsize(f.replace(working_dir, local_dir, 1)))
+        except OSError:
+            logger.warning(f"Cannot size input {f}; leaving it out of the estimate")
+    try:
+        history = await run_k8s(job_history.read_history, kind, repo)
+    except Exception as e:
+        logger.warning(f"Reading job history for {kind}/{repo} failed: {e}; sizing without it")
+        history = []
+    recommendation = sizing.recommend(kind, input_bytes, history)
+    logger.info(f"Sizing {kind} for {repo}: {input_bytes / 1024 ** 3:.1f} GiB input, "
+                f"{len(history)} past runs -> {recommendation}")
+    return {**recommendation, "input_bytes": input_bytes}
+
+
+@activity.defn
+async def record_conversion_run(kind: str, repo: str, input_bytes: int, cpu: int, pod_memory: str,
+                                started_at: str, finished_at: str, outcome: str) -> None:
+    """Append one run to the repo's job history (k8s.job_history), with the
+    peak memory its jobs reached when telemetry sampled one."""
+    from datetime import datetime
+    from k8s import job_telemetry
+    duration = datetime.fromisoformat(finished_at) - datetime.fromisoformat(started_at)
+    entry = {
+        "at": finished_at,
+        "input_bytes": input_bytes,
+        "cpu": cpu,
+        "memory_gib": round(_memory_str_to_mib(pod_memory) / 1024, 1),
+        "duration_secs": int(duration.total_seconds()),
+        "outcome": outcome,
+    }
+    try:
+        peak = await run_k8s(job_telemetry.peak_memory_gib, sizing.PROFILES[kind]["job_type"], repo, started_at)
+    except Exception as e:
+        logger.warning(f"Reading telemetry for {kind}/{repo} failed: {e}")
+        peak = None
+    if peak is not None:
+        entry["peak_memory_gib"] = peak
+    await run_k8s(job_history.append_history, kind, repo, entry)
+
+
 @activity.defn
 async def get_spider_config() -> dict:
     return {
@@ -586,6 +749,16 @@ async def create_local_file(file_path: str, content: str, append=False) -> None:
             f.write(content)
 
 
+@activity.defn
+async def delete_local_file(file_path: str) -> None:
+    """Delete a file on the worker, if present."""
+    logger.info(f"Deleting local file: {file_path}")
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
 @activity.defn
 async def get_qlever_index_files(qlever_location: str) -> list[list[str]]:
     """Get the generated Qlever index files from the local directory."""
@@ -660,6 +833,7 @@ def _ldf_sync_env() -> list[dict]:
         {"name": "PYTHONPATH", "value": "/apps/src"},
         {"name": "LOCAL_DATA_DIR", "value": "/tmp"},
         {"name": "K8S_NAMESPACE", "value": app_config.k8s_namespace},
+        {"name": "LDF_UPLOAD_GENERATED_INDEX", "value": str(app_config.ldf_upload_generated_index).lower()},
     ]
 
 
@@ -708,6 +882,9 @@ async def resolve_qlever_refs(only_kg: list = None) -> dict:
     from `kg_refs` and accumulated in `skipped` so the workflow can Slack-
     report them without failing the build.
 
+    KGs are resolved concurrently (QLEVER_REF_RESOLVE_CONCURRENCY); the
+    output keeps registry order.
+
     Returns:
       {
         "kg_refs":  {repo_id: {"shortname", "ref", "commit", "remote_path"}},
@@ -721,8 +898,8 @@ async def resolve_qlever_refs(only_kg: list = None) -> dict:
     skip_repos = {'semopenalex'}
     overrides = PER_REPO_LAKEFS_OVERRIDES
 
-    kg_refs: dict = {}
-    skipped: list = []
+    # (shortname, repo, pinned ref or None for latest tag, remote_path)
+    candidates = []
     for kg in kg_config.kgs:
         if not (kg.frink_options and kg.frink_options.lakefs_repo and kg.shortname):
             continue
@@ -734,40 +911,8 @@ async def resolve_qlever_refs(only_kg: list = None) -> dict:
         # Override lookup tries shortname first, then lakefs_repo. Lets the
         # dict be keyed however a future contributor finds clearest.
         override = overrides.get(kg.shortname) or overrides.get(repo) or {}
-        if "ref" in override:
-            ref = override["ref"]
-        else:
-            tag = await get_latest_tag(repo)
-            ref = tag if tag else "main"
-        remote_path = override.get("remote_path", "nt/graph.nt.gz")
-
-        # Pre-flight: skip (don't fail) if the source file is missing.
-        try:
-            exists = await object_exists(repo, ref, remote_path)
-        except Exception as e:
-            exists = False
-            reason = f"stat failed: {e}"
-        else:
-            reason = "object not found"
-
-        if not exists:
-            logger.warning(f"Skipping {kg.shortname} ({repo}@{ref}:{remote_path}) — {reason}")
-            skipped.append({
-                "repo":        repo,
-                "shortname":   kg.shortname,
-                "ref":         ref,
-                "remote_path": remote_path,
-                "reason":      reason,
-            })
-            continue
-
-        commit = await get_latest_commit(repo, ref)
-        kg_refs[repo] = {
-            "shortname":   kg.shortname,
-            "ref":         ref,
-            "commit":      commit,
-            "remote_path": remote_path,
-        }
+        candidates.append((kg.shortname, repo, override.get("ref"),
+                           override.get("remote_path", "nt/graph.nt.gz")))
 
     # Wikidata is not in okn-registry kgs.yaml with frink-options (entry has
     # no `frink-options` block), so the loop above drops it. Inject it
@@ -777,37 +922,76 @@ async def resolve_qlever_refs(only_kg: list = None) -> dict:
     wikidata_shortname = "wikidata"
     if not only_kg or wikidata_shortname in only_kg:
         wd_override = PER_REPO_LAKEFS_OVERRIDES.get(wikidata_shortname) or {}
-        wd_ref = wd_override.get("ref", "main")
-        wd_remote_path = wd_override.get("remote_path", "graph.nt.gz")
-        try:
-            wd_exists = await object_exists(wikidata_repo, wd_ref, wd_remote_path)
-        except Exception as e:
-            wd_exists = False
-            wd_reason = f"stat failed: {e}"
-        else:
-            wd_reason = "object not found"
-        if wd_exists:
-            wd_commit = await get_latest_commit(wikidata_repo, wd_ref)
-            kg_refs[wikidata_repo] = {
-                "shortname":   wikidata_shortname,
-                "ref":         wd_ref,
-                "commit":      wd_commit,
-                "remote_path": wd_remote_path,
-            }
+        candidates.append((wikidata_shortname, wikidata_repo, wd_override.get("ref", "main"),
+                           wd_override.get("remote_path", "graph.nt.gz")))
+
+    # Each KG is tag lookup -> stat -> commit lookup; KGs are independent,
+    # so resolve them concurrently (bounded) instead of one after another.
+    sem = asyncio.Semaphore(app_config.qlever_ref_resolve_concurrency)
+
+    async def _resolve(shortname, repo, ref, remote_path) -> tuple:
+        async with sem:
+            if ref is None:
+                tag = await get_latest_tag(repo)
+                ref = tag if tag else "main"
+
+            # Prefer a graph.nt.zst sibling (much faster to decompress) when
+            # the indexer image can read it.
+            sibling = zst_sibling(remote_path) if app_config.nt_read_zst else None
+            if sibling:
+                try:
+                    if await object_exists(repo, ref, sibling):
+                        remote_path = sibling
+                except Exception as e:
+                    logger.warning(f"Stat of {repo}@{ref}:{sibling} failed ({e}); using {remote_path}")
+
+            # Pre-flight: skip (don't fail) if the source file is missing.
+            try:
+                exists = await object_exists(repo, ref, remote_path)
+            except Exception as e:
+                exists = False
+                reason = f"stat failed: {e}"
+            else:
+                reason = "object not found"
+
+            if not exists:
+                logger.warning(f"Skipping {shortname} ({repo}@{ref}:{remote_path}) — {reason}")
+                return repo, None, {
+                    "repo":        repo,
+                    "shortname":   shortname,
+                    "ref":         ref,
+                    "remote_path": remote_path,
+                    "reason":      reason,
+                }
+
+            commit = await get_latest_commit(repo, ref)
+            return repo, {
+                "shortname":   shortname,
+                "ref":         ref,
+                "commit":      commit,
+                "remote_path": remote_path,
+            }, None
+
+    async def _resolve_s2() -> tuple:
+        async with sem:
+            tag = await get_latest_tag(S2_LAKEFS_REPO)
+            if not tag:
+                raise Exception(f"No tags on '{S2_LAKEFS_REPO}' repo; cannot pin s2 sources")
+            return tag, await get_latest_commit(S2_LAKEFS_REPO, tag)
+
+    *resolved, (s2_tag, s2_commit) = await asyncio.gather(
+        *[_resolve(*c) for c in candidates], _resolve_s2()
+    )
+
+    # Assemble in registry order so the build command stays deterministic.
+    kg_refs: dict = {}
+    skipped: list = []
+    for repo, entry, skip in resolved:
+        if entry:
+            kg_refs[repo] = entry
         else:
-            logger.warning(f"Skipping {wikidata_shortname} ({wikidata_repo}@{wd_ref}:{wd_remote_path}) — {wd_reason}")
-            skipped.append({
-                "repo":        wikidata_repo,
-                "shortname":   wikidata_shortname,
-                "ref":         wd_ref,
-                "remote_path": wd_remote_path,
-                "reason":      wd_reason,
-            })
+            skipped.append(skip)
 
-    s2_tag = await get_latest_tag(S2_LAKEFS_REPO)
-    if not s2_tag:
-        raise Exception(f"No tags on '{S2_LAKEFS_REPO}' repo; cannot pin s2 sources")
-    s2_commit = await get_latest_commit(S2_LAKEFS_REPO, s2_tag)
     return {
         "kg_refs":   kg_refs,
         "skipped":   skipped,
@@ -820,79 +1004,134 @@ async def resolve_qlever_refs(only_kg: list = None) -> dict:
 @activity.defn
 async def read_qlever_state() -> dict:
     from k8s import qlever_state
-    return qlever_state.read_state()
+    return await run_k8s(qlever_state.read_state)
 
 
 @activity.defn
 async def write_qlever_state(state: dict) -> None:
     from k8s import qlever_state
-    qlever_state.write_state(state)
+    await run_k8s(qlever_state.write_state, state)
 
 
 @activity.defn
 async def create_qlever_index_pvc(build_id: str, image: str) -> str:
     from k8s import qlever_pvc
-    return qlever_pvc.create_index_pvc(build_id, image)
+    return await run_k8s(qlever_pvc.create_index_pvc, build_id, image)
 
 
 @activity.defn
 async def gc_qlever_index_pvcs(state: dict, now_iso: str) -> dict:
     from k8s import qlever_pvc
-    return qlever_pvc.gc_index_pvcs(state, now_iso)
+    return await run_k8s(qlever_pvc.gc_index_pvcs, state, now_iso)
 
 
 @activity.defn
 async def read_ldf_state() -> dict:
-    return ldf_server_manager.read_state_configmap()
+    return await run_k8s(ldf_server_manager.read_state_configmap)
 
 
 @activity.defn
-async def write_ldf_state(commits: dict) -> None:
-    ldf_server_manager.apply_state_configmap(commits)
+async def write_ldf_state(commits: dict, data: dict = None) -> None:
+    await run_k8s(ldf_server_manager.apply_state_configmap, commits, data)
 
 
 @activity.defn
 async def ensure_ldf_pvc() -> None:
-    ldf_server_manager.apply_pvc()
+    await run_k8s(ldf_server_manager.apply_pvc)
 
 
 @activity.defn
-async def submit_ldf_sync_job(repo: str, ref: str, shortname: str, hdt_path: str = "hdt") -> str:
-    image = _ldf_sync_image()
+async def submit_ldf_sync_job(entries: list, concurrency: int = 4) -> str:
+    """One sync Job (one pod) for every {repo, ref, shortname, hdt_path}
+    in `entries`, `concurrency` KGs at a time."""
+    image = await run_k8s(_ldf_sync_image)
     env = _ldf_sync_env()
-    return ldf_server_manager.submit_sync_job(
-        repo=repo, ref=ref, shortname=shortname,
-        image=image, env_pairs=env, hdt_path=hdt_path,
+    return await run_k8s(
+        ldf_server_manager.submit_sync_job,
+        entries=entries, image=image, env_pairs=env, concurrency=concurrency,
     )
 
 
 @activity.defn
-async def wait_ldf_sync_job(job_name: str, timeout_seconds: int = 7200) -> bool:
-    # Run the blocking watch in a thread to avoid blocking the asyncio loop.
-    return await asyncio.to_thread(
-        ldf_server_manager.wait_for_job, job_name, timeout_seconds
+async def wait_ldf_sync_job(job_name: str, timeout_seconds: int = 7200) -> dict:
+    """Per-KG results of a sync Job, {"ok": [repo], "failed": {repo: error}}.
+    Raises only if the Job failed without reporting any."""
+    try:
+        await ldf_server_manager.async_wait_for_job(job_name, timeout_seconds)
+    except TimeoutError:
+        raise
+    except Exception:
+        results = await run_k8s(ldf_server_manager.read_sync_results, job_name)
+        if not results["ok"] and not results["failed"]:
+            raise
+        return results
+    return await run_k8s(ldf_server_manager.read_sync_results, job_name)
+
+
+@activity.defn
+async def submit_ldf_index_job(entries: list) -> str:
+    """One index Job generating the missing side indexes of `entries` (the
+    KGs a sync Job reported in needs_index), one after another."""
+    image = await run_k8s(_ldf_sync_image)
+    return await run_k8s(
+        ldf_server_manager.submit_index_job,
+        entries=entries, image=image, env_pairs=_ldf_sync_env(),
     )
 
 
 @activity.defn
-async def apply_ldf_config_and_rollout() -> str:
+async def wait_ldf_index_job(job_name: str, timeout_seconds: int = 7200) -> dict:
+    """{"indexed": [repo], "index_failed": [repo]} of an index Job. Raises
+    if the Job failed or timed out without reporting."""
+    no_report = {"indexed": [], "index_failed": []}
+    try:
+        await ldf_server_manager.async_wait_for_job(job_name, timeout_seconds)
+    except TimeoutError:
+        raise
+    except Exception:
+        results = await run_k8s(ldf_server_manager.read_sync_results, job_name, no_report)
+        if results == no_report:
+            raise
+        return results
+    return await run_k8s(ldf_server_manager.read_sync_results, job_name, no_report)
+
+
+@activity.defn
+async def apply_ldf_config_and_rollout() -> dict:
     """Renders the LDF config-map (datasource list) from current registry +
-    extras, applies it, and patches the deployment annotation to trigger a
-    rolling restart. Returns the new config hash."""
+    extras and applies it. The deployment is only patched when the datasource
+    config, the bytes of the synced HDT files (LDF state data.json) or the
+    rendered deployment itself changed; the first two roll its replicas.
+    Returns {config_hash, data_hash, rolled_out}."""
     kg_config = await KGConfig.from_git()
+    return await run_k8s(_apply_ldf_config_and_rollout, kg_config)
+
+
+def _apply_ldf_config_and_rollout(kg_config: KGConfig) -> dict:
     datasources = ldf_server_manager.build_datasources(kg_config)
     config_hash = ldf_server_manager.compute_config_hash(datasources)
+    data_hash = ldf_server_manager.compute_data_hash(ldf_server_manager.read_data_state())
+    spec_hash = ldf_server_manager.compute_spec_hash()
+    wanted = {"config_hash": config_hash, "data_hash": data_hash, "spec_hash": spec_hash}
+    rolled_out = ldf_server_manager.rollout_state() != wanted
     # Apply config-map
     ldf_server_manager.create_or_update_configmap_k8s({
         "kg_name": "all",
         "host_name": app_config.ldf_host_name,
         "kg_config": kg_config,
     })
-    # Apply / create deployment with current hash
-    ldf_server_manager.create_or_update_deployment({
-        "config_hash": config_hash,
-        "host_name": app_config.ldf_host_name,
-    })
+    # Apply / create deployment with current hashes. ldf-server loads its
+    # HDT datasources at startup, so a changed hash must roll the replicas;
+    # an unchanged one leaves them (and their warm mmaps) alone.
+    if rolled_out:
+        ldf_server_manager.create_or_update_deployment({
+            "config_hash": config_hash,
+            "data_hash": data_hash,
+            "spec_hash": spec_hash,
+            "host_name": app_config.ldf_host_name,
+        })
+    else:
+        logger.info(f"LDF config {config_hash}, data {data_hash} and spec {spec_hash} unchanged; no rollout")
     # Apply service if not present
     try:
         ldf_server_manager.create_or_update_service({})
@@ -905,9 +1144,7 @@ async def apply_ldf_config_and_rollout() -> str:
         ldf_server_manager.create_or_update_healthcheck(route_params)
     else:
         ldf_server_manager.create_or_update_ingress(route_params)
-    # Force a rolling restart by re-patching annotation (idempotent)
-    ldf_server_manager.rolling_restart(config_hash)
-    return config_hash
+    return {"config_hash": config_hash, "data_hash": data_hash, "rolled_out": rolled_out}
 
 
 # ── QLever federation server (/federation) ────────────────────────────────
@@ -927,7 +1164,7 @@ async def resolve_qlever_federation_build_id(use_previous: bool = False, build_i
     from kubernetes import client
     from kubernetes.client.rest import ApiException
 
-    state = qlever_state.read_state()
+    state = await run_k8s(qlever_state.read_state)
     if build_id:
         source = "explicit"
         chosen = build_id
@@ -944,7 +1181,8 @@ async def resolve_qlever_federation_build_id(use_previous: bool = False, build_i
     pvc_name = qlever_pvc.pvc_name(chosen)
     api = client.CoreV1Api()
     try:
-        api.read_namespaced_persistent_volume_claim(name=pvc_name, namespace=app_config.k8s_namespace)
+        await run_k8s(api.read_namespaced_persistent_volume_claim,
+                      name=pvc_name, namespace=app_config.k8s_namespace)
     except ApiException as e:
         if e.status == 404:
             raise RuntimeError(f"Build PVC {pvc_name} not found for build_id={chosen}.")
@@ -1001,13 +1239,15 @@ async def deploy_qlever_federation(build_id: str, pvc_name: str, image: str) ->
     }
 
     logger.info(f"Deploying federated qlever-server build_id={build_id} pvc={pvc_name}")
-    qlever_federation_server_manager.create_all(
+    await run_k8s(
+        qlever_federation_server_manager.create_all,
         parameters=parameters,
         annotations=annotations,
         resources=resources,
     )
 
-    server_up = qlever_federation_server_manager.wait_for_services_to_be_running(
+    server_up = await run_k8s(
+        qlever_federation_server_manager.wait_for_services_to_be_running,
         parameters=parameters,
         annotations=annotations,
         max_retries=12,
@@ -0,0 +1,133 @@
+"""Per-KG N-Triples input filters for QLever index builds.
+
+One declarative registry shared by the federated build
+(prepare_qlever_job_specs) and the per-KG build
+(HDTConversionWorkflow._run_qlever_index). Each KG's rules are compiled into
+a single pipe stage: all drop rules become one alternation, so every triple
+goes through one regex automaton instead of one `grep` per rule. Rewrites,
+if any, fold into the same `sed` pass. Filters run under LC_ALL=C; the
+patterns are ASCII, and byte matching is several times faster than UTF-8.
+
+Benchmark the cost per filter on synthetic N-Triples with:
+
+    python -m temporal_app.input_filters --lines 2000000
+"""
+import shlex
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+@dataclass(frozen=True)
+class Rule:
+    """`drop`: remove lines matching `pattern` (POSIX ERE).
+    `rewrite`: `s/pattern/replacement/g` on every line."""
+    kind: str
+    pattern: str
+    replacement: str = ""
+
+
+def literal(text: str) -> str:
+    """ERE matching `text` verbatim."""
+    return ''.join('\\' + c if c in '.[]()*+?{}|^$\\' else c for c in text)
+
+
+def drop(pattern: str) -> Rule:
+    return Rule("drop", pattern)
+
+
+def rewrite(pattern: str, replacement: str) -> Rule:
+    return Rule("rewrite", pattern, replacement)
+
+
+# Drops triples that declare a decimal value (e.g. "311119.0") as xsd:integer.
+# qlever's IndexBuilderMain refuses to parse these. The SUDOKN NAICS data has
+# them, and any KG that ingests SUDOKN nodes (e.g. secure-chain) inherits them.
+DROP_DECIMAL_AS_INTEGER = drop(r'\.[0-9]+"\^\^<http://www\.w3\.org/2001/XMLSchema#integer>')
+
+# Keyed by KG shortname.
+INPUT_FILTERS: Dict[str, List[Rule]] = {
+    "spatialkg":     [drop(literal("<http://stko-kwg.geog.ucsb.edu/lod/ontology/cellID>"))],
+    "sudokn":        [DROP_DECIMAL_AS_INTEGER],
+    "securechainkg": [DROP_DECIMAL_AS_INTEGER],
+}
+
+
+def compile_rules(rules: List[Rule]) -> str:
+    """Single pipe stage (`| ...`) applying `rules`, or '' if there are none."""
+    if not rules:
+        return ''
+    drops = '|'.join(f'({r.pattern})' for r in rules if r.kind == "drop")
+    rewrites = [r for r in rules if r.kind == "rewrite"]
+    if not rewrites:
+        return f'| LC_ALL=C grep -Ev {shlex.quote(drops)}'
+    slash = lambda text: text.replace('/', r'\/')
+    script = [f'/{slash(drops)}/d'] if drops else []
+    script += [f's/{slash(r.pattern)}/{slash(r.replacement)}/g' for r in rewrites]
+    return '| LC_ALL=C sed -E ' + ' '.join(f'-e {shlex.quote(s)}' for s in script)
+
+
+def filter_command(shortname: str) -> str:
+    """Pipe stage to append after `gunzip -c <file>` for `shortname`."""
+    return compile_rules(INPUT_FILTERS.get(shortname, []))
+
+
+def _synthetic_ntriples(path: str, lines: int) -> None:
+    """Write `lines` triples shaped like registry KGs: IRIs, strings,
+    integers, plus a sprinkle of what the rules above drop."""
+    import random
+    rnd = random.Random(0)
+    objects = [
+        lambda i: f'<https://example.org/node/{rnd.randrange(10**9)}>',
+        lambda i: f'"label {i} with some text"@en',
+        lambda i: f'"{rnd.randrange(10**6)}"^^<http://www.w3.org/2001/XMLSchema#integer>',
+        lambda i: f'"{rnd.random():.6f}"^^<http://www.w3.org/2001/XMLSchema#decimal>',
+    ]
+    with open(path, 'w') as f:
+        for i in range(lines):
+            subject = f'<https://example.org/node/{i}>'
+            roll = rnd.random()
+            if roll < 0.01:
+                f.write(f'{subject} <http://stko-kwg.geog.ucsb.edu/lod/ontology/cellID> "{i}" .\n')
+            elif roll < 0.011:
+                f.write(f'{subject} <https://example.org/naics> "{i}.0"^^<http://www.w3.org/2001/XMLSchema#integer> .\n')
+            else:
+                f.write(f'{subject} <https://example.org/p{i % 50}> {rnd.choice(objects)(i)} .\n')
+
+
+def _throughput(path: str, stage: str) -> float:
+    """MB/s of `cat path <stage> > /dev/null`."""
+    import os
+    import subprocess
+    import time
+    started = time.perf_counter()
+    # grep exits 1 when it selects nothing; only >1 is an error.
+    result = subprocess.run(['bash', '-c', f'cat {shlex.quote(path)} {stage} > /dev/null'])
+    elapsed = time.perf_counter() - started
+    if result.returncode > 1:
+        raise Exception(f"filter failed ({result.returncode}): {stage}")
+    return os.path.getsize(path) / elapsed / 1e6
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Throughput of the QLever input filters.")
+    parser.add_argument('--lines', type=int, default=2_000_000, help="synthetic triples to generate")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per filter (best is reported)")
+    options = parser.parse_args()
+
+    all_drops = [r for rules in INPUT_FILTERS.values() for r in rules if r.kind == "drop"]
+    cases = {"baseline (no filter)": ''}
+    cases.update({f"kg {name}": filter_command(name) for name in INPUT_FILTERS})
+    cases["all rules, one combined pass"] = compile_rules(all_drops)
+    cases["all rules, chained greps"] = ' '.join(compile_rules([r]) for r in all_drops)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'synthetic.nt')
+        _synthetic_ntriples(path, options.lines)
+        print(f"{options.lines} triples, {os.path.getsize(path) / 1e6:.0f} MB")
+        for name, stage in cases.items():
+            best = max(_throughput(path, stage) for _ in range(options.repeat))
+            print(f"{name:<32} {best:8.0f} MB/s")
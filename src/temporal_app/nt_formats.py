@@ -0,0 +1,41 @@
+"""Shell snippets for writing and reading N-Triples artifacts.
+
+graph.nt.gz stays the canonical artifact every consumer can read. It is
+written with pigz when the job image has it (gzip-compatible output, all
+cores) and read with `pigz -dc` (inflate on its own thread, read / write /
+checksum on others) or gunzip. An optional graph.nt.zst sibling
+(NT_WRITE_ZST) decompresses several times faster than any gzip; consumers
+running with NT_READ_ZST prefer it when it exists.
+
+All snippets are POSIX sh; the hdtc image has no bash.
+"""
+from typing import Optional
+
+GZIP = '$(command -v pigz >/dev/null 2>&1 && echo pigz || echo gzip)'
+GUNZIP = '$(command -v pigz >/dev/null 2>&1 && echo "pigz -dc" || echo "gunzip -c")'
+
+
+def zst_sibling(path: str) -> Optional[str]:
+    """`x.nt.gz` -> `x.nt.zst`; None for anything that is not gzip."""
+    return path[:-len('.gz')] + '.zst' if path.endswith('.gz') else None
+
+
+def decompress_command(path: str) -> str:
+    """Command writing the decompressed contents of `path` to stdout."""
+    if path.endswith('.zst'):
+        return f'zstd -dc {path}'
+    return f'{GUNZIP} {path}'
+
+
+def compress_command(source: str, gz_path: str, zst_path: str = None) -> str:
+    """Pipe the output of `source` into `gz_path`, and into `zst_path` as
+    well (via a FIFO, in the same pass) when given."""
+    if not zst_path:
+        return f'{source} | {GZIP} > {gz_path}'
+    fifo = f'{zst_path}.fifo'
+    return (
+        f'set -e; rm -f {fifo}; mkfifo {fifo}; '
+        f'zstd -q -T0 -f -o {zst_path} < {fifo} & zpid=$!; '
+        f'{source} | tee {fifo} | {GZIP} > {gz_path}; '
+        f'wait $zpid; rm -f {fifo}'
+    )
@@ -0,0 +1,96 @@
+"""Resource sizing for conversion jobs from input size and run history.
+
+`recommend()` picks pod memory / cpu, JVM heap and the hdtc
+`--memory-limit` (also used as --stxxl-memory by the per-KG QLever step)
+for one run:
+
+  * anchor on the most recent successful run of the same repo, scaled
+    linearly by input bytes (its peak memory plus headroom when telemetry
+    recorded one, else the memory it was given);
+  * without history, SIZING_BASE_MEMORY_GIB + input GiB x the kind's ratio,
+    and no less than the kind's `first_run_min_gib` (the fixed size it had
+    before sizing);
+  * never less than double the memory of any run since the last success
+    that OOMed with at most as much input, so an OOM is not repeated with
+    the same numbers;
+  * clamped to [SIZING_MIN_MEMORY_GIB, SIZING_MAX_MEMORY_GIB].
+
+Input bytes are the uncompressed size: `input_bytes()` scales .gz / .zst
+files by a typical compression ratio.
+
+Pure functions; the activities read history (k8s.job_history) and record
+outcomes around the workflows.
+"""
+import math
+from typing import Dict, List
+
+from config import config as app_config
+
+GIB = 1024 ** 3
+
+# Memory per GiB of input when there is no history, the floor of that
+# estimate, the share of the pod given to the JVM heap, and the job type
+# whose telemetry (k8s.job_telemetry) gives the run's peak memory.
+PROFILES = {
+    "hdt":       {"gib_per_input_gib": 1.0, "first_run_min_gib": 0, "heap_fraction": 0.85,
+                  "job_type": "hdtc-job"},
+    "neo4j-rdf": {"gib_per_input_gib": 2.0, "first_run_min_gib": 20, "heap_fraction": 0.80,
+                  "job_type": "neo4j-rdf-job"},
+}
+PEAK_HEADROOM = 1.3
+# Rough uncompressed / compressed ratios of RDF and JSON dumps.
+COMPRESSION_RATIOS = {".gz": 8, ".zst": 10, ".bz2": 10}
+JAVA_FLAGS = "-Xss512m -XX:+UseParallelGC"
+
+
+def _memory_gib(kind: str, input_bytes: int, history: List[Dict]) -> int:
+    profile = PROFILES[kind]
+    input_gib = input_bytes / GIB
+    need = max(app_config.sizing_base_memory_gib + input_gib * profile["gib_per_input_gib"],
+               profile["first_run_min_gib"])
+
+    successes = [h for h in history if h.get("outcome") == "succeeded" and h.get("input_bytes")]
+    if successes:
+        last = successes[-1]
+        scale = max(input_bytes / last["input_bytes"], 0.5)
+        if last.get("peak_memory_gib"):
+            need = last["peak_memory_gib"] * PEAK_HEADROOM * scale
+        else:
+            need = last["memory_gib"] * scale
+
+    # Only OOMs since the last success: that success already shows how much
+    # memory is enough, and older OOMs would keep doubling a settled size.
+    last_success = max((i for i, h in enumerate(history) if h.get("outcome") == "succeeded"), default=-1)
+    for h in history[last_success + 1:]:
+        if h.get("outcome") == "oom" and h.get("input_bytes", 0) <= input_bytes:
+            need = max(need, h["memory_gib"] * 2)
+
+    return int(min(max(math.ceil(need), app_config.sizing_min_memory_gib), app_config.sizing_max_memory_gib))
+
+
+def input_bytes(path: str, size: int) -> int:
+    """Estimated uncompressed size of a `size`-byte input file."""
+    for suffix, ratio in COMPRESSION_RATIOS.items():
+        if path.endswith(suffix):
+            return size * ratio
+    return size
+
+
+def recommend(kind: str, input_bytes: int, history: List[Dict]) -> Dict:
+    """{cpu, memory_gib, pod_memory, heap, java_opts, program_memory}"""
+    memory_gib = _memory_gib(kind, input_bytes, history)
+    heap = max(1, int(memory_gib * PROFILES[kind]["heap_fraction"]))
+    cpu = min(app_config.sizing_max_cpu, 3 + int(input_bytes / GIB) // 50)
+    return {
+        "cpu": cpu,
+        "memory_gib": memory_gib,
+        "pod_memory": f"{memory_gib}Gi",
+        "heap": f"{heap}G",
+        "java_opts": f"-Xmx{heap}G -Xms{heap}G {JAVA_FLAGS}",
+        "program_memory": f"{heap}G",
+    }
+
+
+def is_oom(failure_text: str) -> bool:
+    """Whether a job failure (pod status + logs) was an out-of-memory kill."""
+    return "OOMKilled" in failure_text or "java.lang.OutOfMemoryError" in failure_text
@@ -20,9 +20,14 @@ from .activities import (
     cleanup_local_files,
     send_review_email,
     prepare_qlever_job_specs,
+    plan_qlever_staging,
+    plan_hdt_shards,
+    size_conversion_job,
+    record_conversion_run,
     get_spider_config,
     create_local_dir,
     create_local_file,
+    delete_local_file,
     get_qlever_index_files,
     get_future_tag,
     get_qlever_storage_size,
@@ -41,6 +46,8 @@ from .activities import (
     ensure_ldf_pvc,
     submit_ldf_sync_job,
     wait_ldf_sync_job,
+    submit_ldf_index_job,
+    wait_ldf_index_job,
     apply_ldf_config_and_rollout,
     resolve_qlever_federation_build_id,
     deploy_qlever_federation,
@@ -101,9 +108,14 @@ async def main():
             cleanup_local_files,
             send_review_email,
             prepare_qlever_job_specs,
+            plan_qlever_staging,
+            plan_hdt_shards,
+            size_conversion_job,
+            record_conversion_run,
             get_spider_config,
             create_local_dir,
             create_local_file,
+            delete_local_file,
             get_qlever_index_files,
             get_future_tag,
             get_qlever_storage_size,
@@ -122,6 +134,8 @@ async def main():
             ensure_ldf_pvc,
             submit_ldf_sync_job,
             wait_ldf_sync_job,
+            submit_ldf_index_job,
+            wait_ldf_index_job,
             apply_ldf_config_and_rollout,
             resolve_qlever_federation_build_id,
             deploy_qlever_federation,
@@ -1,3 +1,4 @@
+import asyncio
 from temporalio import workflow
 from datetime import timedelta
 from dataclasses import dataclass
@@ -12,12 +13,19 @@ with workflow.unsafe.imports_passed_through():
         send_review_email,
         create_local_dir,
         create_local_file,
+        delete_local_file,
         get_qlever_index_files,
         notify_slack,
         get_future_tag,
+        plan_hdt_shards,
+        size_conversion_job,
+        record_conversion_run,
         KG,
         app_config
     )
+    from ..input_filters import filter_command
+    from ..nt_formats import compress_command, decompress_command
+    from ..sizing import is_oom, recommend
 
 # Default timeouts
 ACTIVITY_TIMEOUT = timedelta(minutes=60*2) # 2 hours
@@ -26,11 +34,22 @@ LONG_RUNNING_JOB_TIMEOUT = timedelta(hours=42)
 # Fail immediately on first error, no retries
 from temporalio.common import RetryPolicy
 NO_RETRY = RetryPolicy(maximum_attempts=1)
+# Bookkeeping (sizing, run history) that must not fail a conversion
+LIGHT_RETRY = RetryPolicy(maximum_attempts=3)
 
 # Skip output directories from previous runs to avoid re-merging them
 OUTPUT_PREFIXES = ['qlever/', 'hdt/', 'nt/', 'void/']
 
 
+def _failure_text(e: BaseException) -> str:
+    """Messages of an activity failure and its causes (pod status + logs)."""
+    parts = []
+    while e is not None:
+        parts.append(str(e))
+        e = e.__cause__
+    return "\n".join(parts)
+
+
 @dataclass
 class HDTConversionInput:
     action_payload: dict
@@ -45,6 +64,10 @@ class HDTConversionInput:
     exclude_files: list | None = None
     exclude_known_extension: list | None = None
     files_list: list | None = None
+    stage_parallelism: int | None = None
+    # Replace cpu / pod_memory / java_opts / program_memory with the sizing
+    # engine's recommendation (temporal_app.sizing).
+    auto_size: bool = False
 
 
 @workflow.defn
@@ -72,11 +95,6 @@ class HDTConversionWorkflow:
         self.kg_title = self.kg_config.shortname
         workflow.logger.info(f"Starting HDTConversionWorkflow for {self.kg_title}")
 
-        # Resources + env reused by every K8s job in this run.
-        self.resources = {
-            "requests": {"cpu": str(input.cpu), "memory": input.pod_memory, "ephemeral-storage": input.ephemeral},
-            "limits": {"cpu": str(input.cpu), "memory": input.pod_memory, "ephemeral-storage": input.ephemeral},
-        }
         self.env_base = {
             "GH_HANDLES": ",".join(self.kg_config.github_handles),
             "WORKING_DIR": self.working_dir,
@@ -85,21 +103,43 @@ class HDTConversionWorkflow:
             "KG_NAME": self.kg_title,
         }
         self.dataset_uri = f"https://purl.org/okn/frink/kg/{self.kg_title}"
+        self.stream_nt = app_config.hdt_stream_nt
+        self.nt_gz = f"{self.working_dir}/nt/graph.nt.gz"
+        self.nt_zst = f"{self.working_dir}/nt/graph.nt.zst" if app_config.nt_write_zst else None
 
         # 2. Download input files (skipped if files_list already provided)
         file_list = await self._download_inputs(input.files_list, input.exclude_files, input.exclude_known_extension)
 
-        # 3. Run HDT and NT conversion jobs
-        await self._run_hdt_convert(file_list)
-        await self._run_nt_merge()
-        await self._run_riot_validate()
+        # 2b. Size the run from its input bytes and the repo's past runs,
+        # when the caller asked for no specific resources.
+        self.sizing = None
+        if input.auto_size:
+            self.sizing = await workflow.execute_activity(
+                size_conversion_job,
+                args=["hdt", self.repo_id, file_list, self.working_dir, self.local_dir],
+                start_to_close_timeout=timedelta(minutes=5),
+                retry_policy=LIGHT_RETRY,
+            )
+            input.cpu = self.sizing["cpu"]
+            input.pod_memory = self.sizing["pod_memory"]
+            input.java_opts = self.sizing["java_opts"]
+            input.program_memory = self.sizing["program_memory"]
 
-        # 4. VOID job and build-version TTL
-        await self._run_void()
-        await self._write_build_version()
+        # Resources reused by every K8s job in this run.
+        self.resources = {
+            "requests": {"cpu": str(input.cpu), "memory": input.pod_memory, "ephemeral-storage": input.ephemeral},
+            "limits": {"cpu": str(input.cpu), "memory": input.pod_memory, "ephemeral-storage": input.ephemeral},
+        }
 
-        # 5. QLever index job
-        await self._run_qlever_index()
+        # 3. HDT conversion, then the jobs that derive from it (3a-3d)
+        started_at = workflow.now().isoformat()
+        try:
+            await self._run_hdt_convert(file_list)
+            await self._run_derived_stages()
+        except Exception as e:
+            await self._record_run(started_at, "oom" if is_oom(_failure_text(e)) else "failed")
+            raise
+        await self._record_run(started_at, "succeeded")
 
         # 6. Documentation job
         # await self._run_documentation(self.input.doc_path)
@@ -113,8 +153,76 @@ class HDTConversionWorkflow:
         # 9. Cleanup local files
         await self._cleanup()
 
+    async def _record_run(self, started_at: str, outcome: str) -> None:
+        """Add this run to the sizing history (auto-sized runs only). Best
+        effort: a failed write is logged, never fails the conversion."""
+        if not self.sizing:
+            return
+        try:
+            await workflow.execute_activity(
+                record_conversion_run,
+                args=["hdt", self.repo_id, self.sizing["input_bytes"], self.input.cpu, self.input.pod_memory,
+                      started_at, workflow.now().isoformat(), outcome],
+                start_to_close_timeout=timedelta(minutes=5),
+                retry_policy=LIGHT_RETRY,
+            )
+        except Exception as e:
+            workflow.logger.warning(f"Recording the run of {self.repo_id} failed: {e}")
+
+    async def _run_derived_stages(self) -> None:
+        """Run the post-conversion jobs as a dependency DAG:
+
+            graph.hdt ─┬─ 3a nt dump ──┬─ 3c riot validate
+                       │               │
+                       └─ 3b void ─────┴─ 3d qlever index (needs nt + void.nt
+                          + build version)
+
+        With HDT_STREAM_NT the dump is written uncompressed; qlever indexes
+        it directly while a 3a' job gzips it (riot validates the .gz), and
+        the plain file is deleted after both.
+
+        At most `stage_parallelism` (HDT_STAGE_PARALLELISM) of these jobs
+        run at once; 1 restores the old sequential order.
+        """
+        slots = asyncio.Semaphore(max(1, self.input.stage_parallelism or app_config.hdt_stage_parallelism))
+
+        async def stage(run):
+            async with slots:
+                await run()
+
+        async def void_and_version():
+            await stage(self._run_void)
+            await self._write_build_version()
+
+        nt_merge = asyncio.ensure_future(stage(self._run_nt_merge))
+        void = asyncio.ensure_future(void_and_version())
+
+        async def nt_compress():
+            await nt_merge
+            if self.stream_nt:
+                await stage(self._run_nt_compress)
+
+        nt_gz = asyncio.ensure_future(nt_compress())
+
+        async def riot_validate():
+            await nt_gz
+            await stage(self._run_riot_validate)
+
+        async def qlever_index():
+            await asyncio.gather(nt_merge, void)
+            await stage(self._run_qlever_index)
+
+        await asyncio.gather(nt_merge, void, nt_gz, riot_validate(), qlever_index())
+        if self.stream_nt:
+            await workflow.execute_activity(
+                delete_local_file,
+                args=[f"{self.local_dir}/nt/graph.nt"],
+                start_to_close_timeout=timedelta(minutes=10),
+                retry_policy=NO_RETRY,
+            )
+
     async def _run_job_and_wait(self, *, job_type, job_name, command, args,
-                                env_vars, watch_timeout, resources=None) -> None:
+                                env_vars, watch_timeout, resources=None, image=None) -> None:
         """
         Submit a K8s Job and block until it reaches a terminal state.
 
@@ -125,7 +233,7 @@ class HDTConversionWorkflow:
         await workflow.execute_activity(
             run_k8s_job,
             args=[job_type, job_name, self.repo_id, self.branch_id,
-                  command, args, resources or self.resources, env_vars],
+                  command, args, resources or self.resources, env_vars, None, image],
             start_to_close_timeout=timedelta(minutes=10),
             retry_policy=NO_RETRY,
         )
@@ -159,17 +267,6 @@ class HDTConversionWorkflow:
         return [self.working_dir + '/' + x for x in files_list]
 
     async def _run_hdt_convert(self, file_list) -> None:
-        hdt_convert_args = ['create'] + file_list + [
-            '--temp-dir',
-            self.working_dir + '/hdt-tmp/',
-            '--index',
-            '--memory-limit',
-            self.input.program_memory,
-            '-v',
-            '--output',
-            self.working_dir + '/hdt/graph.hdt',
-        ]
-
         await workflow.execute_activity(
             create_local_dir,
             args=[self.local_dir + '/hdt'],
@@ -183,18 +280,95 @@ class HDTConversionWorkflow:
             retry_policy=NO_RETRY,
         )
 
+        shards = await workflow.execute_activity(
+            plan_hdt_shards,
+            args=[file_list, self.working_dir, self.local_dir],
+            start_to_close_timeout=timedelta(minutes=5),
+            retry_policy=NO_RETRY,
+        )
+        if shards:
+            await self._run_sharded_hdt_convert(shards)
+            return
+
         await self._run_job_and_wait(
             job_type="hdtc-job",
             job_name=self.job_name,
             command=None,
-            args=hdt_convert_args,
+            args=self._hdtc_create_args(file_list, self.working_dir + '/hdt-tmp/',
+                                        self.working_dir + '/hdt/graph.hdt', index=True),
             env_vars={**self.env_base, "JAVA_OPTIONS": self.input.java_opts, "MEM_SIZE": self.input.program_memory},
             watch_timeout=LONG_RUNNING_JOB_TIMEOUT,
         )
 
+    def _hdtc_create_args(self, files, temp_dir, output, index, memory_limit=None) -> list:
+        return ['create'] + files + [
+            '--temp-dir',
+            temp_dir,
+        ] + (['--index'] if index else []) + [
+            '--memory-limit',
+            memory_limit or self.input.program_memory,
+            '-v',
+            '--output',
+            output,
+        ]
+
+    async def _run_sharded_hdt_convert(self, shards) -> None:
+        """One `hdtc create` pod per shard, sized from that shard's input
+        (sizing.recommend), then one job with the run's full resources that
+        cats the shard HDTs into graph.hdt and builds its index."""
+        shard_dir = self.working_dir + '/hdt/shards'
+        await workflow.execute_activity(
+            create_local_dir,
+            args=[self.local_dir + '/hdt/shards'],
+            start_to_close_timeout=timedelta(minutes=1),
+            retry_policy=NO_RETRY,
+        )
+        shard_outputs = [f"{shard_dir}/shard-{i}.hdt" for i in range(len(shards))]
+        jobs = []
+        for i, shard in enumerate(shards):
+            size = recommend("hdt", shard["input_bytes"], [])
+            workflow.logger.info(f"HDT shard {i}: {shard['input_bytes'] / 1024 ** 3:.1f} GiB input -> "
+                                 f"{size['cpu']} cpu, {size['pod_memory']}")
+            resources = {
+                "requests": {"cpu": str(size["cpu"]), "memory": size["pod_memory"],
+                             "ephemeral-storage": self.input.ephemeral},
+                "limits": {"cpu": str(size["cpu"]), "memory": size["pod_memory"],
+                           "ephemeral-storage": self.input.ephemeral},
+            }
+            jobs.append(self._run_job_and_wait(
+                job_type="hdtc-job",
+                job_name=f"{self.job_name}-s{i}",
+                command=None,
+                args=self._hdtc_create_args(shard["files"], f"{self.working_dir}/hdt-tmp/shard-{i}/",
+                                            shard_outputs[i], index=False,
+                                            memory_limit=size["program_memory"]),
+                env_vars={**self.env_base, "JAVA_OPTIONS": size["java_opts"],
+                          "MEM_SIZE": size["program_memory"]},
+                watch_timeout=LONG_RUNNING_JOB_TIMEOUT,
+                resources=resources,
+            ))
+        await asyncio.gather(*jobs)
+
+        merge_cmd = (app_config.hdt_merge_command
+                     .replace('{inputs}', ' '.join(shard_outputs))
+                     .replace('{output}', f"{self.working_dir}/hdt/graph.hdt"))
+        await self._run_job_and_wait(
+            job_type="nt-merge-job",
+            job_name=f"{self.job_name}-hdt-merge",
+            command=["/bin/sh"],
+            args=["-c", f"set -e; {merge_cmd}; rm -rf {shard_dir}"],
+            env_vars={**self.env_base, "JAVA_OPTIONS": self.input.java_opts},
+            watch_timeout=LONG_RUNNING_JOB_TIMEOUT,
+            image=app_config.hdt_merge_image or None,
+        )
+
     async def _run_nt_merge(self) -> None:
         nt_job_name = f"{self.job_name}-nt"
-        nt_convert_args = ["-c", f"hdtc dump {self.working_dir}/hdt/graph.hdt | gzip > {self.working_dir}/nt/graph.nt.gz"]
+        dump = f"hdtc dump {self.working_dir}/hdt/graph.hdt"
+        if self.stream_nt:
+            nt_convert_args = ["-c", f"{dump} > {self.working_dir}/nt/graph.nt"]
+        else:
+            nt_convert_args = ["-c", compress_command(dump, self.nt_gz, self.nt_zst)]
         await self._run_job_and_wait(
             job_type="hdtc-job",
             job_name=nt_job_name,
@@ -204,6 +378,16 @@ class HDTConversionWorkflow:
             watch_timeout=LONG_RUNNING_JOB_TIMEOUT,
         )
 
+    async def _run_nt_compress(self) -> None:
+        await self._run_job_and_wait(
+            job_type="hdtc-job",
+            job_name=f"{self.job_name}-nt-gz",
+            command=["/bin/sh"],
+            args=["-c", compress_command(f"cat {self.working_dir}/nt/graph.nt", self.nt_gz, self.nt_zst)],
+            env_vars=dict(self.env_base),
+            watch_timeout=LONG_RUNNING_JOB_TIMEOUT,
+        )
+
     async def _run_riot_validate(self) -> None:
         riot_job_name = f"{self.job_name}-riot-validate"
         await self._run_job_and_wait(
@@ -262,11 +446,13 @@ class HDTConversionWorkflow:
         )
 
     async def _run_qlever_index(self) -> None:
-        unzip_stream = f"-f <(gunzip -c {self.working_dir}/nt/graph.nt.gz) "
-        if self.repo_id == "secure-chain-kg":
-            unzip_stream = f"-f <(gunzip -c {self.working_dir}/nt/graph.nt.gz | grep -v hasNAICSCodeValue) "
-        if self.repo_id == "spatial-kg":
-            unzip_stream = f"-f <(gunzip -c {self.working_dir}/nt/graph.nt.gz | grep -v '<http://stko-kwg.geog.ucsb.edu/lod/ontology/cellID>') "
+        input_filter = filter_command(self.kg_title)
+        if self.stream_nt:
+            plain = f"{self.working_dir}/nt/graph.nt"
+            unzip_stream = f"-f <(cat {plain} {input_filter}) " if input_filter else f"-f {plain} "
+        else:
+            source = self.nt_zst if self.nt_zst and app_config.nt_read_zst else self.nt_gz
+            unzip_stream = f"-f <({decompress_command(source)} {input_filter}) "
 
         qlever_job_name = f"{self.job_name}-qlever"
         qlever_cmd = (
@@ -321,6 +507,8 @@ class HDTConversionWorkflow:
             [f"{nt_location}/graph.nt.gz", "nt"],
             [f"{hdt_location}/void.nt", "void"]
         ]
+        if self.nt_zst:
+            local_files.append([f"{nt_location}/graph.nt.zst", "nt"])
 
         qlever_files = await workflow.execute_activity(
             get_qlever_index_files,
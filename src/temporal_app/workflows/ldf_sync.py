@@ -1,3 +1,6 @@
+import asyncio
+import math
+
 from temporalio import workflow
 from datetime import timedelta
 
@@ -10,13 +13,20 @@ with workflow.unsafe.imports_passed_through():
         ensure_ldf_pvc,
         submit_ldf_sync_job,
         wait_ldf_sync_job,
+        submit_ldf_index_job,
+        wait_ldf_index_job,
         apply_ldf_config_and_rollout,
+        app_config,
     )
 
 from temporalio.common import RetryPolicy
 
 NO_RETRY = RetryPolicy(maximum_attempts=1)
 LIGHT_RETRY = RetryPolicy(maximum_attempts=3)
+# KGs per sync Job at most: a KG adds up to ~220 bytes (63-char repo name in
+# ok, data and needs_index) to the Job's results, which must fit the
+# 4096-byte termination message (k8s.jobs.ldf_sync_kg.write_results).
+MAX_SYNC_BATCH = 16
 
 
 @workflow.defn
@@ -26,16 +36,29 @@ class LDFSyncWorkflow:
 
     Per-KG:
       1. resolve_kg_ref → pick latest tag (fallback main), get commit id.
+         Done for every KG up front, in parallel.
       2. Compare commit id to state ConfigMap.
-      3. If changed: submit a k8s Job that pulls HDT into the PVC.
-      4. Update state ConfigMap with new commit id (only after Job success).
+      3. If changed: submit a k8s Job that pulls HDT into the PVC. Changed
+         KGs are batched LDF_SYNC_BATCH_SIZE to a Job. At most `concurrency`
+         (LDF_SYNC_CONCURRENCY) KGs download at once in total: each pod
+         pulls LDF_SYNC_POD_CONCURRENCY of them, and as many Jobs run as
+         that window holds.
+      4. Update state ConfigMap with new commit id (only for the KGs the Job
+         reports synced), as each Job finishes. A Job that fails, times out
+         or is evicted before reporting fails its batch as a whole: all its
+         KGs count as failed and are retried by the next sync (which skips
+         files already on the PVC, see download_hdt_files_to_dir).
+      5. For the synced KGs the Job reports as having no side index in
+         LakeFS, run an index Job (LDF_INDEX_IMAGE) that builds them. Its
+         outcome only sets each KG's "index" field; the sync stands.
 
     After all KGs are processed, render LDF datasource ConfigMap (registry +
-    extras) and patch the deployment annotation to trigger a rolling update.
+    extras) and, if the datasources or any synced HDT changed, patch the
+    deployment annotations to trigger a rolling update.
     """
 
     @workflow.run
-    async def run(self, only_repo: str = None) -> dict:
+    async def run(self, only_repo: str = None, concurrency: int = None) -> dict:
         # 0. Ensure PVC exists
         await workflow.execute_activity(
             ensure_ldf_pvc,
@@ -65,58 +88,122 @@ class LDFSyncWorkflow:
         skipped = []
         failed = []
 
-        for kg in kgs:
+        # 3. Resolve every KG's ref at once
+        refs = await asyncio.gather(*[
+            workflow.execute_activity(
+                resolve_kg_ref,
+                args=[kg["repo"]],
+                start_to_close_timeout=timedelta(minutes=2),
+                retry_policy=LIGHT_RETRY,
+            )
+            for kg in kgs
+        ], return_exceptions=True)
+
+        # 4. Sync the changed ones, LDF_SYNC_BATCH_SIZE KGs per Job (one pod
+        # syncing `pod_concurrency` of them at a time), the window of KGs
+        # downloading at once split into pods. State is written for each KG
+        # its Job reports synced, so partial progress survives a worker
+        # crash; the lock keeps those whole-map writes in order.
+        window = max(1, concurrency or app_config.ldf_sync_concurrency)
+        pod_concurrency = max(1, min(app_config.ldf_sync_pod_concurrency, window))
+        slots = asyncio.Semaphore(max(1, window // pod_concurrency))
+        index_slots = asyncio.Semaphore(max(1, window // pod_concurrency))
+        state_lock = asyncio.Lock()
+
+        async def index(done, entries):
+            """Build the side indexes of `done` KGs; sets their "index"."""
+            timeout_secs = app_config.ldf_index_timeout_secs * len(entries)
+            async with index_slots:
+                try:
+                    job_name = await workflow.execute_activity(
+                        submit_ldf_index_job,
+                        args=[entries],
+                        start_to_close_timeout=timedelta(minutes=2),
+                        retry_policy=NO_RETRY,
+                    )
+                    results = await workflow.execute_activity(
+                        wait_ldf_index_job,
+                        args=[job_name, timeout_secs],
+                        start_to_close_timeout=timedelta(seconds=timeout_secs, minutes=10),
+                        retry_policy=NO_RETRY,
+                    )
+                except Exception as e:
+                    workflow.logger.warning(f"Index Job for {[d['repo'] for d in done]} failed: {e}")
+                    results = {"indexed": []}
+            for d in done:
+                d["index"] = "generated" if d["repo"] in results["indexed"] else "failed"
+
+        async def sync(batch):
+            entries = [
+                {"repo": kg["repo"], "ref": ref_info["ref"], "shortname": kg["shortname"],
+                 "hdt_path": kg.get("hdt_path", "hdt")}
+                for kg, ref_info in batch
+            ]
+            # Each KG still gets the 2h a single-KG Job had.
+            timeout_secs = 7200 * math.ceil(len(entries) / pod_concurrency)
+            async with slots:
+                try:
+                    job_name = await workflow.execute_activity(
+                        submit_ldf_sync_job,
+                        args=[entries, pod_concurrency],
+                        start_to_close_timeout=timedelta(minutes=2),
+                        retry_policy=NO_RETRY,
+                    )
+                    results = await workflow.execute_activity(
+                        wait_ldf_sync_job,
+                        args=[job_name, timeout_secs],
+                        start_to_close_timeout=timedelta(seconds=timeout_secs, minutes=10),
+                        retry_policy=NO_RETRY,
+                    )
+                except Exception as e:
+                    failed.extend({"repo": kg["repo"], "stage": "sync", "error": str(e)} for kg, _ in batch)
+                    return
+            done = []
+            for kg, ref_info in batch:
+                repo = kg["repo"]
+                if repo in results["ok"]:
+                    done.append({"repo": repo, "ref": ref_info["ref"], "commit": ref_info["commit"], "job": job_name,
+                                 "data": results.get("data", {}).get(repo)})
+                else:
+                    error = results["failed"].get(repo, f"{job_name} reported no result")
+                    failed.append({"repo": repo, "stage": "sync", "error": error})
+            if not done:
+                return
+            async with state_lock:
+                state.update({d["repo"]: d["commit"] for d in done})
+                try:
+                    await workflow.execute_activity(
+                        write_ldf_state,
+                        args=[state, {d["repo"]: d["data"] for d in done if d["data"]}],
+                        start_to_close_timeout=timedelta(minutes=1),
+                        retry_policy=LIGHT_RETRY,
+                    )
+                except Exception as e:
+                    failed.extend({"repo": d["repo"], "stage": "sync", "error": str(e)} for d in done)
+                    return
+            synced.extend(done)
+
+            needs_index = set(results.get("needs_index", []))
+            if needs_index and app_config.ldf_index_image:
+                await index([d for d in done if d["repo"] in needs_index],
+                            [e for e in entries if e["repo"] in needs_index])
+
+        changed = []
+        for kg, ref_info in zip(kgs, refs):
             repo = kg["repo"]
-            shortname = kg["shortname"]
-            hdt_path = kg.get("hdt_path", "hdt")
-
-            try:
-                ref_info = await workflow.execute_activity(
-                    resolve_kg_ref,
-                    args=[repo],
-                    start_to_close_timeout=timedelta(minutes=2),
-                    retry_policy=LIGHT_RETRY,
-                )
-            except Exception as e:
-                failed.append({"repo": repo, "stage": "resolve_ref", "error": str(e)})
-                continue
-
-            commit = ref_info["commit"]
-            ref = ref_info["ref"]
-            prior = state.get(repo)
-            if prior == commit:
-                skipped.append({"repo": repo, "commit": commit, "ref": ref})
-                continue
-
-            try:
-                job_name = await workflow.execute_activity(
-                    submit_ldf_sync_job,
-                    args=[repo, ref, shortname, hdt_path],
-                    start_to_close_timeout=timedelta(minutes=2),
-                    retry_policy=NO_RETRY,
-                )
-                await workflow.execute_activity(
-                    wait_ldf_sync_job,
-                    args=[job_name, 7200],
-                    start_to_close_timeout=timedelta(hours=2, minutes=10),
-                    retry_policy=NO_RETRY,
-                )
-                state[repo] = commit
-                synced.append({"repo": repo, "ref": ref, "commit": commit, "job": job_name})
-                # Persist state after each KG so partial progress survives a worker crash.
-                await workflow.execute_activity(
-                    write_ldf_state,
-                    args=[state],
-                    start_to_close_timeout=timedelta(minutes=1),
-                    retry_policy=LIGHT_RETRY,
-                )
-            except Exception as e:
-                failed.append({"repo": repo, "stage": "sync", "error": str(e)})
-                continue
-
-        # 3. Render config + rolling restart (always, so newly registered KGs
-        # appear in the datasource list even when no HDT changed).
-        config_hash = await workflow.execute_activity(
+            if isinstance(ref_info, BaseException):
+                failed.append({"repo": repo, "stage": "resolve_ref", "error": str(ref_info)})
+            elif state.get(repo) == ref_info["commit"]:
+                skipped.append({"repo": repo, "commit": ref_info["commit"], "ref": ref_info["ref"]})
+            else:
+                changed.append((kg, ref_info))
+        batch_size = min(max(1, app_config.ldf_sync_batch_size), MAX_SYNC_BATCH)
+        await asyncio.gather(*[sync(changed[i:i + batch_size]) for i in range(0, len(changed), batch_size)])
+
+        # 5. Render config (always, so newly registered KGs appear in the
+        # datasource list even when no HDT changed); the replicas are rolled
+        # only if the config or any synced HDT changed.
+        rollout = await workflow.execute_activity(
             apply_ldf_config_and_rollout,
             start_to_close_timeout=timedelta(minutes=5),
             retry_policy=LIGHT_RETRY,
@@ -126,5 +213,6 @@ class LDFSyncWorkflow:
             "synced": synced,
             "skipped": skipped,
             "failed": failed,
-            "config_hash": config_hash,
+            "config_hash": rollout["config_hash"],
+            "rolled_out": rollout["rolled_out"],
         }
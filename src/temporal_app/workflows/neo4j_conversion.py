@@ -8,16 +8,21 @@ with workflow.unsafe.imports_passed_through():
         get_kg_config_from_git,
         download_input_files,
         notify_slack,
+        size_conversion_job,
+        record_conversion_run,
         KG,
         app_config
     )
-    from .hdt_conversion import HDTConversionWorkflow, HDTConversionInput
+    from .hdt_conversion import HDTConversionWorkflow, HDTConversionInput, _failure_text
+    from ..sizing import is_oom
 
 # Default timeouts
 LONG_RUNNING_JOB_TIMEOUT = timedelta(hours=42)
 
 from temporalio.common import RetryPolicy
 NO_RETRY = RetryPolicy(maximum_attempts=1)
+# Bookkeeping (sizing, run history) that must not fail a conversion
+LIGHT_RETRY = RetryPolicy(maximum_attempts=3)
 
 @workflow.defn
 class Neo4jConversionWorkflow:
@@ -47,6 +52,7 @@ class Neo4jConversionWorkflow:
         json_job_name = f"{job_name_base}-to-json"
         rdf_job_name = f"{job_name_base}-to-rdf"
         working_dir = f"/mnt/repo/{repo_id}/{branch_id}"
+        local_dir = f"/{app_config.local_data_dir.lstrip('/').rstrip('/')}/{repo_id}/{branch_id}"
 
         # 2. Download dump files from LakeFS
         dump_files_list = await workflow.execute_activity(
@@ -102,28 +108,57 @@ class Neo4jConversionWorkflow:
 
         neo4j_export_json_location = f"{working_dir.rstrip('/')}/{source_files.lstrip('/')}"
 
-        # 5. Run RDF conversion
-        await workflow.execute_activity(
-            run_k8s_job,
-             args=[
-                "neo4j-rdf-job",
-                rdf_job_name,
-                repo_id,
-                branch_id,
-                None,
-                ["-i", neo4j_export_json_location, "-c", rdf_mapping_config, "-w", working_dir],
-                {"limits": {"cpu": 3, "memory": "20Gi"}},
-                {"JAVA_OPTIONS": "-Xmx20G -XX:+UseParallelGC", "WORKING_DIR": working_dir}
-            ],
-            start_to_close_timeout=timedelta(minutes=10),
-            retry_policy=NO_RETRY
-        )
-        await workflow.execute_activity(
-            watch_k8s_job_sync,
-            args=[rdf_job_name],
-            start_to_close_timeout=LONG_RUNNING_JOB_TIMEOUT,
-            retry_policy=NO_RETRY
-        )
+        # 5. Run RDF conversion, sized from the JSON export and past runs
+        # (fixed resources when SIZING_ENABLED is off)
+        if app_config.sizing_enabled:
+            sizing = await workflow.execute_activity(
+                size_conversion_job,
+                args=["neo4j-rdf", repo_id, [neo4j_export_json_location], working_dir, local_dir],
+                start_to_close_timeout=timedelta(minutes=5),
+                retry_policy=LIGHT_RETRY
+            )
+        else:
+            sizing = {"cpu": 3, "pod_memory": "20Gi", "java_opts": "-Xmx20G -XX:+UseParallelGC"}
+        started_at = workflow.now().isoformat()
+        outcome = "succeeded"
+        try:
+            await workflow.execute_activity(
+                run_k8s_job,
+                 args=[
+                    "neo4j-rdf-job",
+                    rdf_job_name,
+                    repo_id,
+                    branch_id,
+                    None,
+                    ["-i", neo4j_export_json_location, "-c", rdf_mapping_config, "-w", working_dir],
+                    {"limits": {"cpu": sizing["cpu"], "memory": sizing["pod_memory"]}},
+                    {"JAVA_OPTIONS": sizing["java_opts"], "WORKING_DIR": working_dir}
+                ],
+                start_to_close_timeout=timedelta(minutes=10),
+                retry_policy=NO_RETRY
+            )
+            await workflow.execute_activity(
+                watch_k8s_job_sync,
+                args=[rdf_job_name],
+                start_to_close_timeout=LONG_RUNNING_JOB_TIMEOUT,
+                retry_policy=NO_RETRY
+            )
+        except Exception as e:
+            outcome = "oom" if is_oom(_failure_text(e)) else "failed"
+            raise
+        finally:
+            # Best effort: a failed history write must not fail the conversion.
+            try:
+                if "input_bytes" in sizing:
+                    await workflow.execute_activity(
+                        record_conversion_run,
+                        args=["neo4j-rdf", repo_id, sizing["input_bytes"], sizing["cpu"], sizing["pod_memory"],
+                              started_at, workflow.now().isoformat(), outcome],
+                        start_to_close_timeout=timedelta(minutes=5),
+                        retry_policy=LIGHT_RETRY
+                    )
+            except Exception as e:
+                workflow.logger.warning(f"Recording the run of {repo_id} failed: {e}")
 
         # 6. Notify Neo4j conversion complete
         await workflow.execute_activity(
@@ -136,7 +171,6 @@ class Neo4jConversionWorkflow:
         # 7. Chain into HDT conversion as a child workflow
         # Pass the .nt file list directly — HDT workflow will skip download
         # and use these local files for conversion.
-        local_dir = f"/{app_config.local_data_dir.lstrip('/').rstrip('/')}/{repo_id}/{branch_id}"
         nt_files = [f"{local_dir}/nt/graph.nt.gz"]
 
         await workflow.execute_child_workflow(
@@ -152,6 +186,7 @@ class Neo4jConversionWorkflow:
                 convert_to_hdt=True,
                 hdt_path="/",
                 files_list=nt_files,  # triggers skip of download
+                auto_size=app_config.sizing_enabled,
             ),
             id=f"hdt-{job_name_base}",
             retry_policy=NO_RETRY
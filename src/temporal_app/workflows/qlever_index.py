@@ -2,15 +2,26 @@
 
 Phase 0: GC stale per-build PVCs (orphans + previous past 24h TTL).
 Phase 1: resolve refs+commits for every source repo (KGs + s2-builds).
-Phase 2: short-circuit if no source commit has changed since the serving build.
+Phase 2: short-circuit if no source commit has changed since the serving build;
+         otherwise report which sources changed.
 Phase 3: allocate a new per-build RWO premium-ssd output PVC.
-Phase 4: download all source files to /shared/qlever-source (pinned to refs).
+Phase 4: download all source files to /shared/qlever-source (pinned to refs;
+         objects whose LakeFS checksum is already cached are hard-linked).
+Phase 4b (QLEVER_STAGE_SOURCES): stage each source (parallel decompress +
+         input filters) in its own Job, cached on the shared PVC per commit.
 Phase 5: submit the IndexBuilderMain Job (writes to the new output PVC).
 Phase 6: watch the Job (heartbeated, multi-day safe).
 Phase 7: write new state (serving=new, previous=old_serving, previous_marked_at=now).
 
 The workflow does not perform server rollover; that is the responsibility of a
 downstream workflow that consumes `state.build_id_serving`.
+
+Every build is a full rebuild over all sources. Keeping per-KG index
+intermediates (partial vocabularies, sorted batches) to re-parse only the
+changed KGs is not supported: IndexBuilderMain writes them as temporary files
+of one run, with ids that only hold after that run's global vocabulary merge.
+The Phase 2 change report shows what triggered each rebuild; it does not make
+the build incremental.
 """
 import asyncio
 from datetime import timedelta
@@ -23,6 +34,7 @@ with workflow.unsafe.imports_passed_through():
         watch_k8s_job_sync,
         download_file_lakefs,
         prepare_qlever_job_specs,
+        plan_qlever_staging,
         resolve_qlever_refs,
         read_qlever_state,
         write_qlever_state,
@@ -44,16 +56,18 @@ DOWNLOAD_TIMEOUT    = timedelta(hours=24)
 DOWNLOAD_HEARTBEAT  = timedelta(minutes=10)
 # Submitting the indexer Job returns immediately; the wait is in the watcher.
 JOB_SUBMIT_TIMEOUT  = timedelta(minutes=10)
+# Staging decompresses + re-compresses one source; wikidata takes hours.
+STAGE_WATCH_TIMEOUT = timedelta(hours=24)
 # Multi-day federated index build; watch activity heartbeats so worker bounces
 # do not lose progress.
 BUILD_WATCH_TIMEOUT = timedelta(days=7)
 HEARTBEAT_TIMEOUT   = timedelta(minutes=5)
 
 NO_RETRY = RetryPolicy(maximum_attempts=1)
-# Downloads are now resumable-on-retry only in the sense that the activity
-# re-runs from scratch; per-part retries inside the activity handle transient
-# transport errors. Limit Temporal-level retries so a truly bad object does
-# not loop forever.
+# Per-part retries inside the activity handle transient transport errors.
+# A Temporal-level retry resumes from the `.parts.json` sidecar that
+# download_file checkpoints next to the target, so only missing byte ranges
+# are re-fetched. Limit retries so a truly bad object does not loop forever.
 DOWNLOAD_RETRY = RetryPolicy(
     maximum_attempts=4,
     initial_interval=timedelta(seconds=30),
@@ -157,6 +171,30 @@ class QLeverIndexWorkflow:
             )
             return {"status": "skipped", "build_id_serving": state["build_id_serving"]}
 
+        # Change report only: QLever cannot merge a new graph into an
+        # existing index, so any change still means a full IndexBuilderMain
+        # run over every source. Only the downloads (checksum-keyed cache)
+        # and staged sources (keyed by commit) are reused per source.
+        previous_commits = state.get("source_commits") or {}
+        changed_sources = sorted(
+            repo for repo, commit in current_commits.items()
+            if previous_commits.get(repo) != commit
+        )
+        removed_sources = sorted(previous_commits.keys() - current_commits.keys())
+        await workflow.execute_activity(
+            notify_slack,
+            args=[
+                f"ℹ️ QLever federated index build {build_id}: "
+                f"{len(changed_sources)} of {len(current_commits)} sources changed"
+                + (f" ({', '.join(changed_sources)})" if changed_sources else "")
+                + (f", {len(removed_sources)} removed ({', '.join(removed_sources)})"
+                   if removed_sources else "")
+                + ".",
+            ],
+            start_to_close_timeout=QUICK_TIMEOUT,
+            retry_policy=NO_RETRY,
+        )
+
         # ── Phase 3: allocate output PVC ──────────────────────────────────
         pvc_name = await workflow.execute_activity(
             create_qlever_index_pvc,
@@ -168,7 +206,8 @@ class QLeverIndexWorkflow:
         # ── Phase 4: downloads ────────────────────────────────────────────
         specs = await workflow.execute_activity(
             prepare_qlever_job_specs,
-            args=[refs["kg_refs"], refs["s2_tag"], only_kg],
+            args=[refs["kg_refs"], refs["s2_tag"], only_kg, refs["s2_commit"],
+                  app_config.qlever_stage_sources],
             start_to_close_timeout=QUICK_TIMEOUT,
             retry_policy=NO_RETRY,
         )
@@ -181,7 +220,8 @@ class QLeverIndexWorkflow:
             async with download_sem:
                 return await workflow.execute_activity(
                     download_file_lakefs,
-                    args=[dl["repo"], dl["remote_path"], dl["local_path"], dl.get("ref")],
+                    args=[dl["repo"], dl["remote_path"], dl["local_path"], dl.get("ref"),
+                          dl.get("use_cache", False)],
                     start_to_close_timeout=DOWNLOAD_TIMEOUT,
                     heartbeat_timeout=DOWNLOAD_HEARTBEAT,
                     retry_policy=DOWNLOAD_RETRY,
@@ -190,6 +230,10 @@ class QLeverIndexWorkflow:
         if specs["downloads"]:
             await asyncio.gather(*[bounded_download(dl) for dl in specs["downloads"]])
 
+        # ── Phase 4b: staging (optional) ──────────────────────────────────
+        if specs.get("stage_jobs"):
+            await self._stage_sources(build_id, specs["stage_jobs"])
+
         # ── Phase 5: submit indexer Job ───────────────────────────────────
         job_name = f"qlever-index-{build_id}"
         await workflow.execute_activity(
@@ -298,4 +342,66 @@ class QLeverIndexWorkflow:
             "pvc":              pvc_name,
             "gc_report":        gc_report,
             "previous_build":   old_serving,
+            "changed_sources":  changed_sources,
         }
+
+    async def _stage_sources(self, build_id: str, stage_jobs: list) -> None:
+        """Run one staging Job per source whose staged file for this commit
+        is missing, QLEVER_STAGE_CONCURRENCY at a time. Cheap CPU work
+        (gunzip + grep) that used to run inside the indexer pod."""
+        pending = await workflow.execute_activity(
+            plan_qlever_staging,
+            args=[stage_jobs],
+            start_to_close_timeout=QUICK_TIMEOUT,
+            retry_policy=NO_RETRY,
+        )
+        stage_sem = asyncio.Semaphore(app_config.qlever_stage_concurrency)
+
+        async def bounded_stage(i, stage):
+            job_name = f"qlever-stage-{build_id}-{i}"
+            async with stage_sem:
+                await workflow.execute_activity(
+                    run_k8s_job,
+                    args=[
+                        "qlever-stage-job",                      # job_type
+                        job_name,                                # job_name
+                        "",                                      # repo
+                        "",                                      # branch
+                        ["bash"],                                # command
+                        ["-c", stage["command"]],                # args
+                        {                                        # resources
+                            "requests": {"cpu": app_config.qlever_stage_cpu,
+                                         "memory": app_config.qlever_stage_memory},
+                            "limits":   {"cpu": app_config.qlever_stage_cpu,
+                                         "memory": app_config.qlever_stage_memory},
+                        },
+                        None,                                    # env_vars
+                        None,                                    # additional_volume_mounts
+                        app_config.qlever_stage_image or app_config.qlever_image,
+                        [                                        # extra_pvcs
+                            {                                    # shared PVC: sources in, staged files out
+                                "name":       "shared-source",
+                                "claim":      app_config.shared_pvc_name,
+                                "mount_path": "/shared",
+                                "read_only":  False,
+                            },
+                        ],
+                        True,                                    # read_only_default_mount
+                        {                                        # pod_security_context: write to the shared PVC, as the indexer does
+                            "run_as_user":  0,
+                            "run_as_group": 0,
+                            "fs_group":     0,
+                        },
+                    ],
+                    start_to_close_timeout=JOB_SUBMIT_TIMEOUT,
+                    retry_policy=NO_RETRY,
+                )
+                await workflow.execute_activity(
+                    watch_k8s_job_sync,
+                    args=[job_name],
+                    start_to_close_timeout=STAGE_WATCH_TIMEOUT,
+                    heartbeat_timeout=HEARTBEAT_TIMEOUT,
+                    retry_policy=NO_RETRY,
+                )
+
+        await asyncio.gather(*[bounded_stage(i, stage) for i, stage in enumerate(pending)])
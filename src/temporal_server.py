@@ -58,21 +58,31 @@ async def cleanup_repo_files(repo_id: str) -> None:
 @app.post("/convert_to_hdt")
 async def convert_to_hdt(
     action_model: LakefsMergeActionModel,
-    cpu: int = Query(3),
-    memory: str = Query("4Gi"),
+    cpu: int = Query(None),
+    memory: str = Query(None),
     ephemeral: str = Query("256Mi"),
-    java_opts: str = Query("-Xmx4G -Xms4G -Xss512m -XX:+UseParallelGC"),
-    mem_size: str = Query("4G"),
+    java_opts: str = Query(None),
+    mem_size: str = Query(None),
     hdt_exists: bool = Query(False),
     hdt_path: str = Query("hdt/"),
     exclude_files: str = Query(""),
     exclude_known_extension: str = Query(""),
+    stage_parallelism: int = Query(0),
 ):
     """
     Trigger the HDTConversionWorkflow via Temporal.
     Mirrors the existing server.py /convert_to_hdt endpoint signature.
     Enforces at most one HDT workflow per repo.
+    When none of cpu / memory / java_opts / mem_size is given, the workflow
+    sizes the job from its input size and the repo's past runs (unless
+    SIZING_ENABLED is off, which keeps the fixed defaults below).
     """
+    auto_size = (config.sizing_enabled and cpu is None and memory is None
+                 and java_opts is None and mem_size is None)
+    cpu = cpu or 3
+    memory = memory or "4Gi"
+    java_opts = java_opts or "-Xmx4G -Xms4G -Xss512m -XX:+UseParallelGC"
+    mem_size = mem_size or "4G"
     repo_id = action_model.repository_id
     workflow_id = f"hdt-{repo_id}"
 
@@ -122,7 +132,9 @@ async def convert_to_hdt(
             convert_to_hdt=not hdt_exists,
             hdt_path=hdt_path,
             exclude_files=parsed_exclude_files,
-            exclude_known_extension=parsed_exclude_known_extension
+            exclude_known_extension=parsed_exclude_known_extension,
+            stage_parallelism=stage_parallelism or None,
+            auto_size=auto_size,
         ),
         id=workflow_id,
         task_queue="frink-temporal-queue",
@@ -270,14 +282,15 @@ async def handle_tag_creation(
 
 
 @app.post("/sync_ldf")
-async def sync_ldf(only_repo: str = Query(None, description="Optional lakefs repo to sync; omit to sync all KGs")):
+async def sync_ldf(only_repo: str = Query(None, description="Optional lakefs repo to sync; omit to sync all KGs"),
+                   concurrency: int = Query(0, description="KGs downloaded at once; 0 uses LDF_SYNC_CONCURRENCY")):
     """Trigger a full (or single-repo) LDF aggregator sync."""
     workflow_id = f"ldf-sync-{only_repo or 'all'}"
     client = await get_client()
     await cancel_existing_workflow(client, workflow_id)
     handle = await client.start_workflow(
         "LDFSyncWorkflow",
-        args=[only_repo],
+        args=[only_repo, concurrency or None],
         id=workflow_id,
         task_queue="frink-temporal-queue",
     )
@@ -356,5 +369,18 @@ async def trigger_qlever_federation_deploy(
     }
 
 
+
+@app.get("/job_telemetry")
+async def job_telemetry(
+    job_type: str = Query(None, description="e.g. hdtc-job, qlever-index-job, ldf-sync-job"),
+    repo: str = Query(None, description="LakeFS repository id, or 'federated' for the federated QLever jobs"),
+):
+    """Recorded runs of finished K8s jobs (durations, exit reasons, OOM
+    kills, limits and peak usage), per job type and repo; the last few per
+    pair, newest last. See k8s.job_telemetry."""
+    from k8s import job_telemetry as telemetry
+    from k8s.executor import run_k8s
+    return await run_k8s(telemetry.query, job_type, repo)
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=9899)